@@ -0,0 +1,41 @@
+"""Start-up time and peak memory of loading item resources from a 20k item ``items.cdata``.
+
+Every run is a fresh interpreter: the first one builds and saves the index, the next ones reuse it.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import ROOT, wire
+
+ITEMS = 20_000
+
+RUN = """
+import resource, sys, time
+sys.path.insert(0, {src!r})
+import antorum.multiplayer
+from antorum.cache import ItemCache
+start = time.perf_counter()
+cache = ItemCache({items_path!r})
+cache[{resource_id}]
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"first lookup {{elapsed * 1e3:7.1f}} ms, peak RSS {{peak:6.1f}} MB")
+"""
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        items_path = os.path.join(directory, "items.cdata")
+        with open(items_path, "wb") as f:
+            f.write(wire.items_file([f"Item {index}" for index in range(ITEMS)]))
+
+        code = RUN.format(src=os.path.join(ROOT, "src"), items_path=items_path, resource_id=ITEMS // 2)
+        for label in ("building the index", "saved index", "saved index"):
+            result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+            print(f"{label:20s} {result.stdout.strip()}")
+
+
+if __name__ == "__main__":
+    main()
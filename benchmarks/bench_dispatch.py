@@ -0,0 +1,57 @@
+"""Time from a chat packet being written by the server to its handler running in the client, and the CPU the client
+uses while nothing is received. Packets used to be picked up by a loop polling every 10 ms."""
+import asyncio
+import logging
+import statistics
+import time
+
+from common import wire
+
+from antorum import multiplayer
+from antorum.packets import chat
+
+PACKETS = 200
+
+
+async def main():
+    writers = []
+    received = asyncio.Event()
+    handled = []
+
+    async def serve(reader, writer):
+        writers.append(writer)
+        while await reader.read(1 << 16):  # Ignore whatever the client sends
+            pass
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    client = multiplayer.Client("127.0.0.1", server.sockets[0].getsockname()[1])
+    client.handlers.add_handler(chat, lambda packet, _: (handled.append(time.perf_counter()), received.set()))
+    await client.connect()
+
+    while not writers:
+        await asyncio.sleep(0.01)
+
+    latencies = []
+    for index in range(PACKETS):
+        received.clear()
+        start = time.perf_counter()
+        writers[0].write(wire.frame(chat.packet_id, wire.chat(f"Message {index}")))
+        await received.wait()
+        latencies.append(handled[-1] - start)
+        await asyncio.sleep(0.002)
+
+    latencies.sort()
+    print(f"dispatch latency: median {statistics.median(latencies) * 1e3:.3f} ms, "
+          f"p95 {latencies[int(PACKETS * 0.95)] * 1e3:.3f} ms, max {latencies[-1] * 1e3:.3f} ms")
+
+    cpu = time.process_time()
+    await asyncio.sleep(2)
+    print(f"idle CPU over 2 s: {(time.process_time() - cpu) * 1e3:.1f} ms")
+
+    client.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""Memory held per entity once a 10k entity world sync has been handled and the packet itself is gone.
+
+The frame is decoded from a bytearray like the receive buffer. States that are still pending keep copies of their
+own bytes, so once the packet is handled the buffer can be resized and freed and isn't part of what's measured.
+"""
+import gc
+import tracemalloc
+
+from common import world_payload
+
+from antorum.game import Game
+from antorum.packets import world_entities
+from antorum.packets.world_entities import DEFAULT_EAGER_STATES
+from antorum.utils import StateType
+
+ENTITIES = 10_000
+
+
+def held_by_game(payload: bytes, eager) -> int:
+    gc.collect()
+    tracemalloc.start()
+
+    world_entities.eager_state_ids = frozenset(state_type.value for state_type in eager)
+    buffer = bytearray(payload)
+    with memoryview(buffer) as frame:
+        packet = world_entities.Response(frame)
+    game = Game(1, 1)
+    game.replace_entities(packet.entities)
+    del packet
+    gc.collect()
+
+    del buffer[:]  # Raises BufferError if anything still holds a view into the frame
+
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del game
+    return size
+
+
+def main():
+    payload = world_payload(ENTITIES)
+
+    for label, eager in (("default eager states", DEFAULT_EAGER_STATES), ("every state", tuple(StateType))):
+        size = held_by_game(payload, eager)
+        print(f"{label:24s} {size / ENTITIES:8.0f} bytes/entity, {size / 1e6:.1f} MB "
+              f"(the packet was {len(payload) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Unfiltered proximity queries over 10k entities on the NumPy position table, against the spatial grid."""
+import random
+
+from common import MAP_SIZE, best, report, world_payload
+
+from antorum.game import Game
+from antorum.packets import world_entities
+
+ENTITIES = 10_000
+
+
+def main():
+    payload = world_payload(ENTITIES, players_every=ENTITIES)
+    grid = Game(1, 1)
+    grid.replace_entities(world_entities.Response(payload).entities)
+    table = Game(1, 1, position_table=True)
+    table.replace_entities(world_entities.Response(payload).entities)
+
+    rng = random.Random(5)
+    coords = (rng.uniform(0, MAP_SIZE), rng.uniform(0, MAP_SIZE))
+    bounds = ((100, 100), (400, 300))
+    assert ([entity.network_id for entity in grid.nearest_entities(coords, 10)] ==
+            [entity.network_id for entity in table.nearest_entities(coords, 10)])
+
+    for label, query in (("nearest", lambda game: game.nearest_entity(coords)),
+                         ("nearest 10", lambda game: game.nearest_entities(coords, 10)),
+                         ("within 100", lambda game: game.entities_within(coords, 100)),
+                         ("in bounds", lambda game: game.entities_in_bounds(bounds)),
+                         ("closest enemy", lambda game: game.distance_to_closest_enemy(coords))):
+        report(f"{label}, grid", best(lambda: query(grid), 200))
+        report(f"{label}, table", best(lambda: query(table), 200))
+
+    entity = table.entities[15]
+    report("Entity.position, table", best(lambda: entity.position, 100_000), "ns")
+
+
+if __name__ == "__main__":
+    main()
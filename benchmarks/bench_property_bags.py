@@ -0,0 +1,46 @@
+"""Decoding inventories and equipment whose items repeat a few property bags, parsed bags are shared."""
+import random
+
+from common import best, report, wire
+
+from antorum.cache import ItemCache
+from antorum.packets import inventory, world_entities
+from antorum.packets.item import _parse_property_bag, parse_property_bag
+
+BAGS = ["", "", "", '{"durability": 5, "max_durability": 10}', '{"durability": 7, "max_durability": 10}',
+        '{"durability": 10, "max_durability": 10, "creator": "Smith"}']
+
+
+def main(items_path: str):
+    inventory.resources = ItemCache(items_path)
+
+    rng = random.Random(2)
+    inventory_payload = wire.i64(20) + b"".join(wire.inventory_item(slot, 0, 1, rng.choice(BAGS)) for slot in range(20))
+    players = [wire.entity(index, [wire.info_state(f"Player{index}"), wire.transform_state(1, 1),
+                                   wire.player_state(index),
+                                   wire.equipment_state([(slot, 0, 1, rng.choice(BAGS)) for slot in range(1, 6)])])
+               for index in range(500)]
+    world_payload = wire.world_entities(players)
+
+    def full_sync():
+        for entity in world_entities.Response(world_payload).entities:
+            list(entity.states.values())
+
+    report("inventory, 20 items", best(lambda: inventory.Response(inventory_payload), 2000))
+    report("full sync, 500 players with 5 items each", best(full_sync, 10), "ms")
+
+    text = BAGS[-1]
+    report("parse a repeated bag", best(lambda: parse_property_bag(text), 100_000), "ns")
+    report("parse a bag without the cache", best(lambda: _parse_property_bag.__wrapped__(text), 100_000), "ns")
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "items.cdata")
+        with open(path, "wb") as f:
+            f.write(wire.items_file(["Copper pickaxe"]))
+
+        main(path)
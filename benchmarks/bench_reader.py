@@ -0,0 +1,68 @@
+"""BufferReader against the reader it replaced, which sliced bytes and called ``int.from_bytes`` for every value."""
+import struct
+
+from common import best, report, world_payload
+
+from antorum.packets import world_entities
+from antorum.utils import BufferReader
+
+
+class SlicingReader:
+    """The BufferReader from before it was backed by a memoryview and precompiled structs."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pointer = 0
+
+    def read(self, size: int) -> bytes:
+        data = self.data[self.pointer:self.pointer + size]
+        self.pointer += size
+        return data
+
+    def read_int8(self, signed: bool = False) -> int:
+        return int.from_bytes(self.read(1), "big", signed=signed)
+
+    def read_int32(self, signed: bool = False) -> int:
+        return int.from_bytes(self.read(4), "big", signed=signed)
+
+    def read_int64(self, signed: bool = False) -> int:
+        return int.from_bytes(self.read(8), "big", signed=signed)
+
+    def read_string(self) -> str:
+        return self.read(self.read_int64()).decode("utf-8")
+
+    def read_float(self) -> float:
+        return struct.unpack(">f", self.read(4))[0]
+
+
+DATA = bytes(range(256)) * 128  # Room for READS of the widest value
+READS = 4096
+
+
+def reads(reader_cls, method: str):
+    reader = reader_cls(DATA)
+    read = getattr(reader, method)
+
+    def run():
+        reader.pointer = 0
+        for _ in range(READS):
+            read()
+
+    return run
+
+
+def main():
+    for method in ("read_int8", "read_int32", "read_int64", "read_float"):
+        report(f"{method} old", best(reads(SlicingReader, method), 10) / READS, "ns")
+        report(f"{method} new", best(reads(BufferReader, method), 10) / READS, "ns")
+
+    reader = BufferReader(DATA)
+    floats = (lambda: (setattr(reader, "pointer", 0), reader.read_floats(8)))
+    report("read_floats(8)", best(floats, 100_000), "ns")
+
+    payload = world_payload(5000)
+    report("world_entities, 5000 entities", best(lambda: world_entities.Response(payload), 5), "ms")
+
+
+if __name__ == "__main__":
+    main()
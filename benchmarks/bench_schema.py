@@ -0,0 +1,42 @@
+"""Decode time of every received packet type, from its schema."""
+from common import best, report, wire
+
+from antorum.packets import handlers
+
+PAYLOADS = {
+    "barter_close": wire.i8(1),
+    "barter_move": wire.i32(5) + wire.i32(6) + wire.i8(2) + wire.i64(2) + (wire.i8(1) + wire.i8(2) + wire.i32(3)) * 2,
+    "barter_open": wire.i64(2) + wire.i8(1) + wire.i32(10) + wire.i8(2) + wire.i32(20) + wire.i64(1) + wire.i64(7)
+    + wire.i32(1) + wire.i32(2) + wire.i8(1) + wire.i8(0) + wire.string("Shop"),
+    "character_creation": wire.i8(4),
+    "chat": wire.chat("Hi there", 3, "Bob", 2),
+    "combat": wire.i64(9),
+    "entity_despawn": wire.i64(5),
+    "entity_spawn": wire.player_entity(100, 3, "Bob"),
+    "entity_state": wire.i64(100) + wire.movement_state([(1, 2), (3, 4)]),
+    "exp": wire.i64(100) + wire.i8(2) + wire.i32(50),
+    "halt": wire.i64(4),
+    "handshake": wire.i8(0) + wire.i32(3) + wire.string("a2V5") + wire.string("News"),
+    "interact": wire.i64(1) + wire.i64(2) + wire.i32(10) + wire.i32(3) + wire.i8(0) + wire.i8(1),
+    "inventory_remove": wire.i8(2) + wire.i32(1),
+    "login": wire.i8(0) + wire.i64(99),
+    "move": wire.i64(100) + wire.i64(2) + wire.f32(1) + wire.f32(2) + wire.f32(3) + wire.f32(4),
+    "move_failed": b"",
+    "skills": wire.i64(10) + b"".join(wire.i8(skill) + wire.i32(100) + wire.i32(20) + wire.i32(0) + wire.i32(200)
+                                      for skill in range(10)),
+    "stats": wire.i64(2) + wire.i8(0) + wire.i32(5) + wire.i8(3) + wire.i32(7) + wire.i32(30) + wire.f32(.5) * 4
+    + wire.f32(.25) * 3 + wire.i64(0),
+    "world_entities": wire.world_entities([wire.weed_entity(10 + index, index, index) for index in range(100)]),
+}
+
+
+def main():
+    modules = {module.__name__.rsplit(".", 1)[-1]: module for module in handlers.values()}
+
+    for name, payload in PAYLOADS.items():
+        receive_packet = modules[name].receive_packet
+        report(name, best(lambda: receive_packet(payload), 2000 if name != "world_entities" else 50))
+
+
+if __name__ == "__main__":
+    main()
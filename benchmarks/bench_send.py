@@ -0,0 +1,46 @@
+"""Packets per second the client sends to a local server, queued packets go out in one write per batch."""
+import asyncio
+import logging
+import time
+
+import common  # noqa: F401
+
+from antorum import multiplayer, packets
+
+PACKETS = 100_000
+MOVE_SIZE = 3 + 8  # Frame header and two floats
+
+
+async def main():
+    received = 0
+    expected = None
+    done = asyncio.Event()
+
+    async def sink(reader, writer):
+        nonlocal received
+        while data := await reader.read(1 << 20):
+            received += len(data)
+            if expected is not None and received >= expected:
+                done.set()
+
+    server = await asyncio.start_server(sink, "127.0.0.1", 0)
+    client = multiplayer.Client("127.0.0.1", server.sockets[0].getsockname()[1])
+    await client.connect()
+    await asyncio.sleep(0.05)  # Let the handshake go out first
+
+    expected = received + PACKETS * MOVE_SIZE
+    start = time.perf_counter()
+    for index in range(PACKETS):
+        client.send(packets.Move(index, index))
+    await done.wait()
+    elapsed = time.perf_counter() - start
+
+    print(f"send: {PACKETS / elapsed:,.0f} packets/s ({PACKETS:,} move packets in {elapsed * 1e3:.0f} ms)")
+
+    client.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+"""Nearest and radius queries over 10k entities on the spatial grid of Game, against scanning every entity."""
+import math
+import random
+
+from common import MAP_SIZE, best, linear_nearest, report, world_payload
+
+from antorum.game import Game
+from antorum.packets import world_entities
+from antorum.utils import StateType
+
+ENTITIES = 10_000
+
+
+def main():
+    entities = world_entities.Response(world_payload(ENTITIES, players_every=ENTITIES)).entities
+    game = Game(1, 1)
+    game.replace_entities(entities)
+
+    rng = random.Random(3)
+    queries = [(rng.uniform(0, MAP_SIZE), rng.uniform(0, MAP_SIZE)) for _ in range(100)]
+    for coords in queries:  # Same answers as the scan
+        assert math.isclose(math.dist(coords, game.nearest_entity(coords).position),
+                            math.dist(coords, linear_nearest(coords, entities).position))
+
+    coords = queries[0]
+    report("nearest, scan", best(lambda: linear_nearest(coords, entities), 20))
+    report("nearest, grid", best(lambda: game.nearest_entity(coords), 2000))
+    report("nearest forageable, grid", best(lambda: game.nearest_entity(coords, lambda e: e.can_forage()), 2000))
+    report("within 40, scan", best(lambda: [e for e in entities if math.dist(coords, e.position) <= 40], 20))
+    report("within 40, grid", best(lambda: game.entities_within(coords, 40), 2000))
+    report("closest enemy, grid", best(lambda: game.distance_to_closest_enemy(coords), 2000))
+    report("nearest safe, grid", best(lambda: game.nearest_safe_entity(coords, safe_distance=10), 2000))
+
+    entity = entities[5]
+    report("re-index a moved entity", best(lambda: game.entity_changed(entity, (StateType.TRANSFORM,)), 20_000))
+
+
+if __name__ == "__main__":
+    main()
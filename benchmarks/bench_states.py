@@ -0,0 +1,33 @@
+"""Decoding a 5000 entity world sync, with only the commonly used states decoded right away and with every state."""
+import tracemalloc
+
+from common import best, report, world_payload
+
+from antorum.packets import world_entities
+from antorum.packets.world_entities import DEFAULT_EAGER_STATES
+from antorum.utils import StateType
+
+ENTITIES = 5000
+
+
+def main():
+    payload = world_payload(ENTITIES)
+
+    for label, eager in (("default eager states", DEFAULT_EAGER_STATES), ("every state", tuple(StateType))):
+        world_entities.eager_state_ids = frozenset(state_type.value for state_type in eager)
+
+        def decode():
+            return world_entities.Response(payload)
+
+        report(f"{ENTITIES} entities, {label}", best(decode, 3), "ms")
+
+        tracemalloc.start()
+        packet = decode()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del packet
+        print(f"{'':48s} {size / ENTITIES:10.0f} bytes/entity")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Shared setup of the benchmarks, run them from the repository root, e.g. ``python benchmarks/bench_schema.py``.
+
+The packets are built with the hand-written encoders in ``tests/wire.py``.
+"""
+import math
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "tests")]
+
+import antorum.multiplayer  # noqa: E402, F401  imports the packet modules in the order they import each other
+import wire  # noqa: E402
+
+MAP_SIZE = 1056  # Width and height of the game map
+ANIMATOR_STATE = (wire.i32(13) + wire.i64(0) + wire.i64(2) + wire.string("walk") + wire.i8(1) + wire.string("run")
+                  + wire.i8(0))
+
+
+def best(function, number: int, repeat: int = 5) -> float:
+    """Seconds per call of the fastest of ``repeat`` runs of ``number`` calls."""
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def report(label: str, seconds: float, unit: str = "us"):
+    scale = {"s": 1, "ms": 1e3, "us": 1e6, "ns": 1e9}[unit]
+    print(f"{label:48s} {seconds * scale:10.2f} {unit}")
+
+
+def world_payload(count: int, seed: int = 1, players_every: int = 10) -> bytes:
+    """A world_entities payload of weeds spread over the map, every ``players_every``-th entity is a player.
+
+    Players also have the equipment and animator states, which bots rarely look at.
+    """
+    rng = random.Random(seed)
+    entities = []
+
+    for index in range(count):
+        x, y = rng.uniform(0, MAP_SIZE), rng.uniform(0, MAP_SIZE)
+        if index % players_every == 0:
+            entities.append(wire.entity(10 + index, [
+                wire.info_state(f"Player{index}"), wire.transform_state(x, y), wire.movement_state([], False),
+                wire.health_state(30, 30), wire.player_state(index), wire.equipment_state(), ANIMATOR_STATE]))
+        else:
+            entities.append(wire.weed_entity(10 + index, x, y, "Gremneer" if index % 201 == 0 else "Skartweed"))
+
+    return wire.world_entities(entities)
+
+
+def linear_nearest(coords, entities):
+    """How the nearest entity was found before the spatial indexes, a scan over every entity."""
+    return min(entities, key=lambda entity: math.dist(coords, entity.position), default=None)
@@ -1,59 +1,76 @@
 import asyncio
-import datetime
 import logging
-import traceback
+import time
 from typing import Dict, List
 
 from antorum import multiplayer
 from antorum import packets
 from antorum import utils
+from antorum.events import Condition, EventType
 from antorum.packets.barter_close import BarterStatus
 from antorum.packets.barter_open import BarterInventoryItemArea
 from antorum.packets.world_entities import Entity
 from antorum.player import SkillType
-from antorum.utils import StateType, get_future_position_from_entity, message_contains_since, map_to_game_coords, \
-    is_nearby, get_nearest_entity, time_to_dests, coords_in_bounds, inventory_contains_resource_id, wait_for, \
-    get_resource_by_name, get_inventory_slot_by_resource_id, amount_of_resource_in_inventory, has_sufficient_level
+from antorum.scheduler import ScheduledAction
+from antorum.utils import InteractionType, get_future_position_from_entity, map_to_game_coords, \
+    is_nearby, get_nearest_entity, coords_in_bounds, inventory_contains_resource_id, \
+    get_resource_by_name, amount_of_resource_in_inventory, has_sufficient_level
 
 
 class Action:
+    moves = True  # Whether the action moves the player, the client's scheduler runs one of those at a time
+    priority = 0  # Default priority on the scheduler, higher runs first and pre-empts lower moving actions
+
     def __init__(self, client: multiplayer.Client):
         self.client = client
-        self._task: asyncio.Task = None
+        self.scheduled: ScheduledAction = None
 
     @property
     def done(self):
-        return self._task.done()
+        return self.scheduled is not None and self.scheduled.done
 
     @property
     def result(self):
+        if not self.done:
+            return None
+
         try:
-            return self._task.result()
-        except (asyncio.CancelledError, asyncio.InvalidStateError):
+            return self.scheduled.result()
+        except (asyncio.CancelledError, Exception):  # The scheduler logged why
             return None
 
     async def wait_to_finish(self):
-        while not self.done:
-            await asyncio.sleep(0.1)
-
-    async def run_wrapper(self, *args, **kwargs):
+        """Waits for the action to finish and returns its result, raises if it failed. None if it was stopped."""
         try:
-            return await self._run(*args, **kwargs)
-        except Exception as e:
-            traceback.print_exception(
-                type(e), e, e.__traceback__
-            )
+            return await self.scheduled
+        except asyncio.CancelledError:
+            if self.scheduled.done and self.scheduled.future.cancelled():
+                return None
+
+            raise  # The waiting task itself was cancelled
 
     async def _run(self, *args, **kwargs):
         # Has to be implemented by the subclass
         pass
 
-    async def run(self, *args, **kwargs):
-        self._task = asyncio.create_task(self.run_wrapper(*args, **kwargs))
+    async def wait_for_change(self, event_type: EventType, condition, timeout: float) -> bool:
+        """Waits until ``condition()`` holds, checking it again every time an ``event_type`` event happens."""
+        return await self.client.wait_for(Condition(condition, event_type), timeout)
+
+    async def run(self, *args, priority: int = None, after: "Action | ScheduledAction" = None,
+                  **kwargs) -> ScheduledAction:
+        """Queues the action on the client's scheduler, optionally only once ``after`` succeeded."""
+        if isinstance(after, Action):
+            after = after.scheduled
+
+        self.scheduled = self.client.scheduler.schedule(
+            self, *args, priority=self.priority if priority is None else priority, after=after, **kwargs)
+        return self.scheduled
 
     def stop(self):
         logging.info(f"Stopping action {self.__class__.__name__}")
-        self._task.cancel()
+        if self.scheduled is not None:
+            self.scheduled.cancel()
 
 
 class ForageWeeds(Action):
@@ -63,7 +80,7 @@ class ForageWeeds(Action):
     last_weed_id = 0
 
     async def forage(self):
-        weed = await self.get_nearest_forageable(self.client.game.entities, [self.last_weed_id])
+        weed = self.nearest_forageable([self.last_weed_id])
 
         if not weed:
             return False
@@ -71,7 +88,8 @@ class ForageWeeds(Action):
         weed.forage()
         logging.info(f"Attempting to forage entity {weed.name} ({weed.network_id})")
 
-        success = await wait_for(
+        success = await self.wait_for_change(
+            EventType.ENTITY_MOVED,
             lambda: weed.is_nearby(get_future_position_from_entity(self.client.game.network_id, self.client.game)),
             5)
 
@@ -80,18 +98,13 @@ class ForageWeeds(Action):
                 f"Failed to trigger forage on entity {weed.name} ({weed.network_id}) after 5 seconds")
             return False
 
-        movement = self.client.game.entities[self.client.game.network_id].states[StateType.MOVEMENT].state
-        start_time = datetime.datetime.now()
-        travel_time = time_to_dests(self.client.game.local_player.position, movement.destinations,
-                                    movement.speed) + 10  # 10 seconds for good measure
+        start_time = time.monotonic()
+        travel_time = self.client.game.local_player.entity.time_to_destination() + 10  # 10 seconds for good measure
         self.last_weed_id = weed.network_id
 
         logging.debug(f"Travel time to forage: {travel_time} seconds")
 
-        success = await wait_for(
-            lambda: message_contains_since("You harvest", self.client.game.chat_log, start_time), travel_time)
-
-        if not success:
+        if not await self.client.game.chat_log.wait_for("You harvest", travel_time, since=start_time):
             return False
 
         logging.info(f"Successfully foraged entity {weed.name} ({weed.network_id})")
@@ -107,18 +120,32 @@ class ForageWeeds(Action):
             wait_for_movement = False  # Already in the forage area
 
         if loop:
-            while True:
-                await asyncio.sleep(0.1)
-                time = datetime.datetime.now()
-                await self.forage()
-
-                if message_contains_since("You need at least one free bag slot to forage.", self.client.game.chat_log,
-                                          time):
-                    return True
+            inventory = self.client.game.local_player.inventory
+            # The inventory doesn't know how big the bag is until it's full, the game says when it is
+            inventory_full = self.client.game.chat_log.watch("You need at least one free bag slot to forage.")
+            full = Condition(lambda: (inventory.size_known and inventory.is_full) or inventory_full.done(),
+                             EventType.INVENTORY_CHANGED, EventType.CHAT_RECEIVED)
+            weed_available = Condition(lambda: self.nearest_forageable([self.last_weed_id]) is not None,
+                                       EventType.ENTITY_SPAWNED, EventType.ENTITY_STATE_CHANGED, EventType.WORLD_SYNCED,
+                                       EventType.SKILLS_CHANGED)
+
+            try:
+                while not full.check():
+                    if not await self.forage():
+                        # Nothing to forage right now, wait for something to change instead of trying again
+                        await self.client.first_of(full, weed_available)
+
+                if inventory_full.done():
+                    inventory.set_full()
+            finally:
+                inventory_full.cancel()
+
+            return True
 
         else:
             if wait_for_movement:
-                success = await wait_for(
+                success = await self.wait_for_change(
+                    EventType.ENTITY_MOVED,
                     lambda: not is_nearby(
                         get_future_position_from_entity(self.client.game.network_id, self.client.game),
                         self.forage_coords[2], 10), 5)
@@ -127,13 +154,14 @@ class ForageWeeds(Action):
                     logging.warning("Failed to move to forage area after 5 seconds")
                     return False
 
-                movement = self.client.game.entities[self.client.game.network_id].states[StateType.MOVEMENT].state
-                travel_time = time_to_dests(self.client.game.local_player.position, movement.destinations,
-                                            movement.speed)
+                travel_time = self.client.game.local_player.entity.time_to_destination()
 
-                success = await wait_for(
+                # The position changes continuously while moving, there's no event for reaching the area but the
+                # path says when the player gets there
+                in_area = Condition(
                     lambda: coords_in_bounds(self.client.game.local_player.position, self.forage_coords[:2]),
-                    travel_time)
+                    EventType.ENTITY_MOVED, wake_at=asyncio.get_running_loop().time() + travel_time)
+                success = await self.client.wait_for(in_area, travel_time + 1)
 
                 if not success:
                     logging.warning(f"Failed to move to forage area after {travel_time} seconds")
@@ -142,17 +170,22 @@ class ForageWeeds(Action):
             return await self.forage()
 
     async def get_nearest_forageable(self, entities: Dict[int, Entity], excluded: List[int]) -> Entity:
-        forageables = {}
+        return self.nearest_forageable(excluded, entities)
+
+    def nearest_forageable(self, excluded: List[int], entities: Dict[int, Entity] = None) -> Entity:
+        game = self.client.game
+        level = game.local_player.skills[SkillType.HERBOLOGY].level
+
+        def can_forage(entity: Entity):
+            return (entity.can_forage() and entity.network_id not in excluded
+                    and coords_in_bounds(entity.position, self.forage_coords)
+                    and has_sufficient_level(self.weed_levels, level, entity.name.lower()))
 
-        for entity in entities.values():
-            if ((entity.can_forage() and coords_in_bounds(entity.position, self.forage_coords)
-                 and entity.network_id not in excluded)
-                    and has_sufficient_level(self.weed_levels,
-                                             self.client.game.local_player.skills[SkillType.HERBOLOGY].level,
-                                             entity.name.lower())):
-                forageables[entity.network_id] = entity
+        if entities is None or entities is game.entities:
+            return game.nearest_entity(game.local_player.position, can_forage)
 
-        return get_nearest_entity(self.client.game.local_player.position, forageables)
+        forageables = {entity.network_id: entity for entity in entities.values() if can_forage(entity)}
+        return get_nearest_entity(game.local_player.position, forageables)
 
 
 class FollowPlayer(Action):
@@ -168,17 +201,18 @@ class FollowPlayer(Action):
             await self.client.move(*original_position)
 
         while True:
-            if original_position != utils.get_future_position_from_entity(network_id, self.client.game):
-                original_position = utils.get_future_position_from_entity(network_id, self.client.game)
-                await self.client.move(*original_position)
+            await self.client.wait_for(Condition(
+                lambda: original_position != utils.get_future_position_from_entity(network_id, self.client.game),
+                EventType.ENTITY_MOVED))
 
-            await asyncio.sleep(0.01)
+            original_position = utils.get_future_position_from_entity(network_id, self.client.game)
+            await self.client.move(*original_position)
 
     async def _run(self):
         logging.info(f"Following player {self.username}")
         player = utils.get_entity_from_player_id(
             utils.get_player_id_from_username(self.username, self.client.game),
-            list(self.client.game.entities.values()))
+            self.client.game)
 
         if player:
             await self.follow(player.network_id)
@@ -213,18 +247,25 @@ class SellInventory(Action):
             logging.error(f"Not enough of item {self.item_name} to sell")
             return
 
-        while not (barter := (await self.get_barter_entity(self.client.game.entities))):
-            await asyncio.sleep(0.5)
-            if not self.is_moving:
-                await self.client.move(self.barter_coords[0][0], self.barter_coords[0][1])
+        if not await self.get_barter_entity(self.client.game.entities):
+            await self.client.move(self.barter_coords[0][0], self.barter_coords[0][1])
+            self.is_moving = True
+
+            # Barters come into view as the player gets closer
+            barters = self.client.game.entities_that_can
+            await self.client.wait_for(Condition(
+                lambda: any(entity.can_barter() for entity in barters(InteractionType.BARTER)),
+                EventType.ENTITY_SPAWNED, EventType.ENTITY_STATE_CHANGED, EventType.WORLD_SYNCED))
 
+        barter = await self.get_barter_entity(self.client.game.entities)
         self.is_moving = False
 
         barter.barter()
 
         logging.info(f"Attempting to barter with {barter.name} ({barter.network_id})")
 
-        success = await wait_for(
+        success = await self.wait_for_change(
+            EventType.ENTITY_MOVED,
             lambda: barter.is_nearby(get_future_position_from_entity(self.client.game.network_id, self.client.game)), 5)
 
         if not success:
@@ -232,23 +273,19 @@ class SellInventory(Action):
                 f"Failed to trigger barter on entity {barter.name} ({barter.network_id}) after 5 seconds")
             return False
 
-        travel_time = time_to_dests(self.client.game.local_player.position,
-                                    self.client.game.entities[barter.network_id].states[
-                                        StateType.MOVEMENT].state.destinations,
-                                    self.client.game.entities[self.client.game.network_id].states[
-                                        StateType.MOVEMENT].state.speed) + 10
+        travel_time = self.client.game.local_player.entity.time_to_destination() + 10
 
-        success = await wait_for(lambda: self.client.game.barter, travel_time)
+        success = await self.wait_for_change(EventType.BARTER_OPENED, lambda: self.client.game.barter, travel_time)
 
         if not success:
             logging.warning(f"Failed to open barter after {travel_time} seconds")
             return False
 
-        slot = get_inventory_slot_by_resource_id(self.item.resource_id, self.client.game.local_player.inventory)
+        # The amount can be spread over several stacks
+        for slot, amount in self.client.game.local_player.inventory.plan_removal(self.item.resource_id, self.amount):
+            self.client.send(packets.BarterMove(BarterInventoryItemArea.INVENTORY, slot, amount))
 
-        self.client.send(packets.BarterMove(BarterInventoryItemArea.INVENTORY, slot, self.amount))
-
-        success = await wait_for(lambda: self.client.game.barter.you_offer, 5)
+        success = await self.wait_for_change(EventType.BARTER_CHANGED, lambda: self.client.game.barter.you_offer, 5)
 
         if not success:
             logging.warning(f"Failed to move item to barter after 5 seconds")
@@ -257,7 +294,7 @@ class SellInventory(Action):
 
         self.client.send(packets.BarterClose(BarterStatus.ACCEPTED))
 
-        success = await wait_for(lambda: not self.client.game.barter, 5)
+        success = await self.wait_for_change(EventType.BARTER_CLOSED, lambda: not self.client.game.barter, 5)
 
         if not success:
             logging.warning(f"Failed to close barter after 5 seconds")
@@ -266,10 +303,9 @@ class SellInventory(Action):
         return True
 
     async def get_barter_entity(self, entities: Dict[int, Entity]):
-        barters = {}
-
-        for entity in entities.values():
-            if entity.can_barter():
-                barters[entity.network_id] = entity
+        game = self.client.game
+        if entities is game.entities:
+            return game.nearest_entity(game.local_player.position, Entity.can_barter)
 
-        return get_nearest_entity(self.client.game.local_player.position, barters)
+        barters = {entity.network_id: entity for entity in entities.values() if entity.can_barter()}
+        return get_nearest_entity(game.local_player.position, barters)
@@ -1,24 +1,179 @@
+import array
+import logging
+import mmap
 import os
+import struct
+import sys
+from os import path
+from typing import Dict, Iterator, Mapping
 
+from antorum.packets.handshake import ITEM_CACHE
 from antorum.packets.item import ItemResource
-from antorum.utils import BufferReader
-from os import path
+from antorum.schema import Tuple, value_skipper
+from antorum.utils import BufferReader, STRUCT_PREFIX
 
 PATH = path.expandvars(r"%userprofile%/AppData/LocalLow/ratwizard/Antorum") if os.name == "nt" else "antorum_data"
 
+ITEMS_HEADER = struct.Struct(STRUCT_PREFIX + "qq")  # [int64 version][int64 item count]
+# [magic][index format][items version][item cache hash][items size][items mtime][item count], then the resource ids and
+# their offsets in the items file
+INDEX_HEADER = struct.Struct("<4sIqQqqq")
+INDEX_MAGIC = b"AIDX"
+INDEX_FORMAT = 1
+
+_skip_resource = value_skipper(Tuple(*ItemResource.schema.fields.values()))
+
+
+class ItemCache(Mapping[int, ItemResource]):
+    """Item resources by resource id, read from the game's ``items.cdata``.
+
+    Nothing is read until the first lookup. The file is memory-mapped and resources are decoded one at a time when
+    they're looked up, using an index of their offsets. The index is saved next to the file and reused as long as the
+    file and the item cache hash sent in the handshake haven't changed, so later runs don't parse the file at all.
+    A missing file is logged and behaves like an empty cache. ``close`` (or leaving a ``with`` block) unmaps the file,
+    it's mapped again by the next lookup of a resource that wasn't decoded yet.
+    """
+
+    def __init__(self, items_path: str = None, index_path: str = None, item_cache: int = ITEM_CACHE):
+        self.items_path = items_path or PATH + "/cache/items.cdata"
+        self.index_path = index_path or path.splitext(self.items_path)[0] + ".index"
+        self.item_cache = item_cache
+        self.version: int | None = None
+
+        self._map: mmap.mmap | None = None
+        self._stat: tuple | None = None  # Size and mtime of the file the offsets were read from
+        self._offsets: Dict[int, int] | None = None
+        self._resources: Dict[int, ItemResource] = {}
+
+    def _open(self) -> os.stat_result | None:
+        """Maps the file, None if it can't be read. Empty files aren't mapped."""
+        try:
+            with open(self.items_path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else None
+        except OSError as e:
+            logging.warning(f"Item cache {self.items_path} can't be read, item resources won't be available: {e}")
+            return None
+
+        return stat
+
+    def _load(self) -> Dict[int, int]:
+        stat = self._open()
+        if self._map is None:
+            self._offsets = {}
+            return self._offsets
+
+        self._stat = (stat.st_size, stat.st_mtime_ns)
+        self.version, count = ITEMS_HEADER.unpack_from(self._map)
+        key = (self.version, self.item_cache, *self._stat)
+
+        self._offsets = self._read_index(key)
+        if self._offsets is None:
+            self._offsets = self._build_index(count)
+            self._write_index(key)
+
+        return self._offsets
+
+    def _read_index(self, key: tuple) -> Dict[int, int] | None:
+        try:
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if len(data) < INDEX_HEADER.size:
+            return None
+
+        magic, index_format, *index_key, count = INDEX_HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or index_format != INDEX_FORMAT or tuple(index_key) != key or \
+                len(data) != INDEX_HEADER.size + count * 16:
+            return None
+
+        entries = array.array("q", data[INDEX_HEADER.size:])
+        if sys.byteorder != "little":
+            entries.byteswap()
+
+        return dict(zip(entries[:count], entries[count:]))
+
+    def _build_index(self, count: int) -> Dict[int, int]:
+        reader = BufferReader(self._map)
+        reader.pointer = ITEMS_HEADER.size
+        offsets = {}
+
+        try:
+            for _ in range(count):
+                resource_id = reader.read_int64()
+                offsets[resource_id] = reader.pointer
+                _skip_resource(reader)
+        finally:
+            reader.data.release()  # Otherwise the map can't be closed
+
+        return offsets
+
+    def _write_index(self, key: tuple):
+        entries = array.array("q", self._offsets.keys())
+        entries.extend(self._offsets.values())
+        if sys.byteorder != "little":
+            entries.byteswap()
+        temporary = self.index_path + ".tmp"
+
+        try:
+            with open(temporary, "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_FORMAT, *key, len(self._offsets)))
+                f.write(entries.tobytes())
+            os.replace(temporary, self.index_path)
+        except OSError as e:  # Still works without it, the index is just rebuilt next time
+            logging.debug(f"Couldn't save the item cache index to {self.index_path}: {e}")
+
+    @property
+    def offsets(self) -> Dict[int, int]:
+        return self._offsets if self._offsets is not None else self._load()
+
+    def _reopen(self):
+        """Maps the file again after ``close``, its index is read again if the file changed in between."""
+        stat = self._open()
+        if stat is None or (stat.st_size, stat.st_mtime_ns) != self._stat:
+            self.close()
+            self._offsets = None
+            self._resources.clear()
+
+    def __getitem__(self, resource_id: int) -> ItemResource:
+        resource = self._resources.get(resource_id)
+        if resource is None:
+            if self._map is None and self._offsets:  # Closed since the offsets were read
+                self._reopen()
+
+            offset = self.offsets[resource_id]
+            reader = BufferReader(self._map)
+            reader.pointer = offset
+
+            try:
+                resource = self._resources[resource_id] = ItemResource(reader)
+            finally:
+                reader.data.release()
+
+        return resource
+
+    def __contains__(self, resource_id: int):
+        return resource_id in self.offsets
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
 
-def get_resources():
-    with open(PATH + r"/cache/items.cdata", "rb") as f:
-        reader = BufferReader(f.read())
+    def close(self):
+        """Unmaps the file, decoded resources stay available."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
 
-    version = reader.read_int64()
-    resources = {}
-    for _ in range(reader.read_int64()):
-        resource_id = reader.read_int64()
-        item_resource = ItemResource(reader)
-        resources[resource_id] = item_resource
+    def __enter__(self) -> "ItemCache":
+        return self
 
-    return resources
+    def __exit__(self, *exc_info):
+        self.close()
 
 
-resources = get_resources()
+resources = ItemCache()
@@ -0,0 +1,127 @@
+from dataclasses import fields
+from typing import Dict, Iterator, List, Mapping
+
+from antorum.cache import ItemCache, resources
+from antorum.packets.item import ItemAttributes, ItemResource, ItemSlot, ItemType
+
+# Boolean attributes of items that can be searched on, e.g. can_mine
+ABILITIES = tuple(field.name for field in fields(ItemAttributes) if field.type in (bool, "bool"))
+
+
+class ResourceCatalogue(Mapping[int, ItemResource]):
+    """Item resources by resource id, with indexes to look them up by name, type, slot and abilities.
+
+    The indexes are built the first time one of them is used, which decodes every resource in the cache once.
+    Names are matched case-insensitively and lists of resources are sorted by value, cheapest first. The other
+    indexes map resource ids to resources in that order, so they can be intersected without sorting again.
+    """
+
+    def __init__(self, cache: ItemCache):
+        self.cache = cache
+        self._built = False
+
+        self._by_resource_name: Dict[str, ItemResource] = {}
+        self._by_name: Dict[str, ItemResource] = {}
+        self._by_plural_name: Dict[str, ItemResource] = {}
+        self._by_type: Dict[ItemType, Dict[int, ItemResource]] = {}
+        self._by_slot: Dict[ItemSlot, Dict[int, ItemResource]] = {}
+        self._by_ability: Dict[str, Dict[int, ItemResource]] = {}
+        self._tradeable: Dict[int, ItemResource] = {}
+        self._all: Dict[int, ItemResource] = {}
+
+    def __getitem__(self, resource_id: int) -> ItemResource:
+        return self.cache[resource_id]
+
+    def __contains__(self, resource_id: int):
+        return resource_id in self.cache
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.cache)
+
+    def __len__(self):
+        return len(self.cache)
+
+    def _build(self):
+        self._all = dict(sorted(self.cache.items(), key=lambda item: item[1].value))
+
+        for resource_id, resource in self._all.items():
+            # First one wins if names are shared, like a linear search would
+            self._by_resource_name.setdefault(resource.resource_name.casefold(), resource)
+            self._by_name.setdefault(resource.name.casefold(), resource)
+            self._by_plural_name.setdefault(resource.plural_name.casefold(), resource)
+
+            for item_type in ItemType:
+                if item_type in resource.item_type:
+                    self._by_type.setdefault(item_type, {})[resource_id] = resource
+
+            attributes = resource.item_attributes
+            self._by_slot.setdefault(attributes.equipment_slot, {})[resource_id] = resource
+
+            for ability in ABILITIES:
+                if getattr(attributes, ability):
+                    self._by_ability.setdefault(ability, {})[resource_id] = resource
+
+            if resource.is_tradeable:
+                self._tradeable[resource_id] = resource
+
+        self._built = True
+
+    def _index(self, index: str):
+        if not self._built:
+            self._build()
+
+        return getattr(self, index)
+
+    def by_resource_name(self, resource_name: str) -> ItemResource | None:
+        return self._index("_by_resource_name").get(resource_name.casefold())
+
+    def by_name(self, name: str) -> ItemResource | None:
+        """Looks up a resource by its display name, singular or plural."""
+        name = name.casefold()
+        return self._index("_by_name").get(name) or self._by_plural_name.get(name)
+
+    def of_type(self, item_type: ItemType) -> List[ItemResource]:
+        return self.find(item_type=item_type)
+
+    def for_slot(self, slot: ItemSlot) -> List[ItemResource]:
+        return list(self._index("_by_slot").get(slot, {}).values())
+
+    def with_ability(self, ability: str) -> List[ItemResource]:
+        return self.find(abilities=[ability])
+
+    def find(self, item_type: ItemType = None, slot: ItemSlot = None, tradeable: bool = None,
+             abilities: List[str] = (), descending: bool = False) -> List[ItemResource]:
+        """Resources matching every given filter sorted by value, e.g. ``find(ItemType.INGREDIENT, tradeable=True)``.
+
+        Starts from the smallest index that applies and only checks the others for membership.
+        """
+        if not self._built:
+            self._build()
+
+        candidates = []
+        if item_type is not None:
+            # A combined flag like CONSUMABLE | INGREDIENT needs every one of its flags
+            candidates += [self._by_type.get(flag, {}) for flag in ItemType if flag in item_type]
+        if slot is not None:
+            candidates.append(self._by_slot.get(slot, {}))
+        if tradeable:
+            candidates.append(self._tradeable)
+        for ability in abilities:
+            if ability not in ABILITIES:
+                raise ValueError(f"Unknown ability {ability}, expected one of {', '.join(ABILITIES)}")
+            candidates.append(self._by_ability.get(ability, {}))
+
+        smallest, *others = sorted(candidates, key=len) if candidates else [self._all]
+        found = [resource for resource_id, resource in smallest.items()
+                 if all(resource_id in other for other in others)]
+
+        if tradeable is False:
+            found = [resource for resource in found if not resource.is_tradeable]
+
+        if descending:
+            found.reverse()
+
+        return found
+
+
+catalogue = ResourceCatalogue(resources)
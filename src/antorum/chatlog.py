@@ -0,0 +1,123 @@
+import asyncio
+import bisect
+import re
+import time
+from typing import Dict, Iterator, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from antorum.packets.chat import ChatMessage
+
+Pattern = str | re.Pattern
+
+# Flags that can be scoped to a group inside the combined pattern
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+_MATCH_ALL = re.compile("")
+
+
+def _compile(pattern: Pattern) -> re.Pattern:
+    """Plain strings match literally, compiled patterns are used as they are."""
+    return pattern if isinstance(pattern, re.Pattern) else re.compile(re.escape(pattern))
+
+
+def _group(pattern: re.Pattern) -> str:
+    flags = "".join(letter for flag, letter in _INLINE_FLAGS if pattern.flags & flag)
+    return f"(?{flags}:{pattern.pattern})" if flags else f"(?:{pattern.pattern})"
+
+
+class ChatLog:
+    """The last ``maxlen`` chat messages, with the ``time.monotonic()`` they were received at.
+
+    Messages are kept in plain lists from a start offset, dropped messages are only deleted once there are ``maxlen`` of
+    them, so appending stays cheap and ``since`` can bisect the times. Watchers wait for the next message matching a
+    pattern: all of them are combined in one regex, so each incoming message is searched once no matter how many
+    watchers there are.
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self.maxlen = maxlen
+        self._times: List[float] = []
+        self._messages: List["ChatMessage"] = []
+        self._start = 0  # Index of the oldest message that's kept, the ones before it were dropped
+
+        self._watchers: Dict[asyncio.Future, re.Pattern] = {}
+        self._combined: re.Pattern | None = None  # Rebuilt when watchers are added or removed
+
+    def __len__(self):
+        return len(self._messages) - self._start
+
+    def __iter__(self) -> Iterator[Tuple[float, "ChatMessage"]]:
+        return zip(self._times[self._start:], self._messages[self._start:])
+
+    def __getitem__(self, index: int) -> Tuple[float, "ChatMessage"]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chat log index out of range")
+
+        index += self._start
+        return self._times[index], self._messages[index]
+
+    def __repr__(self):
+        return f"ChatLog({list(self)})"
+
+    def append(self, message: "ChatMessage", timestamp: float = None):
+        self._times.append(time.monotonic() if timestamp is None else timestamp)
+        self._messages.append(message)
+
+        if len(self._messages) - self._start > self.maxlen:
+            self._start += 1
+
+            if self._start >= self.maxlen:
+                del self._times[:self._start]
+                del self._messages[:self._start]
+                self._start = 0
+
+        if self._watchers:
+            self._notify(message)
+
+    def since(self, timestamp: float) -> List["ChatMessage"]:
+        """Messages received at or after ``timestamp`` (``time.monotonic()``), oldest first."""
+        return self._messages[bisect.bisect_left(self._times, timestamp, self._start):]
+
+    def contains_since(self, text: str, timestamp: float) -> bool:
+        return any(text in message.message for message in self.since(timestamp))
+
+    def watch(self, pattern: Pattern) -> asyncio.Future:
+        """Future of the next message matching ``pattern``, cancel it if it's not needed anymore."""
+        future = asyncio.get_running_loop().create_future()
+        self._watchers[future] = _compile(pattern)
+        self._combined = None
+        future.add_done_callback(self._unwatch)
+        return future
+
+    async def wait_for(self, pattern: Pattern, timeout: float = None, since: float = None) -> "ChatMessage | None":
+        """Waits for a message matching ``pattern``, one received after ``since`` counts too. None on timeout."""
+        compiled = _compile(pattern)
+
+        if since is not None:
+            for message in self.since(since):
+                if compiled.search(message.message):
+                    return message
+
+        try:
+            return await asyncio.wait_for(self.watch(compiled), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _unwatch(self, future: asyncio.Future):
+        if self._watchers.pop(future, None) is not None:
+            self._combined = None
+
+    def _notify(self, message: "ChatMessage"):
+        if self._combined is None:
+            patterns = self._watchers.values()
+            # Groups would be renumbered in the combined pattern and break backreferences, so those match everything
+            self._combined = _MATCH_ALL if any(pattern.groups for pattern in patterns) else \
+                re.compile("|".join(_group(pattern) for pattern in patterns))
+
+        if not self._combined.search(message.message):
+            return  # The common case, no watcher matches
+
+        for future, pattern in list(self._watchers.items()):
+            if not future.done() and pattern.search(message.message):
+                future.set_result(message)
@@ -6,7 +6,8 @@ if TYPE_CHECKING:
     from antorum import multiplayer
 
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferReader, StateType
+from antorum.schema import Schema, Enum, INT32, INT64
+from antorum.utils import StateType
 
 packet_id = 91
 
@@ -18,12 +19,7 @@ class DamageType(enum.Enum):
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.network_id = reader.read_int64()
-        self.damage = reader.read_int32()
-        self.damage_type = DamageType(reader.read_int8())
+    schema = Schema(network_id=INT64, damage=INT32, damage_type=Enum(DamageType))
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
@@ -0,0 +1,193 @@
+import asyncio
+import enum
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple
+
+
+class EventType(enum.Enum):
+    ENTITY_SPAWNED = 0  # subject: the entity
+    ENTITY_DESPAWNED = 1  # subject: the entity
+    ENTITY_MOVED = 2  # subject: the entity, it started or stopped moving or got a new transform
+    ENTITY_STATE_CHANGED = 3  # subject: the entity, data: the state types that changed
+    WORLD_SYNCED = 4  # subject: the game, every entity was replaced by a full sync
+    INVENTORY_CHANGED = 5  # subject: the player, data: the InventoryDeltas
+    BARTER_OPENED = 6  # subject: the barter
+    BARTER_CHANGED = 7  # subject: the barter, items were moved between its areas
+    BARTER_CLOSED = 8  # subject: the barter status
+    CHAT_RECEIVED = 9  # subject: the chat message
+    SKILLS_CHANGED = 10  # subject: the player
+    EXPERIENCE_GAINED = 11  # subject: the skill, data: the experience gained
+
+
+@dataclass(slots=True)
+class Event:
+    type: EventType
+    subject: Any = None
+    data: Any = None
+
+
+Listener = Callable[[Event], None]
+Predicate = Callable[[Event], bool]
+
+
+class Condition:
+    """Something about the game to wait for with ``EventBus.wait_for``, e.g.
+    ``Condition(lambda: game.barter is not None, EventType.BARTER_OPENED)``.
+
+    ``check`` is only called again when one of ``event_types`` is emitted, or at ``wake_at`` (``loop.time()``) for
+    things that change without an event, like the position along a path.
+    """
+
+    def __init__(self, check: Callable[[], bool], *event_types: EventType, wake_at: float = None):
+        self.check = check
+        self.event_types: FrozenSet[EventType] = frozenset(event_types)
+        self.wake_times: Tuple[float, ...] = () if wake_at is None else (wake_at,)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({', '.join(event_type.name for event_type in self.event_types)})"
+
+    def satisfied(self) -> "Condition | None":
+        """The condition that holds, this one or one of the combined ones, None if it doesn't hold."""
+        return self if self.check() else None
+
+
+class AnyOf(Condition):
+    """Holds as soon as one of the conditions does, ``satisfied`` returns the first of them that holds."""
+
+    def __init__(self, *conditions: Condition):
+        super().__init__(lambda: self.satisfied() is not None)
+        _combine(self, conditions)
+
+    def satisfied(self) -> Condition | None:
+        for condition in self.conditions:
+            satisfied = condition.satisfied()
+            if satisfied is not None:
+                return satisfied
+
+        return None
+
+
+class AllOf(Condition):
+    """Holds once every condition holds at the same time."""
+
+    def __init__(self, *conditions: Condition):
+        super().__init__(lambda: all(condition.check() for condition in self.conditions))
+        _combine(self, conditions)
+
+
+def _combine(combined: Condition, conditions: Tuple[Condition, ...]):
+    combined.conditions = conditions
+    combined.event_types = frozenset().union(*(condition.event_types for condition in conditions))
+    combined.wake_times = tuple(sorted(set().union(*(condition.wake_times for condition in conditions))))
+
+
+class EventBus:
+    """Lets listeners and waiters know about changes to the world model as soon as the packet handlers make them.
+
+    Listeners are called synchronously from ``emit``, they shouldn't block. Emitting an event type nobody listens to
+    or waits for does nothing, so the handlers don't pay for events that aren't used.
+    """
+
+    def __init__(self):
+        self._listeners: Dict[EventType, List[Listener]] = {}
+        self._waiters: Dict[EventType, List[Tuple[Predicate | None, asyncio.Future]]] = {}
+
+    def subscribe(self, event_type: EventType, listener: Listener):
+        self._listeners.setdefault(event_type, []).append(listener)
+
+    def unsubscribe(self, event_type: EventType, listener: Listener):
+        listeners = self._listeners.get(event_type)
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+
+    def is_observed(self, event_type: EventType) -> bool:
+        return bool(self._listeners.get(event_type) or self._waiters.get(event_type))
+
+    def emit(self, event_type: EventType, subject: Any = None, data: Any = None):
+        listeners = self._listeners.get(event_type)
+        waiters = self._waiters.get(event_type)
+        if not listeners and not waiters:
+            return
+
+        event = Event(event_type, subject, data)
+
+        if listeners:
+            for listener in list(listeners):
+                try:
+                    listener(event)
+                except Exception:
+                    logging.exception(f"Event listener {listener} failed on {event_type.name}")
+
+        if waiters:
+            for waiter in list(waiters):
+                predicate, future = waiter
+                if future.done():
+                    continue
+
+                try:
+                    matches = predicate is None or predicate(event)
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+
+                if matches:
+                    future.set_result(event)
+
+    async def wait_for(self, condition: Condition, timeout: float = None) -> Condition | None:
+        """Waits until ``condition`` holds and returns it (for ``AnyOf``, the condition that held), None if
+        ``timeout`` seconds pass first. Cancelling the waiting task stops watching the condition."""
+        satisfied = condition.satisfied()
+        if satisfied is not None or timeout is not None and timeout <= 0:
+            return satisfied
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def recheck(_=None):
+            if future.done():
+                return
+
+            try:
+                satisfied = condition.satisfied()
+            except Exception as e:
+                future.set_exception(e)
+                return
+
+            if satisfied is not None:
+                future.set_result(satisfied)
+
+        def expire():
+            if not future.done():
+                future.set_result(None)
+
+        for event_type in condition.event_types:
+            self.subscribe(event_type, recheck)
+        timers = [loop.call_at(wake_at, recheck) for wake_at in condition.wake_times]
+        if timeout is not None:
+            timers.append(loop.call_at(loop.time() + timeout, expire))
+
+        try:
+            return await future
+        finally:
+            for event_type in condition.event_types:
+                self.unsubscribe(event_type, recheck)
+            for timer in timers:
+                timer.cancel()
+
+    async def wait_until(self, event_type: EventType, predicate: Predicate = None,
+                         timeout: float = None) -> Event | None:
+        """Waits for the next ``event_type`` event matching ``predicate``, None if ``timeout`` seconds pass first."""
+        future = asyncio.get_running_loop().create_future()
+        waiter = (predicate, future)
+        self._waiters.setdefault(event_type, []).append(waiter)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters[event_type]
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[event_type]
@@ -1,21 +1,278 @@
-from typing import Dict, TYPE_CHECKING
+import math
+from typing import Callable, Dict, Iterable, List, Set, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from antorum.packets.world_entities import Entity
     from antorum.packets.barter_open import Barter
-    from antorum.packets.inventory_add import ItemResource
 
+from antorum.chatlog import ChatLog
+from antorum.events import EventBus, EventType
 from antorum.player import Player
-from antorum.cache import resources
+from antorum.catalogue import ResourceCatalogue, catalogue
+from antorum.positions import PositionTable
+from antorum.snapshot import WorldSnapshot
+from antorum.spatial import SpatialGrid
+from antorum.utils import ENEMIES, InteractionType, StateType
 
 
 class Game:
-    def __init__(self, local_player_id: int, network_id: int):
+    def __init__(self, local_player_id: int, network_id: int, position_table: bool = False, events: EventBus = None):
         self.local_player_id = local_player_id
         self.network_id = network_id
-        self.local_player: Player = Player(local_player_id, network_id)
-        self.entities: Dict[int, "Entity"] = {}
-        self.resources: Dict[int, "ItemResource"] = resources
-        self.chat_log = []
+        self.events = events if events is not None else EventBus()
+        self.local_player: Player = Player(local_player_id, network_id, events=self.events)
+        self.entities: Dict[int, "Entity"] = {}  # Change through the methods below so the indexes stay up to date
+        self.spatial = SpatialGrid()
+        # Optional NumPy backed positions, entities read their position from it and unfiltered queries are vectorized
+        self.positions: PositionTable | None = PositionTable() if position_table else None
+        self._by_interaction: Dict[InteractionType, Set[int]] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._by_player_id: Dict[int, int] = {}  # Player id to network id
+        self._usernames: Dict[str, int] = {}  # Username to player id
+        # Name, interactions and player id each entity is indexed by
+        self._indexed: Dict[int, Tuple[str | None, Tuple[InteractionType, ...], int | None]] = {}
+        self.resources: ResourceCatalogue = catalogue
+        self.chat_log = ChatLog()
+
+        self.version = 0  # Goes up with every change to the entities
+        self._snapshot: WorldSnapshot | None = None  # Snapshot of the current version, once one is taken
+        self._frozen: Dict[int, "Entity"] | None = None  # Frozen entities of the last snapshot, None after a full sync
+        self._dirty: Set[int] = set()  # Network ids of entities that changed since the last snapshot
 
         self.barter: "Barter" = None
+        self.combat_targets: Set[int] = set()  # Network ids of the entities the player is in combat with
+
+    def _changed(self, network_id: int):
+        self.version += 1
+        self._snapshot = None
+        self._dirty.add(network_id)
+
+    def snapshot(self) -> WorldSnapshot:
+        """Consistent view of the entities as they are now, only entities that changed since the last one are copied."""
+        if self._snapshot is None:
+            if self._frozen is None:
+                frozen = {network_id: entity.freeze() for network_id, entity in self.entities.items()}
+            else:
+                frozen = self._frozen.copy()  # The last snapshot keeps its own dict
+
+                for network_id in self._dirty:
+                    entity = self.entities.get(network_id)
+                    if entity is None:
+                        frozen.pop(network_id, None)
+                    else:
+                        frozen[network_id] = entity.freeze()
+
+            self._frozen = frozen
+            self._dirty.clear()
+            self._snapshot = WorldSnapshot(self.version, frozen, self.network_id)
+
+        return self._snapshot
+
+    def add_entity(self, entity: "Entity"):
+        self._changed(entity.network_id)
+        self.entities[entity.network_id] = entity
+        if entity.network_id == self.local_player.network_id:
+            self.local_player.entity = entity
+        _follow_path(entity)
+        if self.positions is not None:
+            self.positions.insert(entity)  # Before the grid, which reads the position from it
+        self.spatial.insert(entity)
+        self._index(entity)
+
+        self.events.emit(EventType.ENTITY_SPAWNED, entity)
+
+    def remove_entity(self, network_id: int) -> "Entity | None":
+        self.spatial.remove(network_id)
+        self._unindex(network_id)
+
+        entity = self.entities.pop(network_id, None)
+        if entity is not None:
+            self._changed(network_id)
+        self.combat_targets.discard(network_id)
+
+        if entity is not None and self.positions is not None:
+            self.positions.remove(entity)
+
+        if entity is not None and entity is self.local_player.entity:
+            self.local_player.position = entity.position
+            self.local_player.entity = None
+
+        if entity is not None:
+            self.events.emit(EventType.ENTITY_DESPAWNED, entity)
+
+        return entity
+
+    def replace_entities(self, entities: Iterable["Entity"]):
+        if self.positions is not None:
+            self.positions.clear(self.entities.values())
+
+        self.version += 1
+        self._snapshot = None
+        self._frozen = None
+        self._dirty.clear()
+
+        self.entities.clear()
+        self.entities.update((entity.network_id, entity) for entity in entities)
+        self.local_player.entity = self.entities.get(self.local_player.network_id)
+        self.combat_targets.intersection_update(self.entities)
+        for entity in self.entities.values():
+            _follow_path(entity)
+
+        if self.positions is not None:
+            for entity in self.entities.values():
+                self.positions.insert(entity)
+
+        self.spatial.rebuild(self.entities.values())
+
+        self._by_interaction.clear()
+        self._by_name.clear()
+        self._by_player_id.clear()
+        self._usernames.clear()
+        self._indexed.clear()
+        for entity in self.entities.values():
+            self._index(entity)
+
+        self.events.emit(EventType.WORLD_SYNCED, self)
+
+    def entity_changed(self, entity: "Entity", state_types: Iterable[StateType]):
+        """Has to be called when states of an entity are replaced, to update the indexes and snapshots."""
+        if entity.network_id not in self.entities:
+            return
+
+        self._changed(entity.network_id)
+
+        moved = StateType.TRANSFORM in state_types or StateType.MOVEMENT in state_types
+        if moved:
+            if self.positions is not None:
+                self.positions.insert(entity)  # Before the grid, which reads the position from it
+            self.spatial.insert(entity)
+
+        if StateType.INFO in state_types or StateType.INTERACTABLE in state_types or StateType.PLAYER in state_types:
+            self._index(entity)
+
+        if moved:
+            self.events.emit(EventType.ENTITY_MOVED, entity)
+
+        self.events.emit(EventType.ENTITY_STATE_CHANGED, entity, tuple(state_types))
+
+    def _index(self, entity: "Entity"):
+        self._unindex(entity.network_id)
+
+        info = entity.states.get(StateType.INFO)
+        name = info.name if info else None
+        interactable = entity.states.get(StateType.INTERACTABLE)
+        interactions = tuple(interactable.interactions) if interactable else ()
+        player = entity.states.get(StateType.PLAYER)
+        player_id = player.player_id if player else None
+
+        self._indexed[entity.network_id] = (name, interactions, player_id)
+
+        if name is not None:
+            self._by_name.setdefault(name, set()).add(entity.network_id)
+
+        for interaction in interactions:
+            self._by_interaction.setdefault(interaction, set()).add(entity.network_id)
+
+        if player_id is not None:
+            self._by_player_id[player_id] = entity.network_id
+
+            if name is not None:
+                self._usernames[name] = player_id
+
+    def _unindex(self, network_id: int):
+        indexed = self._indexed.pop(network_id, None)
+        if indexed is None:
+            return
+
+        name, interactions, player_id = indexed
+        if name is not None:
+            _discard(self._by_name, name, network_id)
+
+        for interaction in interactions:
+            _discard(self._by_interaction, interaction, network_id)
+
+        if player_id is not None and self._by_player_id.get(player_id) == network_id:
+            del self._by_player_id[player_id]
+
+            if name is not None and self._usernames.get(name) == player_id:
+                del self._usernames[name]
+
+    def entities_that_can(self, interaction: InteractionType) -> List["Entity"]:
+        """Entities offering ``interaction``, e.g. every entity that can be foraged."""
+        return [self.entities[network_id] for network_id in self._by_interaction.get(interaction, ())]
+
+    def entities_named(self, name: str) -> List["Entity"]:
+        return [self.entities[network_id] for network_id in self._by_name.get(name, ())]
+
+    def entity_by_player_id(self, player_id: int) -> "Entity | None":
+        network_id = self._by_player_id.get(player_id)
+        return None if network_id is None else self.entities[network_id]
+
+    def player_id_of(self, username: str) -> int | None:
+        return self._usernames.get(username)
+
+    def _entities_of(self, network_ids: List[int]) -> List["Entity"]:
+        return [self.entities[network_id] for network_id in network_ids]
+
+    def nearest_entity(self, coords: Tuple[float, float],
+                       predicate: Callable[["Entity"], bool] = None) -> "Entity | None":
+        nearest = self.nearest_entities(coords, 1, predicate)
+        return nearest[0] if nearest else None
+
+    def nearest_entities(self, coords: Tuple[float, float], k: int,
+                         predicate: Callable[["Entity"], bool] = None) -> List["Entity"]:
+        if predicate is None and self.positions is not None:
+            return self._entities_of(self.positions.nearest(coords, k))
+
+        return self.spatial.nearest(coords, k, predicate)
+
+    def entities_within(self, coords: Tuple[float, float], radius: float,
+                        predicate: Callable[["Entity"], bool] = None) -> List["Entity"]:
+        if predicate is None and self.positions is not None:
+            return self._entities_of(self.positions.within_radius(coords, radius))
+
+        return self.spatial.within_radius(coords, radius, predicate)
+
+    def entities_in_bounds(self, bounds: Tuple[Tuple[float, float], Tuple[float, float]],
+                           predicate: Callable[["Entity"], bool] = None) -> List["Entity"]:
+        if predicate is None and self.positions is not None:
+            return self._entities_of(self.positions.within_bounds(bounds))
+
+        return self.spatial.within_bounds(bounds, predicate)
+
+    def enemies(self) -> List["Entity"]:
+        return [entity for name in ENEMIES for entity in self.entities_named(name)]
+
+    def distance_to_closest_enemy(self, coords: Tuple[float, float]) -> float:
+        if self.positions is not None:
+            return self.positions.closest_distance(coords, [enemy.network_id for enemy in self.enemies()])
+
+        return min((enemy.distance_to(coords) for enemy in self.enemies()), default=math.inf)
+
+    def nearest_safe_entity(self, coords: Tuple[float, float], predicate: Callable[["Entity"], bool] = None,
+                            safe_distance: float = 10) -> "Entity | None":
+        """Closest entity matching ``predicate`` that has no enemy within ``safe_distance`` of it."""
+
+        enemies = [enemy.position for enemy in self.enemies()]
+        safe_distance *= safe_distance
+
+        def is_safe(entity: "Entity"):
+            position = entity.position
+            return position != (-1, -1) and (predicate is None or predicate(entity)) and \
+                all((x - position[0]) ** 2 + (y - position[1]) ** 2 > safe_distance for x, y in enemies)
+
+        return self.nearest_entity(coords, is_safe)
+
+
+def _follow_path(entity: "Entity"):
+    """Entities can already be moving when they're added, their path starts from where they are now."""
+    if entity.path is None and entity.is_moving:
+        entity.start_moving()
+
+
+def _discard(index: Dict, key, network_id: int):
+    network_ids = index[key]
+    network_ids.discard(network_id)
+
+    if not network_ids:
+        del index[key]
@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Tuple
+
+from antorum.packets.inventory_add import InventoryItem
+from antorum.packets.item import ItemPropertyBag, ItemResource
+
+BAG_SIZE = 20  # Slots assumed until the game shows otherwise, the packets don't say how big the bag is
+
+
+@dataclass(slots=True, frozen=True)
+class InventoryDelta:
+    slot: int
+    resource_id: int
+    amount: int  # Positive if it was added, negative if it was removed
+
+
+class Inventory(Mapping[int, InventoryItem]):
+    """The player's bag by slot index, updated by the inventory packet handlers.
+
+    Keeps the total amount and the slots of every resource id, plus a bitmap of the occupied slots, so checking how
+    much of an item there is, where it is or whether the bag is full doesn't walk the bag. Items have to be changed
+    through ``add``, ``remove`` and ``replace`` to keep those up to date, each returns the deltas it made.
+
+    The size isn't sent by the game. It grows whenever an item is put in a slot past it, and ``set_full`` sets it from
+    the occupied slots when the game says the bag is full. Until then ``size_known`` is False and ``is_full`` only says
+    whether the assumed slots are taken.
+    """
+
+    def __init__(self, items: Dict[int, InventoryItem] = None, size: int = BAG_SIZE):
+        self.size = size
+        self.size_known = False  # Set once the game said the bag is full
+
+        self._items: Dict[int, InventoryItem] = {}
+        self._totals: Dict[int, int] = {}
+        self._slots: Dict[int, List[int]] = {}  # Sorted slot indexes of every resource id
+        self._occupied = 0  # Bit n is set if slot n holds an item
+
+        if items:
+            self.replace(items)
+
+    def __getitem__(self, slot: int) -> InventoryItem:
+        return self._items[slot]
+
+    def __contains__(self, slot: int):
+        return slot in self._items
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return f"Inventory({self._items})"
+
+    def _put(self, slot: int, item: InventoryItem):
+        resource_id = item.resource.resource_id
+        self._items[slot] = item
+        self._totals[resource_id] = self._totals.get(resource_id, 0) + item.amount
+        slots = self._slots.setdefault(resource_id, [])
+        slots.append(slot)
+        slots.sort()
+        self._occupied |= 1 << slot
+
+        if slot >= self.size:  # A bigger bag than assumed
+            self.size = slot + 1
+
+    def _take(self, slot: int) -> InventoryItem:
+        item = self._items.pop(slot)
+        resource_id = item.resource.resource_id
+        total = self._totals[resource_id] - item.amount
+        slots = self._slots[resource_id]
+        slots.remove(slot)
+
+        if slots:
+            self._totals[resource_id] = total
+        else:
+            del self._totals[resource_id], self._slots[resource_id]
+
+        self._occupied &= ~(1 << slot)
+        return item
+
+    def add(self, slot: int, resource: ItemResource, amount: int,
+            property_bag: ItemPropertyBag = None) -> List[InventoryDelta]:
+        """Adds to the stack in ``slot``, replacing it if it holds a different item."""
+        item = self._items.get(slot)
+
+        if item is not None and item.resource.resource_id == resource.resource_id:
+            item.amount += amount
+            self._totals[resource.resource_id] += amount
+            return [InventoryDelta(slot, resource.resource_id, amount)]
+
+        deltas = []
+        if item is not None:
+            self._take(slot)
+            deltas.append(InventoryDelta(slot, item.resource.resource_id, -item.amount))
+
+        self._put(slot, InventoryItem(resource, amount, property_bag))
+        deltas.append(InventoryDelta(slot, resource.resource_id, amount))
+        return deltas
+
+    def remove(self, slot: int, amount: int) -> List[InventoryDelta]:
+        """Removes from the stack in ``slot``, emptying the slot once nothing is left."""
+        item = self._items[slot]
+        amount = min(amount, item.amount)
+
+        if amount == item.amount:
+            self._take(slot)
+        else:
+            item.amount -= amount
+            self._totals[item.resource.resource_id] -= amount
+
+        return [InventoryDelta(slot, item.resource.resource_id, -amount)]
+
+    def replace(self, items: Dict[int, InventoryItem]) -> List[InventoryDelta]:
+        """Replaces the whole bag, the deltas are the difference between the old and new contents per slot."""
+        deltas = []
+        resized = set()  # Slots that still hold the same item, just a different amount
+
+        for slot, old in list(self._items.items()):
+            new = items.get(slot)
+            same_item = new is not None and new.resource.resource_id == old.resource.resource_id
+
+            if same_item and new.amount == old.amount:
+                self._items[slot] = new
+                continue
+
+            self._take(slot)
+            if same_item:
+                resized.add(slot)
+                deltas.append(InventoryDelta(slot, old.resource.resource_id, new.amount - old.amount))
+            else:
+                deltas.append(InventoryDelta(slot, old.resource.resource_id, -old.amount))
+
+        for slot, item in items.items():
+            if slot not in self._items:
+                self._put(slot, item)
+                if slot not in resized:
+                    deltas.append(InventoryDelta(slot, item.resource.resource_id, item.amount))
+
+        return deltas
+
+    def total(self, resource_id: int) -> int:
+        return self._totals.get(resource_id, 0)
+
+    def contains(self, resource_id: int, amount: int = 1) -> bool:
+        return self._totals.get(resource_id, 0) >= amount
+
+    def slots_of(self, resource_id: int) -> List[int]:
+        return list(self._slots.get(resource_id, ()))
+
+    def first_slot(self, resource_id: int) -> int | None:
+        slots = self._slots.get(resource_id)
+        return slots[0] if slots else None
+
+    def plan_removal(self, resource_id: int, amount: int) -> List[Tuple[int, int]]:
+        """The slots and amounts to take ``amount`` of a resource from, in slot order. Empty if there isn't enough."""
+        if not self.contains(resource_id, amount):
+            return []
+
+        plan = []
+        for slot in self._slots[resource_id]:
+            if amount <= 0:
+                break
+            taken = min(amount, self._items[slot].amount)
+            plan.append((slot, taken))
+            amount -= taken
+
+        return plan
+
+    @property
+    def totals(self) -> Dict[int, int]:
+        """Total amount of every resource id in the bag."""
+        return dict(self._totals)
+
+    @property
+    def free_slots(self) -> int:
+        return self.size - (self._occupied & ((1 << self.size) - 1)).bit_count()
+
+    @property
+    def is_full(self) -> bool:
+        return self.free_slots == 0
+
+    def set_full(self):
+        """The game said the bag is full, so its last slot is the highest one holding an item."""
+        self.size = self._occupied.bit_length()
+        self.size_known = True
+
+    def first_free_slot(self) -> int | None:
+        slot = (~self._occupied & (self._occupied + 1)).bit_length() - 1  # Lowest unset bit
+        return slot if slot < self.size else None
@@ -0,0 +1,61 @@
+import bisect
+import math
+import time
+from typing import List, Tuple
+
+Position = Tuple[float, float]
+
+
+class Path:
+    """Movement of an entity from ``start`` through each of its destinations at a constant ``speed``.
+
+    Positions are computed from the time the movement started (``time.monotonic()``), so they're exact whenever they
+    are read and nothing has to run in the background while an entity moves.
+    """
+
+    __slots__ = ("points", "speed", "started_at", "_arrivals")
+
+    def __init__(self, start: Position, destinations: List[Position], speed: float, started_at: float = None):
+        self.points: List[Position] = [tuple(start), *(tuple(destination) for destination in destinations)]
+        self.speed = speed
+        self.started_at = time.monotonic() if started_at is None else started_at
+
+        # Seconds after the start at which each point is reached
+        self._arrivals = arrivals = [0.0]
+        for begin, end in zip(self.points, self.points[1:]):
+            arrivals.append(arrivals[-1] + (math.dist(begin, end) / speed if speed > 0 else math.inf))
+
+    @property
+    def duration(self) -> float:
+        return self._arrivals[-1]
+
+    @property
+    def destination(self) -> Position:
+        return self.points[-1]
+
+    def elapsed(self, now: float = None) -> float:
+        return (time.monotonic() if now is None else now) - self.started_at
+
+    def time_left(self, now: float = None) -> float:
+        return max(self.duration - self.elapsed(now), 0.0)
+
+    def finished(self, now: float = None) -> bool:
+        return self.elapsed(now) >= self.duration
+
+    def position(self, now: float = None) -> Position:
+        elapsed = self.elapsed(now)
+        if elapsed <= 0:
+            return self.points[0]
+
+        if elapsed >= self.duration:
+            return self.points[-1]
+
+        arrivals = self._arrivals
+        segment = bisect.bisect_right(arrivals, elapsed)  # Moving from point segment - 1 to point segment
+        (begin_x, begin_y), (end_x, end_y) = self.points[segment - 1], self.points[segment]
+        progress = (elapsed - arrivals[segment - 1]) / (arrivals[segment] - arrivals[segment - 1])
+
+        return begin_x + (end_x - begin_x) * progress, begin_y + (end_y - begin_y) * progress
+
+    def __repr__(self):
+        return f"Path({self.points}, {self.speed}, {self.started_at})"
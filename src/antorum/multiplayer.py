@@ -1,21 +1,170 @@
 import asyncio
+from typing import Callable, Collection, Iterable, List
 
 import logging
 
 from antorum import packets
 from antorum import utils
+from antorum.events import AnyOf, Condition, Event, EventBus, EventType, Predicate
 from antorum.game import Game
-from antorum.utils import BYTEORDER, BufferWriter
+from antorum.packets import world_entities
+from antorum.packets.world_entities import DEFAULT_EAGER_STATES
+from antorum.scheduler import ActionScheduler
+from antorum.utils import BufferWriter, StateType, FRAME_HEADER
+
+
+class FrameProtocol(asyncio.Protocol):
+    """Splits the incoming byte stream into ``[int16 size][int8 id][payload]`` frames.
+
+    Every complete frame in a chunk is handed to ``on_frame`` as a ``memoryview`` into the receive buffer, so payloads
+    are never copied. Handlers must not keep the view around after they return, copy it with ``bytes()`` if needed.
+
+    If ``accepted`` is given, frames with any other packet id are dropped here without being buffered or handed on,
+    ``skipped_frames`` and ``skipped_bytes`` count what was dropped.
+    """
+
+    def __init__(self, on_frame: Callable[[int, memoryview], None], accepted: Collection[int] = None):
+        self.on_frame = on_frame
+        self.accepted = accepted
+        self.transport: asyncio.Transport = None
+
+        self.skipped_frames = 0
+        self.skipped_bytes = 0
+
+        self._buffer = bytearray()
+        self._discard = 0  # Bytes still to come of a skipped frame that was only partially received
+        self._paused = False
+        self._drain_waiter: asyncio.Future = None
+        self._closed = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+
+    def connection_lost(self, exc: Exception | None):
+        if exc:
+            logging.error(f"Connection lost: {exc}")
+        else:
+            logging.info("Connection closed")
+
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+        self._wake_drain_waiter(exc or ConnectionResetError("Connection lost"))
+
+    def data_received(self, data: bytes):
+        if self._discard:
+            if len(data) <= self._discard:
+                self._discard -= len(data)
+                return
+
+            data = memoryview(data)[self._discard:]
+            self._discard = 0
+
+        buffer = self._buffer
+
+        if buffer:
+            buffer += data
+            source = buffer
+        else:
+            source = data  # Nothing left over from the previous chunk, split the frames straight out of it
+
+        offset = self._split_frames(source)
+
+        if source is data:
+            if offset < len(data):
+                buffer += memoryview(data)[offset:]
+        elif offset:
+            try:
+                del buffer[:offset]
+            except BufferError:  # A handler held on to a frame, leave that memory alone and start a new buffer
+                self._buffer = buffer[offset:]
+
+    def _split_frames(self, source: bytes | bytearray) -> int:
+        end = len(source)
+        offset = 0
+
+        with memoryview(source) as view:
+            while end - offset >= FRAME_HEADER.size:
+                packet_size, packet_id = FRAME_HEADER.unpack_from(view, offset)
+                start = offset + FRAME_HEADER.size
+
+                if self.accepted is not None and packet_id not in self.accepted:
+                    self.skipped_frames += 1
+                    self.skipped_bytes += FRAME_HEADER.size + packet_size
+
+                    if end - start < packet_size:  # Drop the rest of it as it comes in instead of buffering it
+                        self._discard = packet_size - (end - start)
+                        return end
+
+                    offset = start + packet_size
+                    continue
+
+                if end - start < packet_size:
+                    break
+
+                offset = start + packet_size
+                self.on_frame(packet_id, view[start:offset])
+
+        return offset
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        self._wake_drain_waiter(None)
+
+    def _wake_drain_waiter(self, exc: Exception | None):
+        waiter = self._drain_waiter
+        self._drain_waiter = None
+
+        if waiter is None or waiter.done():
+            return
+
+        if exc is None:
+            waiter.set_result(None)
+        else:
+            waiter.set_exception(exc)
+
+    async def drain(self):
+        if self.transport.is_closing():
+            await asyncio.sleep(0)  # Give connection_lost a chance to run first
+
+        if self._closed.done():
+            raise ConnectionResetError("Connection lost")
+
+        if not self._paused:
+            return
+
+        self._drain_waiter = asyncio.get_running_loop().create_future()
+        await self._drain_waiter
+
+    async def wait_closed(self):
+        await self._closed
 
 
 class Client:
-    def __init__(self, host: str = "antorum.game.ratwizard.dev", port: int = 7667):
+    def __init__(self, host: str = "antorum.game.ratwizard.dev", port: int = 7667,
+                 eager_states: Iterable[StateType] = DEFAULT_EAGER_STATES, subscriptions: Iterable[int] = None,
+                 position_table: bool = False):
         self.host = host
         self.port = port
-        self.reader: asyncio.StreamReader = None
-        self.writer: asyncio.StreamWriter = None
+        self.eager_states = frozenset(eager_states)  # Entity states decoded as soon as they're received
+        self._eager_state_ids = frozenset(state_type.value for state_type in self.eager_states)
+        self.position_table = position_table  # Keep entity positions in NumPy arrays, see antorum.positions
+
+        # Packet ids (or packet modules/classes) to handle on top of the ones the game state needs, None handles all.
+        # See packets.REQUIRED_PACKETS for what goes stale without the others, e.g. the chat log without chat.
+        self.subscriptions = None if subscriptions is None else \
+            frozenset(getattr(packet, "packet_id", packet) for packet in subscriptions) | packets.REQUIRED_PACKETS
+        self.transport: asyncio.Transport = None
+        self.protocol: FrameProtocol = None
         self.send_queue = asyncio.Queue()
-        self.recv_queue = asyncio.Queue()
+        self.handlers = packets.HandlerRegistry()  # Add your own packet handlers and middleware here
+        self.events = EventBus()  # Changes to the game, shared with it once it's created
+        self.scheduler = ActionScheduler()  # Runs the actions started on this client
+        self._tasks = set()
+        self.closed = False  # Set once the connection is lost or close() is called, nothing can be sent after that
 
         self.handshake_established = False
         self.logged_in = False
@@ -31,12 +180,12 @@ class Client:
         return self._loaded == 3
 
     async def connect(self):
-        asyncio.create_task(self.update())
         logging.info(f"Connecting to {self.host}:{self.port}")
-        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.transport, self.protocol = await asyncio.get_running_loop().create_connection(
+            lambda: FrameProtocol(self._dispatch, self.subscriptions), self.host, self.port)
         logging.info("Connected!")
 
-        asyncio.create_task(self.recv_loop())
+        self._start_task(self.send_loop())
 
         logging.info("Sending handshake")
         self.send(packets.Handshake())
@@ -65,58 +214,98 @@ class Client:
         self.send(packets.LoadComplete())  # Server needs two of these for some reason
         logging.info("Game loaded!")
 
+    async def wait_until(self, event_type: EventType, predicate: Predicate = None,
+                         timeout: float = None) -> Event | None:
+        """Resolves as soon as an ``event_type`` event matching ``predicate`` happens, None on timeout."""
+        return await self.events.wait_until(event_type, predicate, timeout)
+
+    async def wait_for(self, condition: Condition, timeout: float = None) -> bool:
+        """Waits until ``condition`` holds, checking it only when the game changes in a way it depends on."""
+        return await self.events.wait_for(condition, timeout) is not None
+
+    async def first_of(self, *conditions: Condition, timeout: float = None) -> Condition | None:
+        """Waits until one of ``conditions`` holds and returns it, None on timeout."""
+        return await self.events.wait_for(AnyOf(*conditions), timeout)
+
     async def move(self, x: float, y: float):
         logging.info(f"Moving to {x}, {y}")
         self.send(packets.Move(x, y))
 
-    def send(self, data: packets.NetworkPacket):
-        self.send_queue.put_nowait(data)
-
-    async def _send(self, data: packets.NetworkPacket):
-        serialized = data.serialize()
-        writer = BufferWriter()
-
-        writer.write_int16(len(serialized))
-        writer.write_int8(data.packet_id)
-        writer.write(serialized)
+    def _start_task(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)  # The loop only keeps weak references to tasks
+        task.add_done_callback(self._task_done)
 
-        self.writer.write(bytes(writer))
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
 
-        # logging.debug(f"Serialized data: {'-'.join(hex(n)[2:].zfill(2) for n in bytes(writer))}")
-        await self.writer.drain()
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Client task {task.get_coro().__qualname__} failed, closing the client",
+                          exc_info=task.exception())
+            self.close()
 
-    async def recv_loop(self):
-        while True:
-            data = await self.reader.read(3)
+    def close(self):
+        """Closes the connection and stops the client's tasks, sending afterwards raises ``ConnectionError``."""
+        if self.closed:
+            return
 
-            while len(data) != 3:
-                data += await self.reader.read(1)
+        self.closed = True
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.close()
 
-            packet_size = int.from_bytes(data[:2], BYTEORDER)
-            packet_id = data[2]
+        for task in list(self._tasks):
+            task.cancel()
 
-            data = await self.reader.read(packet_size)
-            while len(data) < packet_size:
-                data += await self.reader.read(packet_size - len(data))
+    def send(self, data: packets.NetworkPacket):
+        if self.closed:
+            raise ConnectionError("Client is closed")
 
-            self.recv_queue.put_nowait((packet_id, data))
+        self.send_queue.put_nowait(data)
 
-    async def update(self):
-        while True:
-            await asyncio.sleep(0.01)
-            while self.recv_queue.qsize() > 0:
-                packet_id, data = await self.recv_queue.get()
+    def send_many(self, data: Iterable[packets.NetworkPacket]):
+        for packet in data:
+            self.send(packet)
 
-                logging.debug(f"Received packet {packet_id} with data {data}")
+    async def _send(self, batch: List[packets.NetworkPacket]):
+        writer = BufferWriter()
 
-                handler = packets.get_handler(packet_id)
+        for data in batch:
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Sending packet {data.packet_id} with data {data}")
 
-                if handler:
-                    handler(data, self)
+            frame = writer.begin_frame(data.packet_id)
+            data.serialize_into(writer)
+            writer.end_frame(frame)
 
-            while self.send_queue.qsize() > 0:
-                data = await self.send_queue.get()
+        # The transport may hold on to the view until it is sent, so the writer is never reused
+        self.transport.write(writer.getbuffer())
 
-                logging.debug(f"Sending packet {data.packet_id} with data {data}")
+        # logging.debug(f"Serialized data: {'-'.join(hex(n)[2:].zfill(2) for n in bytes(writer))}")
+        await self.protocol.drain()
 
-                await self._send(data)
+    async def send_loop(self):
+        while True:
+            batch = [await self.send_queue.get()]
+
+            while not self.send_queue.empty():  # Everything queued since the last flush goes out in one write
+                batch.append(self.send_queue.get_nowait())
+
+            try:
+                await self._send(batch)
+            except ConnectionError as e:
+                logging.error(f"Can't send {len(batch)} packets, the connection was lost: {e}")
+                self.close()
+                return
+
+    def _dispatch(self, packet_id: int, data: memoryview):
+        if logging.root.isEnabledFor(logging.DEBUG):  # Avoid copying every payload just to format a skipped message
+            logging.debug(f"Received packet {packet_id} with data {bytes(data)}")
+
+        handler = self.handlers.dispatch.get(packet_id)
+
+        if handler:
+            world_entities.eager_state_ids = self._eager_state_ids  # Entities are decoded with this client's states
+            try:
+                handler(data, self)
+            except Exception:
+                logging.exception(f"Failed to handle packet {packet_id}")
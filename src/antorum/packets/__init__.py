@@ -1,9 +1,9 @@
-import os
-from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, List, TYPE_CHECKING
 
+from antorum.packets.packet import NetworkPacket
 from antorum.packets.handshake import Packet as Handshake
 from antorum.packets.login import Packet as Login
-from antorum.packets.packet import NetworkPacket
 from antorum.packets.load_complete import Request as LoadComplete
 from antorum.packets.move import Packet as Move
 from antorum.packets.interact import Packet as Interact
@@ -12,20 +12,133 @@ from antorum.packets.inventory_item_drop import Request as InventoryItemDrop
 from antorum.packets.barter_move import Request as BarterMove
 from antorum.packets.barter_close import Request as BarterClose
 
-handlers = {}
+from antorum.packets import barter_close, barter_move, barter_open, character_creation, chat, combat, combat_start, \
+    combat_stop, entity_despawn, entity_spawn, entity_state, exp, halt, handshake, interact, inventory, inventory_add, \
+    inventory_item_drop, inventory_read_item, inventory_remove, load_complete, login, move, move_failed, skills, \
+    stats, world_entities
+
+if TYPE_CHECKING:
+    from antorum import multiplayer
+
+# Every packet module, a new packet type has to be added here to be handled. combat_start and combat_stop share packet
+# id 56, combat receives it and hands it to the right one.
+MODULES = (barter_close, barter_move, barter_open, character_creation, chat, combat, entity_despawn, entity_spawn,
+           entity_state, exp, halt, handshake, interact, inventory, inventory_add, inventory_item_drop,
+           inventory_read_item, inventory_remove, load_complete, login, move, move_failed, skills, stats,
+           world_entities)
+
+
+def _by_packet_id(modules) -> Dict[int, ModuleType]:
+    """Modules of the packets that can be received by packet id, two modules receiving the same id is an error."""
+    by_id = {}
+
+    for module in modules:
+        if not hasattr(module, "receive_packet"):
+            continue
+
+        other = by_id.setdefault(module.packet_id, module)
+        if other is not module:
+            raise ValueError(f"Packet modules {other.__name__} and {module.__name__} both receive packet id "
+                             f"{module.packet_id}")
+
+    return by_id
+
+
+handlers = _by_packet_id(MODULES)
+
+# Packets the client, the world and the inventory are built from, always handled even if the client filters packets.
+# Skills are part of loading the game. Every other packet can be left out, at the cost of what its handler keeps up:
+# - chat: game.chat_log and CHAT_RECEIVED events, actions waiting for a message (e.g. ForageWeeds) never see it
+# - combat, interact: game.combat_targets and the health of hit entities
+# - stats, exp: the local player's stats and skill experience
+# - barter_open, barter_move, barter_close: game.barter, subscribe to all three or none
+REQUIRED_PACKETS = frozenset(module.packet_id for module in (
+    handshake, login, world_entities, entity_spawn, entity_despawn, entity_state, move, halt, skills, inventory,
+    inventory_add, inventory_remove))
+
+Dispatch = Callable[[memoryview, "multiplayer.Client"], None]
+Hook = Callable[[NetworkPacket, "multiplayer.Client"], bool | None]
+
+
+def _bind(receive_packet: Callable[[memoryview], NetworkPacket], handle: Callable, pre: tuple, listeners: tuple,
+          post: tuple) -> Dispatch:
+    """Decode-and-handle function for one packet type, built once so dispatching a packet allocates nothing extra."""
+    if not (pre or listeners or post):
+        def dispatch(data, client):
+            handle(receive_packet(data), client)
+
+        return dispatch
+
+    def dispatch(data, client):
+        packet = receive_packet(data)
+
+        for hook in pre:
+            if hook(packet, client) is False:  # Pre hooks can stop a packet from being handled
+                return
+
+        handle(packet, client)
+
+        for listener in listeners:
+            listener(packet, client)
+
+        for hook in post:
+            hook(packet, client)
+
+    return dispatch
+
+
+class HandlerRegistry:
+    """Maps packet ids to their decode-and-handle function, with room for user handlers and middleware.
+
+    * ``add_handler(packet, handler)`` calls ``handler(packet, client)`` after the built-in handler of that packet
+    * ``add_middleware(pre, post)`` calls the hooks for every packet, before and after its handlers. A pre hook that
+      returns ``False`` stops the packet from being handled.
+    """
+
+    def __init__(self):
+        self.dispatch: Dict[int, Dispatch] = {}
+        self._listeners: Dict[int, List[Callable]] = {}
+        self._pre: List[Hook] = []
+        self._post: List[Hook] = []
+
+        self._rebuild(handlers)
+
+    def _rebuild(self, packet_ids):
+        pre, post = tuple(self._pre), tuple(self._post)
+
+        for packet_id in packet_ids:
+            module = handlers[packet_id]
+            self.dispatch[packet_id] = _bind(module.receive_packet, module.handle, pre,
+                                             tuple(self._listeners.get(packet_id, ())), post)
+
+    def add_handler(self, packet, handler: Hook):
+        """Registers a handler for a packet id, packet module or packet class."""
+        packet_id = getattr(packet, "packet_id", packet)
+        if packet_id not in handlers:
+            raise ValueError(f"Packet {packet_id} can't be received")
+
+        self._listeners.setdefault(packet_id, []).append(handler)
+        self._rebuild([packet_id])
+
+    def remove_handler(self, packet, handler: Hook):
+        packet_id = getattr(packet, "packet_id", packet)
+        self._listeners[packet_id].remove(handler)
+        self._rebuild([packet_id])
+
+    def add_middleware(self, pre: Hook = None, post: Hook = None):
+        if pre:
+            self._pre.append(pre)
+        if post:
+            self._post.append(post)
+
+        self._rebuild(handlers)
 
-for module in os.listdir(Path(__file__).parent):
-    if module.startswith("_"):
-        continue
+    def get(self, packet_id: int) -> Dispatch | None:
+        return self.dispatch.get(packet_id)
 
-    m = __import__(f"antorum.packets.{module[:-3]}", fromlist=[""])
-    if hasattr(m, "packet_id"):
-        handlers[m.packet_id] = m
 
+_default_registry = HandlerRegistry()
 
-def get_handler(packet_id: int):
-    module = handlers.get(packet_id)
-    if module is None:
-        return None
 
-    return lambda data, client: module.handle(module.receive_packet(data), client)
+def get_handler(packet_id: int) -> Dispatch | None:
+    return _default_registry.dispatch.get(packet_id)
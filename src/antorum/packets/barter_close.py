@@ -1,8 +1,9 @@
 import enum
 import logging
 
+from antorum.events import EventType
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferWriter, BufferReader
+from antorum.schema import Schema, Enum
 
 packet_id = 45  # Request is 44
 
@@ -14,29 +15,21 @@ class BarterStatus(enum.Enum):
 
 class Request(NetworkPacket):
     packet_id = 44
+    schema = Schema(status=Enum(BarterStatus))
 
     def __init__(self, status: "BarterStatus"):
         self.status: BarterStatus = status
 
-    def serialize(self) -> bytes:
-        writer = BufferWriter()
-
-        writer.write_int8(self.status.value)
-
-        return bytes(writer)
-
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.status = BarterStatus(reader.read_int8())
+    schema = Schema(status=Enum(BarterStatus))
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
     logging.info(f"Barter closed ({packet.status.name})")
     client.game.barter = None
+    client.game.events.emit(EventType.BARTER_CLOSED, packet.status)
 
 
 receive_packet = Response
@@ -1,8 +1,9 @@
 from typing import TYPE_CHECKING
 
+from antorum.events import EventType
 from antorum.packets import NetworkPacket
 from antorum.packets.barter_open import BarterInventoryItemArea
-from antorum.utils import BufferReader, BufferWriter
+from antorum.schema import Schema, Enum, Array, Tuple, INT8, INT32
 
 if TYPE_CHECKING:
     from antorum import multiplayer
@@ -12,34 +13,18 @@ packet_id = 47
 
 class Request(NetworkPacket):
     packet_id = 46
+    schema = Schema(source_area=Enum(BarterInventoryItemArea), slot=INT8, amount=INT32)
 
     def __init__(self, source_area: BarterInventoryItemArea, slot: int, amount: int):
         self.source_area = source_area
         self.slot = slot
         self.amount = amount
 
-    def serialize(self) -> bytes:
-        writer = BufferWriter()
-
-        writer.write_int8(self.source_area.value)
-        writer.write_int8(self.slot)
-        writer.write_int32(self.amount)
-
-        return bytes(writer)
-
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-
-        self.shopper_coin_value = reader.read_int32()
-        self.shop_coin_value = reader.read_int32()
-        self.source_area = BarterInventoryItemArea(reader.read_int8())
-        self.moved = []
-        for _ in range(reader.read_int64()):
-            self.moved.append((reader.read_int8(), reader.read_int8(), reader.read_int32()))
+    schema = Schema(shopper_coin_value=INT32, shop_coin_value=INT32, source_area=Enum(BarterInventoryItemArea),
+                    moved=Array(Tuple(INT8, INT8, INT32)))
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
@@ -64,5 +49,7 @@ def handle(packet: Response, client: "multiplayer.Client"):
         for slot, _, _ in packet.moved:
             client.game.barter.store_offer.pop(slot, None)
 
+    client.game.events.emit(EventType.BARTER_CHANGED, client.game.barter)
+
 
 receive_packet = Response
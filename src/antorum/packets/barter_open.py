@@ -3,8 +3,9 @@ import logging
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
+from antorum.events import EventType
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferReader
+from antorum.schema import Schema, Struct, Map, Tuple, BOOL, INT8, INT32, INT64, STRING
 
 if TYPE_CHECKING:
     from antorum import multiplayer
@@ -38,27 +39,19 @@ class Barter:
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-
-        inventory_values = {reader.read_int8(): reader.read_int32() for _ in
-                            range(reader.read_int64())}  # second item is the value of the item
-
-        shop_items = {reader.read_int64(): (reader.read_int32(), reader.read_int32()) for _ in
-                      range(reader.read_int64())}  # second item is the amount and third is the value
-
-        buys_items = reader.read_bool()
-        sells_items = reader.read_bool()
-        shop_name = reader.read_string()
-
-        self.barter = BarterOpen(inventory_values, shop_items, buys_items, sells_items, shop_name)
+    schema = Schema(barter=Struct(BarterOpen,
+                                  inventory_values=Map(INT8, INT32),  # value is the value of the item
+                                  shop_items=Map(INT64, Tuple(INT32, INT32)),  # value is the amount and the value
+                                  buys_items=BOOL,
+                                  sells_items=BOOL,
+                                  shop_name=STRING))
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
     logging.debug(f"Received barter_open packet: {packet.barter}")
 
     client.game.barter = Barter(packet.barter.inventory_values, {}, packet.barter.shop_items, {})
+    client.game.events.emit(EventType.BARTER_OPENED, client.game.barter)
 
 
 receive_packet = Response
@@ -1,4 +1,4 @@
-from antorum.utils import BufferWriter, BufferReader
+from antorum.schema import Schema, Enum, INT8, STRING
 import logging
 import enum
 
@@ -18,6 +18,10 @@ class CreationStatus(enum.Enum):
 
 class Packet(NetworkPacket):
     packet_id = 48
+    schema = Schema(name=STRING, crafting_skill=INT8, foraging_skill=INT8, combat_skill=INT8, ascetic_skill=INT8,
+                    stamina=INT8, strength=INT8, smarts=INT8, speed=INT8, hair=INT8, hair_color=INT8,
+                    facial_hair=INT8, facial_hair_color=INT8, skin_color=INT8, shirt=INT8, pants=INT8, bulk=INT8,
+                    height=INT8)
 
     def __init__(self, name: str, crafting_skill: int, foraging_skill: int, combat_skill: int,
                  ascetic_skill: int, stamina: int, strength: int, smarts: int, speed: int, hair: int, hair_color: int,
@@ -42,37 +46,10 @@ class Packet(NetworkPacket):
         self.bulk = bulk
         self.height = height
 
-    def serialize(self):
-        writer = BufferWriter()
-
-        writer.write_string(self.name)
-        writer.write_int8(self.crafting_skill)
-        writer.write_int8(self.foraging_skill)
-        writer.write_int8(self.combat_skill)
-        writer.write_int8(self.ascetic_skill)
-        writer.write_int8(self.stamina)
-        writer.write_int8(self.strength)
-        writer.write_int8(self.smarts)
-        writer.write_int8(self.speed)
-        writer.write_int8(self.hair)
-        writer.write_int8(self.hair_color)
-        writer.write_int8(self.facial_hair)
-        writer.write_int8(self.facial_hair_color)
-        writer.write_int8(self.skin_color)
-        writer.write_int8(self.shirt)
-        writer.write_int8(self.pants)
-        writer.write_int8(self.bulk)
-        writer.write_int8(self.height)
-
-        return bytes(writer)
-
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.status = CreationStatus(reader.read_int8())
+    schema = Schema(status=Enum(CreationStatus))
 
 
 def handle(self, client: "multiplayer.Client"):
@@ -1,10 +1,11 @@
 import enum
 import logging
-import datetime
 from dataclasses import dataclass
 
+from antorum.events import EventType
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferReader, get_entity_from_player_id, StateType
+from antorum.schema import Schema, Struct, Enum, INT64, STRING
+from antorum.utils import get_entity_from_player_id, StateType
 
 from typing import TYPE_CHECKING
 
@@ -22,7 +23,7 @@ class ChatChannel(enum.Enum):
     PARTY = 4
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     player_id: int
     username: str
@@ -32,26 +33,21 @@ class ChatMessage:
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.message = ChatMessage(reader.read_int64(), reader.read_string(), ChatChannel(reader.read_int8()),
-                                   reader.read_string())
+    schema = Schema(message=Struct(ChatMessage, player_id=INT64, username=STRING, channel=Enum(ChatChannel),
+                                   message=STRING))
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
     if client.game:  # First chat packet is received before the game is initialized
         if not packet.message.username:
-            entity = get_entity_from_player_id(packet.message.player_id, list(client.game.entities.values()))
+            entity = get_entity_from_player_id(packet.message.player_id, client.game)
             if entity:
-                packet.message.username = entity.states[StateType.INFO].state.name
-
-        if len(client.game.chat_log) > 1000:
-            client.game.chat_log = client.game.chat_log[500:]  # Remove the first 500 messages to prevent memory leaks
+                packet.message.username = entity.states[StateType.INFO].name
 
-        client.game.chat_log.append((datetime.datetime.now(), packet.message))
+        client.game.chat_log.append(packet.message)  # Only keeps the last messages, the oldest ones are dropped
 
     logging.info(f"({packet.message.channel.name}) {packet.message.username}: {packet.message.message}")
+    client.events.emit(EventType.CHAT_RECEIVED, packet.message)
 
 
 receive_packet = Response
@@ -0,0 +1,29 @@
+from typing import TYPE_CHECKING
+
+from antorum.packets import NetworkPacket, combat_start, combat_stop
+from antorum.schema import Schema, INT64
+
+if TYPE_CHECKING:
+    from antorum import multiplayer
+
+packet_id = 56  # Sent both when combat starts and when it stops, with the same payload
+
+
+class Response(NetworkPacket):
+    packet_id = packet_id
+    schema = Schema(network_id=INT64)
+
+
+def handle(packet: Response, client: "multiplayer.Client"):
+    """The packet doesn't say whether combat started or stopped, so it toggles combat with the entity."""
+    targets = client.game.combat_targets
+
+    if packet.network_id in targets:
+        targets.discard(packet.network_id)
+        combat_stop.handle(packet, client)
+    else:
+        targets.add(packet.network_id)
+        combat_start.handle(packet, client)
+
+
+receive_packet = Response
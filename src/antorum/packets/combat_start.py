@@ -2,7 +2,8 @@ import logging
 from typing import TYPE_CHECKING
 
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferReader, StateType
+from antorum.schema import Schema, INT64
+from antorum.utils import StateType
 
 if TYPE_CHECKING:
     from antorum import multiplayer
@@ -12,15 +13,12 @@ packet_id = 56
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.network_id = reader.read_int64()
+    schema = Schema(network_id=INT64)
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
     logging.warning(
-        f"Combat started with {client.game.entities[packet.network_id].states[StateType.INFO].state.name} ({packet.network_id})")
+        f"Combat started with {client.game.entities[packet.network_id].states[StateType.INFO].name} ({packet.network_id})")
 
 
 receive_packet = Response
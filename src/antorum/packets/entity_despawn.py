@@ -1,19 +1,16 @@
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferReader
+from antorum.schema import Schema, INT64
 
 packet_id = 9
 
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.network_id = reader.read_int64()
+    schema = Schema(network_id=INT64)
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
-    client.game.entities.pop(packet.network_id, None)
+    client.game.remove_entity(packet.network_id)
 
 
 receive_packet = Response
@@ -2,17 +2,14 @@ import logging
 
 from antorum.packets import NetworkPacket
 from antorum.packets.world_entities import Entity, update_entity
-from antorum.utils import BufferReader
+from antorum.schema import Schema, Custom
 
 packet_id = 8
 
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.data = Entity(reader)
+    schema = Schema(data=Custom(Entity))
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
@@ -21,7 +18,7 @@ def handle(packet: Response, client: "multiplayer.Client"):
     if client.game.entities.get(packet.data.network_id):
         update_entity(packet.data.network_id, packet.data.states, client)
     else:
-        client.game.entities[packet.data.network_id] = packet.data
+        client.game.add_entity(packet.data)
 
 
 receive_packet = Response
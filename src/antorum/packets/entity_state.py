@@ -1,24 +1,22 @@
 import logging
 
 from antorum.packets import NetworkPacket
-from antorum.packets.world_entities import EntityState, update_entity
-from antorum.utils import BufferReader
+from antorum.packets.world_entities import EntityStates, update_entity, read_state, STATE_TYPES
+from antorum.schema import Schema, Custom, INT64
 
 packet_id = 27
 
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.network_id = reader.read_int64()
-        self.state = EntityState(reader)
+    schema = Schema(network_id=INT64, state=Custom(read_state))
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
     logging.debug(f"Received entity state {packet.state.state_id} for entity {packet.network_id}")
-    update_entity(packet.network_id, {packet.state.state_id: packet.state}, client)
+    states = EntityStates({STATE_TYPES[packet.state.state_id]: packet.state})
+
+    update_entity(packet.network_id, states, client)
 
 
 receive_packet = Response
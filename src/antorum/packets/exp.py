@@ -1,8 +1,9 @@
 import logging
 
+from antorum.events import EventType
 from antorum.packets import NetworkPacket
 from antorum.player import SkillType
-from antorum.utils import BufferReader
+from antorum.schema import Schema, Enum, INT32, INT64
 
 from typing import TYPE_CHECKING
 
@@ -14,19 +15,15 @@ packet_id = 15
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.network_id = reader.read_int64()
-        self.skill_type = SkillType(reader.read_int8())
-        self.exp = reader.read_int32()
+    schema = Schema(network_id=INT64, skill_type=Enum(SkillType), exp=INT32)
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
     if packet.network_id == client.game.local_player.network_id:
-        client.game.local_player.skills[packet.skill_type].experience += packet.exp
-        logging.info(
-            f"+{packet.exp} {packet.skill_type.name} experience ({client.game.local_player.skills[packet.skill_type].experience})")
+        skill = client.game.local_player.skills[packet.skill_type]
+        skill.experience += packet.exp
+        logging.info(f"+{packet.exp} {packet.skill_type.name} experience ({skill.experience})")
+        client.game.local_player.events.emit(EventType.EXPERIENCE_GAINED, skill, packet.exp)
 
 
 receive_packet = Response
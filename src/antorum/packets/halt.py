@@ -1,7 +1,8 @@
 from typing import TYPE_CHECKING
 
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferReader
+from antorum.schema import Schema, INT64
+from antorum.utils import StateType
 
 if TYPE_CHECKING:
     from antorum import multiplayer
@@ -11,11 +12,13 @@ packet_id = 13
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.network_id = reader.read_int64()
+    schema = Schema(network_id=INT64)
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
-    client.game.entities[packet.network_id].stop_moving()
+    entity = client.game.entities[packet.network_id]
+    entity.stop_moving()
+    client.game.entity_changed(entity, (StateType.TRANSFORM,))  # Its transform is now where it stopped
+
+
+receive_packet = Response
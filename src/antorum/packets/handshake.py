@@ -3,10 +3,12 @@ import enum
 import logging
 
 from antorum.packets.packet import NetworkPacket
-from antorum.utils import BufferReader, BufferWriter
+from antorum.schema import Schema, Enum, INT16, INT32, INT64, STRING
 
 packet_id = 0
 
+ITEM_CACHE = 9967626288493068445  # Hash of the items.cdata the client has, see antorum.cache
+
 
 class HandshakeStatus(enum.Enum):
     ACCEPTED = 0
@@ -16,8 +18,9 @@ class HandshakeStatus(enum.Enum):
 
 class Packet(NetworkPacket):
     packet_id = packet_id
+    schema = Schema(protocol=INT16, world=INT32, item_cache=INT64, enchantment_cache=INT64)
 
-    def __init__(self, protocol: int = 12, world: int = 0x44F, item_cache: int = 9967626288493068445,
+    def __init__(self, protocol: int = 12, world: int = 0x44F, item_cache: int = ITEM_CACHE,
                  enchantment_cache: int = 16519598071320280894):
         self.protocol = protocol
         self.world = world
@@ -27,26 +30,14 @@ class Packet(NetworkPacket):
     def __bytes__(self):
         return self.serialize()
 
-    def serialize(self):
-        writer = BufferWriter()
-
-        writer.write_int16(self.protocol)
-        writer.write_int32(self.world)
-        writer.write_int64(self.item_cache)
-        writer.write_int64(self.enchantment_cache)
-
-        return bytes(writer)
-
 
 class Response(NetworkPacket):
     packet_id = packet_id
+    schema = Schema(status=Enum(HandshakeStatus), player_count=INT32, encryption_key=STRING, latest_news=STRING)
 
     def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.status = HandshakeStatus(reader.read_int8())
-        self.player_count = reader.read_int32()
-        self.encryption_key = base64.b64decode(reader.read_string())
-        self.latest_news = reader.read_string()
+        super().__init__(data)
+        self.encryption_key = base64.b64decode(self.encryption_key)
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
@@ -54,6 +45,9 @@ def handle(packet: Response, client: "multiplayer.Client"):
         logging.error("Handshake rejected")
         exit(1)
 
+    if packet.status == HandshakeStatus.ACCEPTEDNEEDSDOWNLOAD:
+        logging.warning("The server has newer item data than the item cache, update the game to download it")
+
     logging.info(f"Handshake accepted, {packet.player_count} players online. Latest news:\n{packet.latest_news}")
     logging.debug(f"Encryption key: {packet.encryption_key}")
     client.encryption_key = packet.encryption_key
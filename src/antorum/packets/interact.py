@@ -1,7 +1,8 @@
 from typing import TYPE_CHECKING
 
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferWriter, BufferReader, StateType
+from antorum.schema import Schema, Enum, BOOL, INT32, INT64
+from antorum.utils import StateType, InteractionType
 
 if TYPE_CHECKING:
     from antorum import multiplayer
@@ -11,39 +12,26 @@ packet_id = 11
 
 class Packet(NetworkPacket):
     packet_id = packet_id
+    schema = Schema(network_id=INT64, interaction_type=Enum(InteractionType))
 
-    def __init__(self, network_id: int, interaction_type: "InteractionType"):
+    def __init__(self, network_id: int, interaction_type: InteractionType):
         self.network_id = network_id
 
         self.interaction_type = interaction_type
 
-    def serialize(self):
-        writer = BufferWriter()
-
-        writer.write_int64(self.network_id)
-        writer.write_int8(self.interaction_type.value)
-
-        return bytes(writer)
-
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-
-        self.src_network_id = reader.read_int64()
-        self.target_network_id = reader.read_int64()
-        self.damage = reader.read_int32()
-        self.damage_blocked = reader.read_int32()
-        self.did_dodge = reader.read_int8() == 1
-        self.did_miss = reader.read_int8() == 1
+    schema = Schema(src_network_id=INT64, target_network_id=INT64, damage=INT32, damage_blocked=INT32, did_dodge=BOOL,
+                    did_miss=BOOL)
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
     if not packet.did_dodge and not packet.did_miss:
-        client.game.entities[packet.target_network_id].states[
-            StateType.HEALTH].state.health -= packet.damage - packet.damage_blocked
+        target = client.game.entities[packet.target_network_id]
+        health = target.states[StateType.HEALTH].health - (packet.damage - packet.damage_blocked)
+        target.replace_state(StateType.HEALTH, health=health)
+        client.game.entity_changed(target, (StateType.HEALTH,))
 
 
 receive_packet = Response
@@ -1,10 +1,10 @@
 import logging
 from typing import Dict, TYPE_CHECKING
 
+from antorum.events import EventType
 from antorum.packets import NetworkPacket
-from antorum.packets.inventory_add import Response as InventoryAdd
-from antorum.packets.inventory_add import InventoryItem
-from antorum.utils import BufferReader
+from antorum.packets.inventory_add import InventoryItem, PROPERTY_BAG
+from antorum.schema import Schema, Converted, Map, Tuple, value_decoder, INT8, INT32, INT64
 from antorum.cache import resources
 
 if TYPE_CHECKING:
@@ -13,22 +13,22 @@ if TYPE_CHECKING:
 packet_id = 19
 
 
-class Response(NetworkPacket):
-    packet_id = packet_id
+def _inventory_item(item: tuple) -> InventoryItem:
+    resource_id, amount, property_bag = item
+    return InventoryItem(resources[resource_id], amount, property_bag)
+
 
-    def parse(self, reader: BufferReader):
-        self.items = {}
-        for _ in range(reader.read_int64()):
-            item = InventoryAdd()
-            item.parse(reader)
+# Same layout as inventory_add for every item, keyed by the slot index
+INVENTORY_ITEM = Converted(Tuple(INT64, INT32, PROPERTY_BAG), _inventory_item)
+INVENTORY = Map(INT8, INVENTORY_ITEM)
+read_inventory = value_decoder(INVENTORY)
 
-            self.items[item.index] = InventoryItem(resources[item.resource_id], item.amount, item.property_bag)
 
-        return self.items
+class Response(NetworkPacket):
+    packet_id = packet_id
+    schema = Schema(items=INVENTORY)
 
-    def __init__(self, data: bytes = b""):
-        self.items: Dict[int, InventoryItem] = {}
-        self.parse(BufferReader(data))
+    items: Dict[int, InventoryItem]
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
@@ -36,7 +36,8 @@ def handle(packet: Response, client: "multiplayer.Client"):
         client._loaded += 1
 
     logging.debug(f"Received inventory: {packet.items}")
-    client.game.local_player.inventory = packet.items
+    deltas = client.game.local_player.inventory.replace(packet.items)
+    client.game.local_player.events.emit(EventType.INVENTORY_CHANGED, client.game.local_player, deltas)
 
 
 receive_packet = Response
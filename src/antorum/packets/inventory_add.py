@@ -1,4 +1,3 @@
-import json
 import logging
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
@@ -6,50 +5,35 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from antorum import multiplayer
 
+from antorum.events import EventType
 from antorum.packets import NetworkPacket
-from antorum.packets.item import ItemPropertyBag, ItemResource
-from antorum.utils import BufferReader
+from antorum.packets.item import ItemPropertyBag, ItemResource, parse_property_bag
+from antorum.schema import Schema, Converted, INT8, INT32, INT64, STRING
 
 packet_id = 20
 
 
-@dataclass
+@dataclass(slots=True)
 class InventoryItem:
     resource: ItemResource
     amount: int
     property_bag: ItemPropertyBag
 
 
-class Response(NetworkPacket):
-    packet_id = packet_id
+PROPERTY_BAG = Converted(STRING, parse_property_bag)  # JSON encoded ItemPropertyBag, empty for most items
 
-    def __init__(self, data: bytes = b""):
-        reader = BufferReader(data)
-        self.parse(reader)
 
-    def parse(self, reader: BufferReader):
-        self.index = reader.read_int8()
-        self.resource_id = reader.read_int64()
-        self.amount = reader.read_int32()
-        text = reader.read_string()
-        parsed = json.loads(text if text.strip() else "{}")
-        self.property_bag = ItemPropertyBag(**parsed)
+class Response(NetworkPacket):
+    packet_id = packet_id
+    schema = Schema(index=INT8, resource_id=INT64, amount=INT32, property_bag=PROPERTY_BAG)
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
-    if packet.index in client.game.local_player.inventory.keys():
-        if packet.resource_id == client.game.local_player.inventory[packet.index].resource.resource_id:
-            client.game.local_player.inventory[packet.index].amount += packet.amount
-        else:
-            client.game.local_player.inventory[packet.index] = InventoryItem(client.game.resources[packet.resource_id],
-                                                                             packet.amount, packet.property_bag)
-    else:
-        client.game.local_player.inventory[packet.index] = InventoryItem(client.game.resources[packet.resource_id],
-                                                                         packet.amount,
-                                                                         packet.property_bag)
-
-    logging.info(
-        f"Adding {packet.amount} {client.game.resources[packet.resource_id].name} to inventory (index {packet.index})")
+    resource = client.game.resources[packet.resource_id]
+    deltas = client.game.local_player.inventory.add(packet.index, resource, packet.amount, packet.property_bag)
+
+    logging.info(f"Adding {packet.amount} {resource.name} to inventory (index {packet.index})")
+    client.game.local_player.events.emit(EventType.INVENTORY_CHANGED, client.game.local_player, deltas)
 
 
 receive_packet = Response
@@ -1,20 +1,13 @@
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferWriter
+from antorum.schema import Schema, INT8, INT32
 
 packet_id = 24
 
 
 class Request(NetworkPacket):
     packet_id = packet_id
+    schema = Schema(index=INT8, amount=INT32)
 
     def __init__(self, index: int, amount: int):
         self.index = index
         self.amount = amount
-
-    def serialize(self) -> bytes:
-        writer = BufferWriter()
-
-        writer.write_int8(self.index)
-        writer.write_int32(self.amount)
-
-        return bytes(writer)
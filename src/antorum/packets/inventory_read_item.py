@@ -1,18 +1,12 @@
 from antorum.packets import NetworkPacket
-from antorum.utils import BufferWriter
+from antorum.schema import Schema, INT8
 
 packet_id = 88
 
 
 class Request(NetworkPacket):
     packet_id = packet_id
+    schema = Schema(slot=INT8)
 
     def __init__(self, slot: int):
         self.slot = slot
-
-    def serialize(self) -> bytes:
-        writer = BufferWriter()
-
-        writer.write_int8(self.slot)
-
-        return bytes(writer)
@@ -1,4 +1,5 @@
-from antorum.utils import BufferReader
+from antorum.schema import Schema, INT8, INT32
+from antorum.events import EventType
 from antorum.packets import NetworkPacket
 from typing import TYPE_CHECKING
 
@@ -10,19 +11,12 @@ packet_id = 21
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-
-        self.index = reader.read_int8()
-        self.amount = reader.read_int32()
+    schema = Schema(index=INT8, amount=INT32)
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
-    client.game.local_player.inventory[packet.index].amount -= packet.amount
-
-    if client.game.local_player.inventory[packet.index].amount <= 0:
-        client.game.local_player.inventory.pop(packet.index)
+    deltas = client.game.local_player.inventory.remove(packet.index, packet.amount)
+    client.game.local_player.events.emit(EventType.INVENTORY_CHANGED, client.game.local_player, deltas)
 
 
 receive_packet = Response
@@ -1,6 +1,9 @@
 import enum
+import functools
+import json
 from dataclasses import dataclass
 
+from antorum.schema import Schema, Struct, Enum, BOOL, INT16, INT32, INT64, STRING
 from antorum.utils import BufferReader
 
 
@@ -23,7 +26,7 @@ class ItemType(enum.Flag):
     TOOL = 64
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemAttributes:
     damage: int
     armor: int
@@ -39,21 +42,18 @@ class ItemAttributes:
 
 
 class ItemResource:
+    __slots__ = ("resource_id", "resource_name", "name", "plural_name", "item_type", "model_id", "dropped_model_id",
+                 "value", "is_tradeable", "effect_id", "item_attributes")
+
+    schema = Schema(resource_id=INT64, resource_name=STRING, name=STRING, plural_name=STRING, item_type=Enum(ItemType),
+                    model_id=INT16, dropped_model_id=INT16, value=INT32, is_tradeable=BOOL, effect_id=INT64,
+                    item_attributes=Struct(ItemAttributes, damage=INT32, armor=INT32, heal_amount=INT32,
+                                           ingredient_slots=INT32, equipment_slot=Enum(ItemSlot), can_block=BOOL,
+                                           can_fish=BOOL, can_cast_rituals=BOOL, can_craft=BOOL, can_mine=BOOL,
+                                           hide_hair=BOOL))
+
     def __init__(self, reader: BufferReader):
-        self.resource_id = reader.read_int64()
-        self.resource_name = reader.read_string()
-        self.name = reader.read_string()
-        self.plural_name = reader.read_string()
-        self.item_type = ItemType(reader.read_int8())
-        self.model_id = reader.read_int16()
-        self.dropped_model_id = reader.read_int16()
-        self.value = reader.read_int32()
-        self.is_tradeable = reader.read_bool()
-        self.effect_id = reader.read_int64()
-        self.item_attributes = ItemAttributes(reader.read_int32(), reader.read_int32(), reader.read_int32(),
-                                              reader.read_int32(), ItemSlot(reader.read_int8()), reader.read_bool(),
-                                              reader.read_bool(), reader.read_bool(), reader.read_bool(),
-                                              reader.read_bool(), reader.read_bool())
+        self.schema.decode_into(self, reader)
 
     def __repr__(self):
         return f"ItemResource({repr(self.resource_id)}, {repr(self.resource_name)}, {repr(self.name)}, " \
@@ -66,9 +66,25 @@ class ItemResource:
                f"{self.item_attributes})"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)  # Frozen so parsed bags can be shared between items
 class ItemPropertyBag:
     durability: int = -1
     max_durability: int = -1
     creator: str = ""
     enchantment_id: int = -1
+
+
+EMPTY_PROPERTY_BAG = ItemPropertyBag()
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_property_bag(text: str) -> ItemPropertyBag:
+    return ItemPropertyBag(**json.loads(text))
+
+
+def parse_property_bag(text: str) -> ItemPropertyBag:
+    """Most items have an empty bag and the rest repeat a few values, so the bags are shared instead of parsed again."""
+    if not text or text.isspace():
+        return EMPTY_PROPERTY_BAG
+
+    return _parse_property_bag(text)
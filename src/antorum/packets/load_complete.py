@@ -1,13 +1,12 @@
 from antorum.packets import NetworkPacket
+from antorum.schema import Schema
 
 packet_id = 2
 
 
 class Request(NetworkPacket):
     packet_id = packet_id
+    schema = Schema()  # No payload
 
     def __init__(self):
         pass
-
-    def serialize(self):
-        return b""
@@ -1,7 +1,7 @@
 import logging
 from typing import TYPE_CHECKING
 
-from antorum.utils import BufferWriter, BufferReader
+from antorum.schema import Schema, Enum, BYTES, INT64, STRING
 from antorum.packets.packet import NetworkPacket
 from antorum.packets.character_creation import Packet as CharacterCreationPacket
 
@@ -25,27 +25,16 @@ class LoginStatus(enum.Enum):
 
 class Packet(NetworkPacket):
     packet_id = packet_id
+    schema = Schema(username=STRING, encrypted_password=BYTES)
 
     def __init__(self, username: str, encrypted_password: bytes):
         self.username = username
         self.encrypted_password = encrypted_password
 
-    def serialize(self):
-        writer = BufferWriter()
-
-        writer.write_string(self.username)
-        writer.write_bytes(self.encrypted_password)
-
-        return bytes(writer)
-
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.status = LoginStatus(reader.read_int8())
-        self.player_id = reader.read_int64()
+    schema = Schema(status=Enum(LoginStatus), player_id=INT64)
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
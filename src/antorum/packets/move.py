@@ -2,8 +2,9 @@ import logging
 from typing import TYPE_CHECKING
 
 from antorum.packets import NetworkPacket
-from antorum.packets.world_entities import update_entity, MovementState, EntityState
-from antorum.utils import BufferWriter, BufferReader, StateType
+from antorum.packets.world_entities import update_entity, MovementState
+from antorum.schema import Schema, Array, Tuple, FLOAT, INT64
+from antorum.utils import StateType
 
 if TYPE_CHECKING:
     from antorum import multiplayer
@@ -13,29 +14,16 @@ packet_id = 4
 
 class Packet(NetworkPacket):
     packet_id = packet_id
+    schema = Schema(x=FLOAT, y=FLOAT)
 
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
 
-    def serialize(self):
-        writer = BufferWriter()
-
-        writer.write_float(self.x)
-        writer.write_float(self.y)
-
-        return bytes(writer)
-
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.network_id = reader.read_int64()
-        self.moves = []
-        for _ in range(reader.read_int64()):
-            self.moves.append((reader.read_float(), reader.read_float()))
+    schema = Schema(network_id=INT64, moves=Array(Tuple(FLOAT, FLOAT)))
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
@@ -46,12 +34,8 @@ def handle(packet: Response, client: "multiplayer.Client"):
     entity = client.game.entities[packet.network_id]
     logging.debug(f"Moving entity {packet.network_id}")
 
-    fake_entity_state = EntityState.__new__(EntityState)  # TODO: This is a hack, fix it
-    fake_entity_state.state_id = 2
-    fake_entity_state.state = MovementState(packet.moves, entity.is_moving,
-                                            entity.states[StateType.MOVEMENT].state.speed)
-
-    update_entity(packet.network_id, {StateType.MOVEMENT: fake_entity_state}, client)
+    movement = MovementState(packet.moves, entity.is_moving, entity.states[StateType.MOVEMENT].speed)
+    update_entity(packet.network_id, {StateType.MOVEMENT: movement}, client)
 
 
 receive_packet = Response
@@ -2,6 +2,7 @@ import logging
 from typing import TYPE_CHECKING
 
 from antorum.packets import NetworkPacket
+from antorum.schema import Schema
 
 if TYPE_CHECKING:
     from antorum import multiplayer
@@ -11,9 +12,7 @@ packet_id = 85
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        pass
+    schema = Schema()
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
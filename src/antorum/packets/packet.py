@@ -1,9 +1,25 @@
+from antorum.schema import Schema
+from antorum.utils import BufferReader, BufferWriter
+
+
 class NetworkPacket:
     header_size: int = 3
     packet_id: int
+    schema: Schema = None  # Wire layout, compiled once when the packet module is imported
+
+    def __init__(self, data: bytes | memoryview):
+        # Received packets are decoded straight from their schema
+        self.schema.decode_into(self, BufferReader(data))
+
+    def serialize_into(self, writer: BufferWriter):
+        if self.schema:
+            self.schema.encode(self, writer)
+
+    def serialize(self) -> bytes:
+        writer = BufferWriter()
+        self.serialize_into(writer)
 
-    def serialize(self):
-        pass
+        return bytes(writer)
 
     def __str__(self):
         return f"{self.__class__.__name__}({self.__dict__})"
@@ -1,6 +1,7 @@
+from antorum.events import EventType
 from antorum.packets import NetworkPacket
 from antorum.player import SkillType, Skill
-from antorum.utils import BufferReader
+from antorum.schema import Schema, Array, Converted, Enum, Tuple, INT32
 
 from typing import TYPE_CHECKING
 
@@ -10,20 +11,14 @@ if TYPE_CHECKING:
 packet_id = 17
 
 
-class Response(NetworkPacket):
-    packet_id = packet_id
+def _skills(skills: list) -> dict:
+    return {skill_type: Skill(skill_type, level, experience, current_level_exp, next_level_exp)
+            for skill_type, experience, level, current_level_exp, next_level_exp in skills}
 
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.skills = {}
-        for _ in range(reader.read_int64()):
-            skill_type = SkillType(reader.read_int8())
-            experience = reader.read_int32()
-            level = reader.read_int32()
-            current_level_exp = reader.read_int32()
-            next_level_exp = reader.read_int32()
 
-            self.skills[skill_type] = Skill(skill_type, level, experience, current_level_exp, next_level_exp)
+class Response(NetworkPacket):
+    packet_id = packet_id
+    schema = Schema(skills=Converted(Array(Tuple(Enum(SkillType), INT32, INT32, INT32, INT32)), _skills))
 
 
 def handle(packet: Response, client: "multiplayer.Client"):
@@ -31,6 +26,7 @@ def handle(packet: Response, client: "multiplayer.Client"):
         client._loaded += 1
 
     client.game.local_player.skills = packet.skills
+    client.game.local_player.events.emit(EventType.SKILLS_CHANGED, client.game.local_player)
 
 
 receive_packet = Response
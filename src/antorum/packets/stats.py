@@ -3,6 +3,7 @@ import logging
 from typing import TYPE_CHECKING
 
 from antorum.packets import NetworkPacket
+from antorum.schema import Schema, Array, Custom, Enum, Map, Tuple, BOOL, FLOAT, INT32, INT64, STRING
 from antorum.utils import BufferReader
 
 if TYPE_CHECKING:
@@ -23,34 +24,24 @@ class Stat(enum.Enum):
 
 
 class StatBonuses:
+    schema = Schema(base_hp=INT32, base_hit_chance=FLOAT, base_dodge_chance=FLOAT, base_block_chance=FLOAT,
+                    skill_success_bonus=FLOAT)
+
     def __init__(self, reader: BufferReader):
-        self.base_hp = reader.read_int32()
-        self.base_hit_chance = reader.read_float()
-        self.base_dodge_chance = reader.read_float()
-        self.base_block_chance = reader.read_float()
-        self.skill_success_bonus = reader.read_float()
+        self.schema.decode_into(self, reader)
 
 
 class ClassBonuses:
+    schema = Schema(crafting_exp_bonus=FLOAT, foraging_exp_bonus=FLOAT, combat_exp_bonus=FLOAT)
+
     def __init__(self, reader: BufferReader):
-        self.crafting_exp_bonus = reader.read_float()
-        self.foraging_exp_bonus = reader.read_float()
-        self.combat_exp_bonus = reader.read_float()
+        self.schema.decode_into(self, reader)
 
 
 class Response(NetworkPacket):
     packet_id = packet_id
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.stats = {Stat(reader.read_int8()): reader.read_int32() for _ in range(reader.read_int64())}
-        self.bonuses = StatBonuses(reader)
-        self.class_bonuses = ClassBonuses(reader)
-
-        # Spell effects, not implemented yet
-        for _ in range(reader.read_int64()):
-            reader.read_int64(), reader.read_string(), reader.read_string(), reader.read_int64()
-            reader.read_int32(), reader.read_int32(), reader.read_bool()
+    schema = Schema(stats=Map(Enum(Stat), INT32), bonuses=Custom(StatBonuses), class_bonuses=Custom(ClassBonuses),
+                    spell_effects=Array(Tuple(INT64, STRING, STRING, INT64, INT32, INT32, BOOL)))  # Not implemented yet
 
 
 def update_stat(stat, value, client: "multiplayer.Client"):
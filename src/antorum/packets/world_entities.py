@@ -1,87 +1,92 @@
-import asyncio
-import enum
 import logging
-from dataclasses import dataclass
-from typing import Tuple, List, Dict, TYPE_CHECKING
+from dataclasses import dataclass, replace
+from typing import Callable, ClassVar, Iterable, Iterator, Tuple, List, Dict, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from antorum import multiplayer
+    from antorum.positions import PositionTable
 
 from antorum.game import Game
+from antorum.movement import Path
 from antorum.packets import NetworkPacket
-from antorum.packets.inventory import InventoryItem
-from antorum.packets.inventory import Response as InventoryResponse
+from antorum.packets.inventory import InventoryItem, INVENTORY_ITEM
 from antorum.packets.interact import Packet as Interact
 
 from antorum.packets.item import ItemSlot
 
-from antorum.utils import BufferReader, get_entity_from_player_id, StateType, is_nearby, distance_to_entity, emulate_move
+from antorum.schema import Schema, Field, Array, Converted, Custom, Enum, EnumLookup, Map, Struct, value_decoder, \
+    value_skipper, BOOL, FLOAT, INT8, INT16, INT32, INT64, STRING
+from antorum.schema import Tuple as FieldTuple
+from antorum.utils import BufferReader, get_entity_from_player_id, StateType, InteractionType, is_nearby, \
+    distance_to_entity, run_of
 
 packet_id = 29
 
 
-class InteractionType(enum.Enum):
-    ATTACK = 0
-    COOK_ON = 1
-    TALK_TO = 2
-    WALK_TO = 3
-    EXAMINE = 4
-    PICK_UP = 5
-    BARTER = 6
-    FORAGE = 7
-    FISH = 8
-    ACCESS_VAULT = 9
-    CRAFT = 10
-    PERFORM_RITUAL = 11
-    MINE = 12
-    SMELT_AT = 13
-    OPEN = 14
-
-
-@dataclass
-class InfoState:
+class EntityState:
+    """Base of the entity states, ``state_id`` is the id of the state type on the wire."""
+
+    __slots__ = ()
+    state_id: ClassVar[int]
+
+    @property
+    def state(self):
+        # States used to be wrapped in an EntityState that had the actual state in ``state``
+        return self
+
+
+@dataclass(slots=True)
+class InfoState(EntityState):
+    state_id: ClassVar[int] = 0
     name: str
     model_id: int
 
 
-@dataclass
-class TransformState:
+@dataclass(slots=True)
+class TransformState(EntityState):
+    state_id: ClassVar[int] = 1
     position: Tuple[float, float]
     rotation: Tuple[float, float, float]
     scale: Tuple[float, float, float]
 
 
-@dataclass
-class MovementState:
+@dataclass(slots=True)
+class MovementState(EntityState):
+    state_id: ClassVar[int] = 2
     destinations: List[Tuple[float, float]]
     is_moving: bool
     speed: float
 
 
-@dataclass
-class HealthState:
+@dataclass(slots=True)
+class HealthState(EntityState):
+    state_id: ClassVar[int] = 3
     health: int
     max_health: int
 
 
-@dataclass
-class ItemState:
+@dataclass(slots=True)
+class ItemState(EntityState):
+    state_id: ClassVar[int] = 4
     amount: int
     network_id: int
 
 
-@dataclass
-class InteractableState:
+@dataclass(slots=True)
+class InteractableState(EntityState):
+    state_id: ClassVar[int] = 5
     interactions: List[InteractionType]
 
 
-@dataclass
-class PlayerState:
+@dataclass(slots=True)
+class PlayerState(EntityState):
+    state_id: ClassVar[int] = 6
     player_id: int
 
 
-@dataclass
-class EquipmentState:
+@dataclass(slots=True)
+class EquipmentState(EntityState):
+    state_id: ClassVar[int] = 7
     hair: int
     facial_hair: int
     hair_color: int
@@ -94,20 +99,22 @@ class EquipmentState:
     height: int
 
 
-@dataclass
-class NPCState:
-    pass
+@dataclass(slots=True)
+class NPCState(EntityState):
+    state_id: ClassVar[int] = 8
 
 
-@dataclass
-class FisherState:
+@dataclass(slots=True)
+class FisherState(EntityState):
+    state_id: ClassVar[int] = 9
     is_fishing: bool
     fish_node_network_id: int
     bobber_position: Tuple[float, float]
 
 
-@dataclass
-class ClassState:
+@dataclass(slots=True)
+class ClassState(EntityState):
+    state_id: ClassVar[int] = 10
     title: str
     artisan: int
     explorer: int
@@ -115,119 +122,231 @@ class ClassState:
     ascetic: int
 
 
-@dataclass
-class QuestGiverState:
+@dataclass(slots=True)
+class QuestGiverState(EntityState):
+    state_id: ClassVar[int] = 11
     quest_id: int
 
 
-@dataclass
-class MinerState:
+@dataclass(slots=True)
+class MinerState(EntityState):
+    state_id: ClassVar[int] = 12
     in_progress: bool
     node_network_id: int
 
 
-@dataclass
-class AnimatorState:
-    pass  # TODO: Implement
+@dataclass(slots=True)
+class AnimatorState(EntityState):
+    state_id: ClassVar[int] = 13  # TODO: Implement
+
+
+def _equipment_state(values: tuple) -> EquipmentState:
+    hair, facial_hair, hair_color, facial_hair_color, skin_color, shirt_color, pants_color, bulk, height, \
+        equipped = values
+    return EquipmentState(hair, facial_hair, hair_color, facial_hair_color, skin_color, shirt_color, pants_color,
+                          equipped, bulk, height)
+
+
+STATE_LAYOUTS: Dict[int, Field] = {
+    0: Struct(InfoState, name=STRING, model_id=INT16),
+    1: Struct(TransformState, position=FieldTuple(FLOAT, FLOAT), rotation=FieldTuple(FLOAT, FLOAT, FLOAT),
+              scale=FieldTuple(FLOAT, FLOAT, FLOAT)),
+    2: Struct(MovementState, destinations=Array(FieldTuple(FLOAT, FLOAT)), is_moving=BOOL, speed=FLOAT),
+    3: Struct(HealthState, health=INT32, max_health=INT32),
+    4: Struct(ItemState, amount=INT32, network_id=INT64),
+    5: Struct(InteractableState, interactions=Array(Enum(InteractionType))),
+    6: Struct(PlayerState, player_id=INT64),
+    7: Converted(FieldTuple(INT8, INT8, INT8, INT8, INT8, INT8, INT8, INT8, INT8, Map(Enum(ItemSlot), INVENTORY_ITEM)),
+                 _equipment_state),
+    8: Struct(NPCState),
+    9: Struct(FisherState, is_fishing=BOOL, fish_node_network_id=INT64, bobber_position=FieldTuple(FLOAT, FLOAT)),
+    10: Struct(ClassState, title=STRING, artisan=INT8, explorer=INT8, warrior=INT8, ascetic=INT8),
+    11: Struct(QuestGiverState, quest_id=INT64),
+    12: Struct(MinerState, in_progress=BOOL, node_network_id=INT64),
+    # TODO: Implement, not necessary for now
+    13: Converted(FieldTuple(INT64, Array(FieldTuple(STRING, BOOL))), lambda _: AnimatorState()),
+}
+
+# Decoder per state id, the fixed-width states (transform, health, item, fisher, miner, ...) are a single unpack_from
+STATE_DECODERS: Dict[int, Callable[[BufferReader], object]] = {
+    state_id: value_decoder(layout) for state_id, layout in STATE_LAYOUTS.items()}
+# Skips a state without decoding it, so it can be decoded from the frame on first access instead
+STATE_SKIPPERS: Dict[int, Callable[[BufferReader], None]] = {
+    state_id: value_skipper(layout) for state_id, layout in STATE_LAYOUTS.items()}
+
+STATE_TYPES = EnumLookup(StateType)
+ENTITY_HEADER = run_of("Q", 2)  # [int64 network id][int64 state count]
+
+# States most bots look at, everything else is only decoded when it's accessed
+DEFAULT_EAGER_STATES = frozenset({StateType.INFO, StateType.TRANSFORM, StateType.MOVEMENT, StateType.HEALTH,
+                                  StateType.INTERACTABLE, StateType.PLAYER})
+# Ids of the states decoded straight from the packet while it's read, the client sets its own eager states before it
+# decodes a packet
+eager_state_ids = frozenset(state_type.value for state_type in DEFAULT_EAGER_STATES)
+
+
+class PendingState:
+    """A state that hasn't been decoded yet, with a copy of just its own bytes so it doesn't keep the frame alive."""
+
+    __slots__ = ("state_id", "data")
+
+    def __init__(self, state_id: int, data: bytes):
+        self.state_id = state_id
+        self.data = data
+
+    def decode(self) -> EntityState:
+        return STATE_DECODERS[self.state_id](BufferReader(self.data))
+
+    def __repr__(self):
+        return f"PendingState({self.state_id})"
 
 
-class EntityState:
-    state: InfoState | TransformState | MovementState | HealthState | ItemState | InteractableState | PlayerState | \
-           EquipmentState | NPCState | FisherState | ClassState | QuestGiverState | MinerState | AnimatorState
+def read_state(reader: BufferReader) -> EntityState | PendingState:
+    """Reads a state, eager states (see ``eager_state_ids``) are decoded right away. The others are skipped over and
+    decoded once they're looked up in ``EntityStates``."""
+    state_id = reader.read_int32()
 
-    def __init__(self, reader: BufferReader):
-        self.state_id = reader.read_int32()
-
-        if self.state_id == 0:
-            self.state = InfoState(reader.read_string(), reader.read_int16())
-        elif self.state_id == 1:
-            self.state = TransformState((reader.read_float(), reader.read_float()),
-                                        (reader.read_float(), reader.read_float(), reader.read_float()),
-                                        (reader.read_float(), reader.read_float(), reader.read_float()))
-        elif self.state_id == 2:
-            self.state = MovementState([(reader.read_float(), reader.read_float()) for _ in range(reader.read_int64())],
-                                       reader.read_bool(), reader.read_float())
-        elif self.state_id == 3:
-            self.state = HealthState(reader.read_int32(), reader.read_int32())
-        elif self.state_id == 4:
-            self.state = ItemState(reader.read_int32(), reader.read_int64())
-        elif self.state_id == 5:
-            self.state = InteractableState([InteractionType(reader.read_int8()) for _ in range(reader.read_int64())])
-        elif self.state_id == 6:
-            self.state = PlayerState(reader.read_int64())
-        elif self.state_id == 7:
-            hair = reader.read_int8()
-            facial_hair = reader.read_int8()
-            hair_color = reader.read_int8()
-            facial_hair_color = reader.read_int8()
-            skin_color = reader.read_int8()
-            shirt_color = reader.read_int8()
-            pants_color = reader.read_int8()
-            bulk = reader.read_int8()
-            height = reader.read_int8()
-
-            equipped = {ItemSlot(item[0]): item[1] for item in InventoryResponse().parse(reader).items()}
-
-            self.state = EquipmentState(hair, facial_hair, hair_color, facial_hair_color, skin_color, shirt_color,
-                                        pants_color, equipped, bulk, height)
-        elif self.state_id == 8:
-            self.state = NPCState()
-        elif self.state_id == 9:
-            self.state = FisherState(reader.read_bool(), reader.read_int64(),
-                                     (reader.read_float(), reader.read_float()))
-        elif self.state_id == 10:
-            self.state = ClassState(reader.read_string(), reader.read_int8(), reader.read_int8(), reader.read_int8(),
-                                    reader.read_int8())
-        elif self.state_id == 11:
-            self.state = QuestGiverState(reader.read_int64())
-        elif self.state_id == 12:
-            self.state = MinerState(reader.read_bool(), reader.read_int64())
-        elif self.state_id == 13:
-            # TODO: Implement, not necessary for now
-            reader.read_int64()
-            for _ in range(reader.read_int64()):
-                reader.read_string(), reader.read_bool()
-            self.state = AnimatorState()
-        else:
-            logging.error(f"Unknown state id {self.state_id}")
-            self.state = None
+    if state_id in eager_state_ids:
+        return STATE_DECODERS[state_id](reader)
+
+    skip = STATE_SKIPPERS.get(state_id)
+    if skip is None:
+        raise ValueError(f"Unknown state id {state_id}")
+
+    start = reader.pointer
+    skip(reader)
+    return PendingState(state_id, bytes(reader.data[start:reader.pointer]))
+
+
+class EntityStates(dict):
+    """States of an entity by type. States are only decoded from the packet data when they're first looked up."""
+
+    __slots__ = ()
+
+    def __getitem__(self, state_type: StateType) -> EntityState:
+        state = dict.__getitem__(self, state_type)
+
+        if state.__class__ is PendingState:
+            state = state.decode()
+            dict.__setitem__(self, state_type, state)
+
+        return state
+
+    def get(self, state_type: StateType, default=None) -> EntityState | None:
+        state = dict.get(self, state_type, default)
+
+        if state.__class__ is PendingState:
+            state = state.decode()
+            dict.__setitem__(self, state_type, state)
+
+        return state
+
+    def values(self) -> Iterator[EntityState]:
+        """Decodes the states one by one as they're iterated, stop early to leave the rest pending."""
+        for state_type in list(self):
+            yield self[state_type]
+
+    def items(self) -> Iterator[Tuple[StateType, EntityState]]:
+        for state_type in list(self):
+            yield state_type, self[state_type]
+
+    def pop(self, state_type: StateType, *default) -> EntityState:
+        state = dict.pop(self, state_type, *default)
+        return state.decode() if state.__class__ is PendingState else state
+
+    def is_decoded(self, state_type: StateType) -> bool:
+        return dict.get(self, state_type).__class__ is not PendingState
+
+    def decode(self, state_types: Iterable[StateType]):
+        """Decodes the given states right away instead of on first access."""
+        for state_type in state_types:
+            if state_type in self:
+                self[state_type]
+
+    def merge(self, states: Dict[StateType, EntityState]):
+        """Takes over the given states without decoding the ones that are still pending."""
+        dict.update(self, dict.items(states))
+
+    def copy(self) -> "EntityStates":
+        states = EntityStates()
+        dict.update(states, dict.items(self))
+        return states
 
     def __repr__(self):
-        return f"EntityState({self.state_id}, {self.state})"
+        return repr(dict(self.items()))
 
 
 class Entity:
+    __slots__ = ("network_id", "states", "_client", "_positions", "_path", "_shared")
+
     def __init__(self, reader: BufferReader):
-        self.network_id = reader.read_int64()
+        self.network_id, amount = reader.unpack(ENTITY_HEADER)
 
-        self.states: Dict[StateType, EntityState] = {}
+        self.states = states = EntityStates()
 
-        amount = reader.read_int64()
-        for i in range(amount):
-            state = EntityState(reader)
-            self.states[StateType(state.state_id)] = state
+        for _ in range(amount):
+            state = read_state(reader)
+            dict.__setitem__(states, STATE_TYPES[state.state_id], state)
 
         self._client: "multiplayer.Client" = None  # Gets set by the handler
+        self._positions: "PositionTable" = None  # Set while the entity is in a game with a position table
+        self._path: Path | None = None  # Set while the entity is moving
+        self._shared = False  # Whether a frozen copy (see freeze) shares the states dict
+
+    def freeze(self) -> "Entity":
+        """Copy of the entity as it is right now, for snapshots.
+
+        The copy shares the states with the entity. States are never changed in place (see ``replace_state``) and the
+        entity copies its states dict before it changes it again, so the copy doesn't change along.
+        """
+        frozen = Entity.__new__(Entity)
+        frozen.network_id = self.network_id
+        frozen.states = self.states
+        frozen._client = self._client
+        frozen._positions = None
+        frozen._path = self._path
+        frozen._shared = True
+
+        self._shared = True
+        return frozen
+
+    def _writable_states(self) -> EntityStates:
+        if self._shared:
+            self.states = self.states.copy()
+            self._shared = False
+
+        return self.states
+
+    def merge_states(self, states: Dict[StateType, EntityState]):
+        self._writable_states().merge(states)
+
+    def replace_state(self, state_type: StateType, **changes):
+        """Replaces a state by a copy of it with ``changes``, e.g. ``replace_state(StateType.HEALTH, health=10)``."""
+        states = self._writable_states()
+        dict.__setitem__(states, state_type, replace(states[state_type], **changes))
+
+    def decode_states(self, state_types: Iterable[StateType]):
+        self.states.decode(state_types)
 
     @property
     def name(self):
-        if self.states.get(StateType.INFO):
-            return self.states[StateType.INFO].state.name
-
-        return "Unknown entity"
+        info = self.states.get(StateType.INFO)
+        return info.name if info else "Unknown entity"
 
     def can_interact(self, interaction: InteractionType):
-        if not self.states.get(StateType.INTERACTABLE):
-            return False
-
-        return interaction in self.states[StateType.INTERACTABLE].state.interactions
+        interactable = self.states.get(StateType.INTERACTABLE)
+        return interactable is not None and interaction in interactable.interactions
 
     @property
     def position(self):
-        if self.states.get(StateType.TRANSFORM):
-            return self.states[StateType.TRANSFORM].state.position
+        if self._path is not None:
+            return self._path.position()
 
-        return (-1.0, -1.0)
+        if self._positions is not None:
+            return self._positions.position(self.network_id)
+
+        transform = self.states.get(StateType.TRANSFORM)
+        return transform.position if transform else (-1.0, -1.0)
 
     def can_barter(self):
         return self.can_interact(InteractionType.BARTER)
@@ -297,20 +416,39 @@ class Entity:
         return distance_to_entity(position, self)
 
     def start_moving(self):
-        if not self.is_moving:
-            self.states[StateType.MOVEMENT].state.is_moving = True
-
-            if self.network_id == self._client.game.local_player.network_id:
-                asyncio.create_task(emulate_move(self._client.game.local_player.position,
-                                                 self.states[StateType.MOVEMENT].state.destinations,
-                                                 self.states[StateType.MOVEMENT].state.speed, self._client))
+        """Starts following the destinations of the movement state from where the entity is right now."""
+        movement = self.states[StateType.MOVEMENT]
+        if not movement.is_moving:
+            self.replace_state(StateType.MOVEMENT, is_moving=True)
+        self._path = Path(self.position, movement.destinations, movement.speed) if movement.destinations else None
 
     def stop_moving(self):
-        self.states[StateType.MOVEMENT].state.is_moving = False
+        """Stops the entity where it is right now, its transform is moved there."""
+        if self._path is not None:
+            if StateType.TRANSFORM in self.states:
+                self.replace_state(StateType.TRANSFORM, position=self._path.position())
+
+            self._path = None
+
+        movement = self.states.get(StateType.MOVEMENT)
+        if movement is not None and movement.is_moving:
+            self.replace_state(StateType.MOVEMENT, is_moving=False)
 
     @property
     def is_moving(self):
-        return self.states.get(StateType.MOVEMENT) and self.states[StateType.MOVEMENT].state.is_moving
+        if self._path is not None and self._path.finished():
+            return False
+
+        movement = self.states.get(StateType.MOVEMENT)
+        return movement is not None and movement.is_moving
+
+    @property
+    def path(self) -> Path | None:
+        return self._path
+
+    def time_to_destination(self) -> float:
+        """Seconds until the entity reaches the end of its path, 0 if it isn't moving."""
+        return self._path.time_left() if self._path is not None else 0.0
 
     def __repr__(self):
         return f"Entity({self.network_id}, {self.states})"
@@ -318,43 +456,39 @@ class Entity:
 
 class Response(NetworkPacket):
     packet_id = packet_id
+    schema = Schema(coords=FieldTuple(INT32, INT32), entities=Array(Custom(Entity)), removed_entities=Array(INT64),
+                    full_sync=BOOL)
 
-    def read_entities(self, reader: BufferReader):
-        entities = []
-        count = reader.read_int64()
-        for _ in range(count):
-            entities.append(Entity(reader))
-        return entities
-
-    def __init__(self, data: bytes):
-        reader = BufferReader(data)
-        self.coords = reader.read_int32(), reader.read_int32()
-        self.entities: List[Entity] = self.read_entities(reader)
-        self.removed_entities = [reader.read_int64() for _ in range(reader.read_int64())]
-        self.full_sync = reader.read_bool()
+    entities: List[Entity]
 
 
 def update_player(states: Dict[StateType, EntityState], client: "multiplayer.Client"):
-    for state in states.values():
-        if state.state_id == 0:
-            client.game.local_player.username = state.state.name
-        if state.state_id == 1:
-            client.game.local_player.position = state.state.position
-        elif state.state_id == 3:
-            client.game.local_player.health = state.state.health
-            client.game.local_player.max_health = state.state.max_health
+    info = states.get(StateType.INFO)
+    if info:
+        client.game.local_player.username = info.name
+
+    transform = states.get(StateType.TRANSFORM)
+    if transform:
+        client.game.local_player.position = transform.position
+
+    health = states.get(StateType.HEALTH)
+    if health:
+        client.game.local_player.health = health.health
+        client.game.local_player.max_health = health.max_health
 
 
 def update_entity(network_id: int, states: Dict[StateType, EntityState], client: "multiplayer.Client"):
-    if client.game.entities.get(network_id):
-        for state in states.values():
-            client.game.entities[network_id].states[StateType(state.state_id)] = state
+    entity = client.game.entities.get(network_id)
+    if entity:
+        if StateType.TRANSFORM in states:
+            entity.stop_moving()  # Before the new transform is taken over, so it isn't moved to the old path
+
+        entity.merge_states(states)
 
-    if states.get(StateType.TRANSFORM):
-        client.game.entities[network_id].stop_moving()
+        if StateType.MOVEMENT in states:
+            entity.start_moving()
 
-    if states.get(StateType.MOVEMENT):
-        client.game.entities[network_id].start_moving()
+        client.game.entity_changed(entity, states)
 
     if network_id == client.game.local_player.network_id:
         update_player(states, client)
@@ -363,21 +497,21 @@ def update_entity(network_id: int, states: Dict[StateType, EntityState], client:
 def update_entities(entities: List[Entity], is_full_sync: bool, removed_entities: List[int],
                     client: "multiplayer.Client"):
     for network_id in removed_entities:
-        client.game.entities.pop(network_id, None)
+        client.game.remove_entity(network_id)
 
     if is_full_sync:
-        client.game.entities.clear()
-        client.game.entities = {entity.network_id: entity for entity in entities}
+        client.game.replace_entities(entities)
 
-        player_entity = get_entity_from_player_id(client.player_id, entities)
+        player_entity = get_entity_from_player_id(client.player_id, client.game)
         client.game.local_player.network_id = player_entity.network_id
+        client.game.local_player.entity = player_entity
         client.game.network_id = player_entity.network_id
 
         update_player(player_entity.states, client)
     else:
         for entity in entities:
             if not client.game.entities.get(entity.network_id):
-                client.game.entities[entity.network_id] = entity
+                client.game.add_entity(entity)
             else:
                 update_entity(entity.network_id, entity.states, client)
 
@@ -390,7 +524,7 @@ def handle(packet: Response, client: "multiplayer.Client"):
         player_entity = get_entity_from_player_id(client.player_id, packet.entities)
         network_id = player_entity.network_id
 
-        client.game = Game(client.player_id, network_id)
+        client.game = Game(client.player_id, network_id, client.position_table, client.events)
         client._loaded += 1
 
     update_entities(packet.entities, packet.full_sync, packet.removed_entities, client)
@@ -2,11 +2,14 @@ import enum
 from dataclasses import dataclass
 from typing import List, Tuple, Dict, TYPE_CHECKING
 
+from antorum.events import EventBus
+from antorum.inventory import Inventory
 from antorum.packets.inventory_add import InventoryItem
 from antorum.packets.stats import Stat
 
 if TYPE_CHECKING:
     from antorum import multiplayer
+    from antorum.packets.world_entities import Entity
 
 
 class SkillType(enum.Enum):
@@ -22,7 +25,7 @@ class SkillType(enum.Enum):
     MINING = 9
 
 
-@dataclass
+@dataclass(slots=True)
 class Skill:
     type: SkillType
     level: int
@@ -34,10 +37,7 @@ class Skill:
 class Player:
     def __init__(self, player_id: int, network_id: int, skills: Dict[SkillType, Skill] = None, health: int = 30,
                  max_health: int = 30, username: str = "Unknown", position: Tuple[float, float] = (-1, -1),
-                 stats: Dict[Stat, int] = None, inventory: Dict[int, InventoryItem] = None):
-        if inventory is None:
-            inventory = {}
-
+                 stats: Dict[Stat, int] = None, inventory: Dict[int, InventoryItem] = None, events: EventBus = None):
         if stats is None:
             stats = {}
 
@@ -50,8 +50,18 @@ class Player:
         self.health = health
         self.max_health = max_health
         self.position = position
-        self.inventory = inventory
+        self.inventory = inventory if isinstance(inventory, Inventory) else Inventory(inventory)
         self.username = username
+        self.events = events if events is not None else EventBus()
+        self.entity: "Entity" = None  # Entity of the player once the world is loaded, the position comes from it
+
+    @property
+    def position(self) -> Tuple[float, float]:
+        return self.entity.position if self.entity is not None else self._position
+
+    @position.setter
+    def position(self, position: Tuple[float, float]):
+        self._position = position
 
     def __str__(self):
         return f"{self.username} ({self.health}/{self.max_health}) at {self.position}"
@@ -0,0 +1,168 @@
+"""Columnar entity positions for vectorized queries, needs NumPy (``pip install antorum[numpy]``)."""
+import math
+from typing import Dict, Iterable, List, Tuple, TYPE_CHECKING
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency, only needed when a game is created with a position table
+    np = None
+
+from antorum.utils import StateType
+
+if TYPE_CHECKING:
+    from antorum.packets.world_entities import Entity
+
+Position = Tuple[float, float]
+
+
+class PositionTable:
+    """Positions of entities in contiguous arrays, one row per entity.
+
+    Rows of removed entities are reused by the next entity that is added. Rows of entities that follow a path are moved
+    to where the entities are right now before every query, until they arrive. Queries return network ids and work on
+    the whole table at once, ``candidates`` (network ids) limits a query to some of the entities. Ties in distance are
+    broken by network id, like the spatial grid does.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if np is None:
+            raise ImportError("The position table needs NumPy, install it with `pip install antorum[numpy]`")
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+
+        self.rows: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._moving: Dict[int, "Entity"] = {}  # Entities following a path, by network id
+        self._end = 0  # One past the highest row ever used
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, network_id: int):
+        return network_id in self.rows
+
+    def _grow(self):
+        capacity = len(self.x) * 2
+
+        for name in ("x", "y", "alive", "ids"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _row(self, network_id: int) -> int:
+        row = self.rows.get(network_id)
+        if row is not None:
+            return row
+
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._end == len(self.x):
+                self._grow()
+
+            row = self._end
+            self._end += 1
+
+        self.rows[network_id] = row
+        self.ids[row] = network_id
+        self.alive[row] = True
+        return row
+
+    def insert(self, entity: "Entity"):
+        """Adds an entity or refreshes its row from its path, or its transform when it isn't following one."""
+        row = self._row(entity.network_id)
+
+        path = entity.path
+        if path is not None:
+            self.x[row], self.y[row] = path.position()
+        else:
+            transform = entity.states.get(StateType.TRANSFORM)
+            self.x[row], self.y[row] = transform.position if transform else (-1.0, -1.0)
+
+        if path is not None and not path.finished():
+            self._moving[entity.network_id] = entity
+        else:
+            self._moving.pop(entity.network_id, None)
+
+        entity._positions = self
+
+    def remove(self, entity: "Entity"):
+        self._moving.pop(entity.network_id, None)
+        row = self.rows.pop(entity.network_id, None)
+        if row is not None:
+            self.alive[row] = False
+            self._free.append(row)
+
+        entity._positions = None
+
+    def clear(self, entities: Iterable["Entity"] = ()):
+        for entity in entities:
+            entity._positions = None
+
+        self.alive[:] = False
+        self.rows.clear()
+        self._free.clear()
+        self._moving.clear()
+        self._end = 0
+
+    def position(self, network_id: int) -> Position:
+        row = self.rows[network_id]
+        return float(self.x[row]), float(self.y[row])
+
+    def _follow_moving(self):
+        """Moves the rows of entities following a path to where they are now, the ones that arrived aren't followed."""
+        for network_id, entity in list(self._moving.items()):
+            self.insert(entity)
+
+    def _select(self, candidates: Iterable[int] | None):
+        """Rows to query, either every live row or just the rows of the candidates."""
+        if self._moving:
+            self._follow_moving()
+
+        if candidates is None:
+            return np.flatnonzero(self.alive[:self._end])
+
+        rows = self.rows
+        return np.fromiter((rows[network_id] for network_id in candidates if network_id in rows), dtype=np.intp)
+
+    def _distances(self, coords: Position, rows) -> "np.ndarray":
+        return (self.x[rows] - coords[0]) ** 2 + (self.y[rows] - coords[1]) ** 2
+
+    def nearest(self, coords: Position, k: int = 1, candidates: Iterable[int] = None) -> List[int]:
+        """Network ids of up to ``k`` entities closest to ``coords``, closest first."""
+        rows = self._select(candidates)
+        if not len(rows) or k <= 0:
+            return []
+
+        distances = self._distances(coords, rows)
+        ids = self.ids[rows]
+        if k < len(rows):
+            # Entities as close as the k-th are kept too, so ties are broken by network id
+            closest = np.flatnonzero(distances <= np.partition(distances, k - 1)[k - 1])
+            closest = closest[np.lexsort((ids[closest], distances[closest]))[:k]]
+        else:
+            closest = np.lexsort((ids, distances))
+
+        return ids[closest].tolist()
+
+    def within_radius(self, coords: Position, radius: float, candidates: Iterable[int] = None) -> List[int]:
+        rows = self._select(candidates)
+        return self.ids[rows[self._distances(coords, rows) <= radius * radius]].tolist()
+
+    def within_bounds(self, bounds: Tuple[Position, Position], candidates: Iterable[int] = None) -> List[int]:
+        (min_x, min_y), (max_x, max_y) = bounds
+        rows = self._select(candidates)
+        x, y = self.x[rows], self.y[rows]
+        return self.ids[rows[(min_x <= x) & (x <= max_x) & (min_y <= y) & (y <= max_y)]].tolist()
+
+    def closest_distance(self, coords: Position, candidates: Iterable[int] = None) -> float:
+        """Distance from ``coords`` to the closest entity, e.g. to the closest enemy."""
+        rows = self._select(candidates)
+        if not len(rows):
+            return math.inf
+
+        return math.sqrt(self._distances(coords, rows).min())
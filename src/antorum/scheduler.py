@@ -0,0 +1,250 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, List, Set, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from antorum.actions import Action
+
+
+class ScheduledAction:
+    """An action queued on an ``ActionScheduler``, await it for the action's result or exception.
+
+    Awaiting it doesn't cancel the action if the awaiting task is cancelled, use ``cancel`` for that.
+    """
+
+    def __init__(self, action: "Action", args: tuple, kwargs: dict, priority: int):
+        self.action = action
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.future = asyncio.get_running_loop().create_future()
+        self.task: asyncio.Task | None = None
+        self.preemptions = 0  # Times it was stopped for a more important action and queued again
+
+        self.queued_at = time.monotonic()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._run_time = 0.0  # Of the runs that were pre-empted
+
+        self._dependents: List["ScheduledAction"] = []
+        self._preempted = False
+
+    def __await__(self):
+        return asyncio.shield(self.future).__await__()
+
+    def __repr__(self):
+        state = "done" if self.done else "running" if self.running else "queued"
+        return f"ScheduledAction({self.name}, priority={self.priority}, {state})"
+
+    @property
+    def name(self) -> str:
+        return self.action.__class__.__name__
+
+    @property
+    def moves(self) -> bool:
+        return self.action.moves
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.done
+
+    def result(self) -> Any:
+        """The action's result, raises its exception if it failed and ``CancelledError`` if it was cancelled."""
+        return self.future.result()
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds spent queued, including after being pre-empted."""
+        return (self.finished_at or time.monotonic()) - self.queued_at - self.run_time
+
+    @property
+    def run_time(self) -> float:
+        """Wall time spent running, over every run if it was pre-empted."""
+        if self.started_at is None:
+            return self._run_time
+
+        return self._run_time + (self.finished_at or time.monotonic()) - self.started_at
+
+    def cancel(self) -> bool:
+        if self.done:
+            return False
+
+        if self.task is not None:
+            self._preempted = False  # Don't queue it again if it's being pre-empted
+            self.task.cancel()  # The scheduler cancels the future once the task has stopped
+        else:
+            self._finish_cancelled()
+
+        return True
+
+    def _finish_cancelled(self):
+        self.finished_at = time.monotonic()
+        self.future.cancel()
+
+        for dependent in self._dependents:
+            dependent.cancel()
+
+
+class ActionScheduler:
+    """Runs a client's actions: the most important queued actions first, one action that moves the player at a time.
+
+    Actions that don't move the player run alongside everything else. A queued moving action with a higher priority
+    than the running one pre-empts it: the running one is cancelled and queued again to start over once it's its turn.
+    Nothing polls, actions are started as soon as the one they wait for finishes.
+    """
+
+    def __init__(self, history: int = 100):
+        self.history: deque[ScheduledAction] = deque(maxlen=history)  # Finished actions, most recent last
+
+        self._queue: List[Tuple[int, int, ScheduledAction]] = []  # Heap of (-priority, order queued, action)
+        self._order = itertools.count()
+        self._running: Set[ScheduledAction] = set()
+        self._mover: ScheduledAction | None = None  # The running action that moves the player
+
+        self._idle_time = 0.0
+        self._idle_since: float | None = time.monotonic()
+
+    def schedule(self, action: "Action", *args, priority: int = 0, after: ScheduledAction = None,
+                 **kwargs) -> ScheduledAction:
+        """Queues ``action._run(*args, **kwargs)``. With ``after`` it's only queued once that action succeeded and
+        is cancelled if that one fails or is cancelled."""
+        scheduled = ScheduledAction(action, args, kwargs, priority)
+
+        if after is None:
+            self._push(scheduled)
+            self._pump()
+        elif after.done:
+            self._continue(after, scheduled)
+        else:
+            after._dependents.append(scheduled)
+
+        return scheduled
+
+    @property
+    def queued(self) -> List[ScheduledAction]:
+        return [scheduled for _, _, scheduled in sorted(self._queue) if not scheduled.done]
+
+    @property
+    def running(self) -> List[ScheduledAction]:
+        return list(self._running)
+
+    @property
+    def idle_time(self) -> float:
+        """Seconds nothing was running since the scheduler was created."""
+        if self._idle_since is None:
+            return self._idle_time
+
+        return self._idle_time + time.monotonic() - self._idle_since
+
+    def cancel_all(self):
+        for _, _, scheduled in self._queue:
+            scheduled.cancel()
+        self._queue.clear()
+
+        for scheduled in list(self._running):
+            scheduled.cancel()
+
+    def _push(self, scheduled: ScheduledAction):
+        heapq.heappush(self._queue, (-scheduled.priority, next(self._order), scheduled))
+
+    def _continue(self, previous: ScheduledAction, scheduled: ScheduledAction):
+        if scheduled.done:  # Cancelled while it was waiting
+            return
+
+        if previous.future.cancelled() or previous.future.exception() is not None:
+            scheduled._finish_cancelled()
+        else:
+            self._push(scheduled)
+            self._pump()
+
+    def _pump(self):
+        blocked = []
+
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            scheduled = entry[2]
+
+            if scheduled.done:
+                continue
+
+            if scheduled.moves and self._mover is not None:
+                if scheduled.priority <= self._mover.priority:
+                    blocked.append(entry)
+                    continue
+
+                self._preempt(self._mover)
+
+            self._start(scheduled)
+
+        for entry in blocked:
+            heapq.heappush(self._queue, entry)
+
+    def _preempt(self, scheduled: ScheduledAction):
+        self._release(scheduled)
+
+        if scheduled.task.cancel():  # Otherwise it already finished and its result is handled as usual
+            logging.info(f"Pre-empting action {scheduled.name}")
+            scheduled._preempted = True
+
+    def _start(self, scheduled: ScheduledAction):
+        if self._idle_since is not None:
+            self._idle_time += time.monotonic() - self._idle_since
+            self._idle_since = None
+
+        if scheduled.moves:
+            self._mover = scheduled
+
+        logging.debug(f"Starting action {scheduled.name}")
+        scheduled.started_at = time.monotonic()
+        scheduled.task = asyncio.create_task(scheduled.action._run(*scheduled.args, **scheduled.kwargs))
+        scheduled.task.add_done_callback(lambda task: self._finished(scheduled, task))
+        self._running.add(scheduled)
+
+    def _release(self, scheduled: ScheduledAction):
+        self._running.discard(scheduled)
+        if self._mover is scheduled:
+            self._mover = None
+
+        if not self._running and self._idle_since is None:
+            self._idle_since = time.monotonic()
+
+    def _finished(self, scheduled: ScheduledAction, task: asyncio.Task):
+        preempted, scheduled._preempted = scheduled._preempted, False
+        if preempted and task.cancelled():  # Already released, start it over later
+            scheduled.preemptions += 1
+            scheduled._run_time += time.monotonic() - scheduled.started_at
+            scheduled.started_at = None
+            scheduled.task = None
+            self._push(scheduled)
+            self._pump()
+            return
+
+        self._release(scheduled)
+        scheduled.finished_at = time.monotonic()
+        self.history.append(scheduled)
+
+        if task.cancelled():
+            logging.info(f"Action {scheduled.name} was cancelled after {scheduled.run_time:.2f}s")
+            scheduled.future.cancel()
+        elif task.exception() is not None:
+            logging.error(f"Action {scheduled.name} failed after {scheduled.run_time:.2f}s",
+                          exc_info=task.exception())
+            scheduled.future.set_exception(task.exception())
+            scheduled.future.exception()  # Already logged, so asyncio doesn't log it again if nobody awaits it
+        else:
+            logging.debug(f"Action {scheduled.name} finished in {scheduled.run_time:.2f}s, "
+                          f"waited {scheduled.wait_time:.2f}s")
+            scheduled.future.set_result(task.result())
+
+        for dependent in scheduled._dependents:
+            self._continue(scheduled, dependent)
+
+        self._pump()
@@ -0,0 +1,518 @@
+"""Declarative wire layouts for packets.
+
+A :class:`Schema` lists the fields of a packet in wire order. When it is created (so at import time of the packet
+module) it generates plain Python decode/encode functions for exactly that layout. Runs of fixed-width fields are fused
+into one precompiled :class:`struct.Struct` so they cost a single ``unpack_from``/``pack`` call.
+
+.. code-block:: python
+
+    class Response(NetworkPacket):
+        schema = Schema(network_id=INT64, moves=Array(Tuple(FLOAT, FLOAT)))
+"""
+import functools
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Tuple as TypingTuple
+
+from antorum.utils import STRUCT_PREFIX, UINT64, BufferReader, BufferWriter
+
+
+@functools.lru_cache(maxsize=None)
+def repeated(codes: str, count: int) -> struct.Struct:
+    """Precompiled layout for ``count`` back-to-back items made of the struct type ``codes``."""
+    return struct.Struct(STRUCT_PREFIX + codes * count)
+
+
+class EnumLookup(dict):
+    """Wire value to enum member table, combined flag values are built once and then cached."""
+
+    def __init__(self, enum_cls):
+        super().__init__((member.value, member) for member in enum_cls)
+        self.enum_cls = enum_cls
+
+    def __missing__(self, value):
+        member = self[value] = self.enum_cls(value)  # Raises ValueError for unknown values, like enum_cls(value)
+        return member
+
+
+def _name(function: Callable) -> str:
+    return getattr(function, "__qualname__", repr(function))
+
+
+class _Namespace:
+    """Globals and unique local names for one generated function."""
+
+    def __init__(self):
+        self.globals: Dict[str, Any] = {"repeated": repeated, "UINT64": UINT64}
+        self._counter = 0
+
+    def var(self, prefix: str = "v") -> str:
+        self._counter += 1
+        return f"_{prefix}{self._counter}"
+
+    def add(self, value, prefix: str = "g") -> str:
+        name = self.var(prefix)
+        self.globals[name] = value
+        return name
+
+
+class Field(ABC):
+    # Struct type codes of the field if it always has the same width, one code per raw value
+    codes: str | None = None
+
+    @property
+    def fixed(self) -> bool:
+        return self.codes is not None
+
+    @abstractmethod
+    def decode_lines(self, target: str, ns: _Namespace) -> List[str]:
+        """Statements decoding the field from ``data`` at ``offset`` into ``target``."""
+
+    @abstractmethod
+    def encode_lines(self, expr: str, ns: _Namespace) -> List[str]:
+        """Statements appending the field to the bytearray ``out``, raises ``TypeError`` if it can't be encoded."""
+
+    def skip_lines(self, ns: _Namespace) -> List[str]:
+        """Statements moving ``offset`` past a variable-width field without building its value."""
+        return self.decode_lines(ns.var("skipped"), ns)
+
+    @property
+    def is_identity(self) -> bool:
+        """Whether the raw value is the decoded value, which lets arrays skip building items one by one."""
+        return False
+
+
+class FixedField(Field):
+    """A field that always has the same width, decoded and encoded as part of a fused run of fixed-width fields.
+
+    Fields that are only fixed width when their parts are (``Tuple``, ``Converted``) implement ``build`` and
+    ``flatten`` on top of the ``Field`` methods instead.
+    """
+
+    codes: str
+
+    @abstractmethod
+    def build(self, raw: List[str], ns: _Namespace) -> str:
+        """Expression turning the raw unpacked values of the field into its value."""
+
+    @abstractmethod
+    def flatten(self, expr: str, ns: _Namespace) -> List[str]:
+        """Expressions for the raw values to pack for the field."""
+
+    def decode_lines(self, target, ns):
+        return _decode_sequence([(target, self)], ns)
+
+    def encode_lines(self, expr, ns):
+        return _encode_sequence([(expr, self)], ns)
+
+
+class Primitive(FixedField):
+    def __init__(self, code: str):
+        self.codes = code
+
+    def build(self, raw, ns):
+        return raw[0]
+
+    def flatten(self, expr, ns):
+        return [expr]
+
+    @property
+    def is_identity(self):
+        return True
+
+
+INT8 = Primitive("B")
+INT16 = Primitive("H")
+INT32 = Primitive("I")
+INT64 = Primitive("Q")
+FLOAT = Primitive("f")
+BOOL = Primitive("?")
+
+
+class _Blob(Field):
+    def __init__(self, text: bool):
+        self.text = text
+
+    def decode_lines(self, target, ns):
+        size = ns.var("n")
+        value = f'str(data[offset:offset + {size}], "utf-8")' if self.text else f"bytes(data[offset:offset + {size}])"
+
+        return [f"{size}, = UINT64.unpack_from(data, offset)",
+                "offset += 8",
+                f"{target} = {value}",
+                f"offset += {size}"]
+
+    def encode_lines(self, expr, ns):
+        value = ns.var("b")
+
+        return [f'{value} = {expr}.encode("utf-8")' if self.text else f"{value} = {expr}",
+                f"out += UINT64.pack(len({value}))",
+                f"out += {value}"]
+
+    def skip_lines(self, ns):
+        size = ns.var("n")
+        return [f"{size}, = UINT64.unpack_from(data, offset)", f"offset += 8 + {size}"]
+
+
+STRING = _Blob(text=True)
+BYTES = _Blob(text=False)
+
+
+class Enum(FixedField):
+    def __init__(self, enum_cls, base: Primitive = INT8):
+        self.enum_cls = enum_cls
+        self.codes = base.codes
+
+    def build(self, raw, ns):
+        return f"{ns.add(EnumLookup(self.enum_cls), 'enum')}[{raw[0]}]"
+
+    def flatten(self, expr, ns):
+        return [f"{expr}.value"]
+
+
+class Tuple(Field):
+    """Consecutive fields decoded into a tuple."""
+
+    def __init__(self, *fields: Field):
+        self.fields = fields
+
+        if all(field.fixed for field in fields):
+            self.codes = "".join(field.codes for field in fields)
+
+    def _compose(self, parts: List[str], ns: _Namespace) -> str:
+        return f"({', '.join(parts)},)"
+
+    def _item(self, expr: str, index: int) -> str:
+        return f"{expr}[{index}]"
+
+    def build(self, raw, ns):
+        parts = []
+        for field in self.fields:
+            parts.append(field.build(raw[:len(field.codes)], ns))
+            raw = raw[len(field.codes):]
+
+        return self._compose(parts, ns)
+
+    def flatten(self, expr, ns):
+        return [value for index, field in enumerate(self.fields)
+                for value in field.flatten(self._item(expr, index), ns)]
+
+    def decode_lines(self, target, ns):
+        parts = [ns.var() for _ in self.fields]
+        return _decode_sequence(list(zip(parts, self.fields)), ns) + [f"{target} = {self._compose(parts, ns)}"]
+
+    def encode_lines(self, expr, ns):
+        return _encode_sequence([(self._item(expr, index), field) for index, field in enumerate(self.fields)], ns)
+
+    def skip_lines(self, ns):
+        return _skip_sequence(self.fields, ns)
+
+
+class Struct(Tuple):
+    """Consecutive fields passed positionally to ``cls``, usually a dataclass."""
+
+    def __init__(self, cls, **fields: Field):
+        super().__init__(*fields.values())
+        self.cls = cls
+        self.names = list(fields)
+
+    def _compose(self, parts, ns):
+        return f"{ns.add(self.cls, 'cls')}({', '.join(parts)})"
+
+    def _item(self, expr, index):
+        return f"{expr}.{self.names[index]}"
+
+
+class Array(Field):
+    """An int64 count followed by that many items."""
+
+    def __init__(self, item: Field, count: Primitive = INT64):
+        self.item = item
+        self.count = count
+
+    def _read_count(self, ns: _Namespace) -> TypingTuple[str, List[str]]:
+        count = ns.var("n")
+        layout = struct.Struct(STRUCT_PREFIX + self.count.codes)
+        return count, [f"{count}, = {ns.add(layout, 's')}.unpack_from(data, offset)", f"offset += {layout.size}"]
+
+    def _items(self, count: str, ns: _Namespace) -> TypingTuple[str, List[str]]:
+        """Statements decoding ``count`` items, and a comprehension producing them (or a plain sequence of them)."""
+        if not self.item.fixed:
+            decode_item = ns.add(value_decoder(self.item), "item")
+            return f"[{decode_item}(reader) for _ in range({count})]", ["reader.pointer = offset"]
+
+        width = len(self.item.codes)
+        raw = ns.var("raw")
+        lines = [f"{raw} = repeated({self.item.codes!r}, {count}).unpack_from(data, offset)",
+                 f"offset += {struct.calcsize(STRUCT_PREFIX + self.item.codes)} * {count}"]
+
+        if width == 1 and self.item.is_identity:
+            return raw, lines
+
+        names = [ns.var() for _ in range(width)]
+
+        if width == 1:
+            return f"[{self.item.build(names, ns)} for {names[0]} in {raw}]", lines
+
+        iterator = ns.var("it")
+        lines.append(f"{iterator} = iter({raw})")
+        return f"[{self.item.build(names, ns)} for {', '.join(names)} in zip({', '.join([iterator] * width)})]", lines
+
+    def _collect(self, items: str) -> str:
+        return items if items.startswith("[") else f"list({items})"
+
+    def decode_lines(self, target, ns):
+        count, lines = self._read_count(ns)
+        items, item_lines = self._items(count, ns)
+        lines += item_lines
+        lines.append(f"{target} = {self._collect(items)}")
+
+        if not self.item.fixed:
+            lines.append("offset = reader.pointer")
+
+        return lines
+
+    def skip_lines(self, ns):
+        count, lines = self._read_count(ns)
+
+        if self.item.fixed:
+            return lines + [f"offset += {struct.calcsize(STRUCT_PREFIX + self.item.codes)} * {count}"]
+
+        return lines + [f"for _ in range({count}):"] + [f"    {line}" for line in _skip_sequence([self.item], ns)]
+
+    def _each(self, expr: str) -> str:
+        return expr
+
+    def encode_lines(self, expr, ns):
+        item = ns.var("item")
+        layout = ns.add(struct.Struct(STRUCT_PREFIX + self.count.codes), "s")
+        body = _encode_sequence([(item, self.item)], ns)
+
+        return [f"out += {layout}.pack(len({expr}))",
+                f"for {item} in {self._each(expr)}:"] + [f"    {line}" for line in body]
+
+
+class Map(Array):
+    """An int64 count followed by that many key/value pairs, decoded into a dict."""
+
+    def __init__(self, key: Field, value: Field, count: Primitive = INT64):
+        super().__init__(Tuple(key, value), count)
+
+    def _collect(self, items):
+        return f"dict({items})"
+
+    def _each(self, expr):
+        return f"{expr}.items()"
+
+
+class Converted(Field):
+    """Decodes ``field`` and passes the result through ``convert``, for values the wire format can't express.
+
+    ``revert`` turns a value back into what ``field`` encodes, without it the field can only be decoded.
+    """
+
+    def __init__(self, field: Field, convert: Callable[[Any], Any], revert: Callable[[Any], Any] = None):
+        self.field = field
+        self.convert = convert
+        self.revert = revert
+        self.codes = field.codes
+
+    def build(self, raw, ns):
+        return f"{ns.add(self.convert, 'convert')}({self.field.build(raw, ns)})"
+
+    def decode_lines(self, target, ns):
+        value = ns.var()
+        return self.field.decode_lines(value, ns) + [f"{target} = {ns.add(self.convert, 'convert')}({value})"]
+
+    def _reverted(self, expr: str, ns: _Namespace) -> str:
+        if self.revert is None:
+            raise TypeError(f"Converted field {_name(self.convert)} has no revert function to encode with")
+
+        return f"{ns.add(self.revert, 'revert')}({expr})"
+
+    def flatten(self, expr, ns):
+        return self.field.flatten(self._reverted(expr, ns), ns)
+
+    def encode_lines(self, expr, ns):
+        return self.field.encode_lines(self._reverted(expr, ns), ns)
+
+    def skip_lines(self, ns):
+        return self.field.skip_lines(ns)
+
+
+class Custom(Field):
+    """Hands the reader to ``decode`` (e.g. a class taking a ``BufferReader``) for layouts a schema can't describe."""
+
+    def __init__(self, decode: Callable[[BufferReader], Any], encode: Callable[[Any, BufferWriter], None] = None):
+        self.decode = decode
+        self.encode = encode
+
+    def decode_lines(self, target, ns):
+        return ["reader.pointer = offset",
+                f"{target} = {ns.add(self.decode, 'decode')}(reader)",
+                "offset = reader.pointer"]
+
+    def encode_lines(self, expr, ns):
+        if self.encode is None:
+            raise TypeError(f"Custom field {_name(self.decode)} has no encode function")
+
+        return [f"{ns.add(self.encode, 'encode')}({expr}, writer)"]
+
+
+def _decode_sequence(fields: List[TypingTuple[str, Field]], ns: _Namespace) -> List[str]:
+    """Decodes fields into the given targets, every run of fixed-width fields is read with one unpack_from."""
+    lines = []
+    run: List[TypingTuple[str, Field]] = []
+
+    def flush():
+        if not run:
+            return
+
+        codes = "".join(field.codes for _, field in run)
+        layout = struct.Struct(STRUCT_PREFIX + codes)
+        raw = [ns.var() for _ in codes]
+
+        if raw:  # Fields without any values, like an empty Struct, only need to be built
+            lines.append(f"{', '.join(raw)}, = {ns.add(layout, 's')}.unpack_from(data, offset)")
+            lines.append(f"offset += {layout.size}")
+
+        for target, field in run:
+            lines.append(f"{target} = {field.build(raw[:len(field.codes)], ns)}")
+            del raw[:len(field.codes)]
+
+        run.clear()
+
+    for target, field in fields:
+        if field.fixed:
+            run.append((target, field))
+        else:
+            flush()
+            lines += field.decode_lines(target, ns)
+
+    flush()
+    return lines
+
+
+def _encode_sequence(fields: List[TypingTuple[str, Field]], ns: _Namespace) -> List[str]:
+    """Appends fields to ``out``, every run of fixed-width fields is packed with one call."""
+    lines = []
+    run: List[TypingTuple[str, Field]] = []
+
+    def flush():
+        if not run:
+            return
+
+        layout = ns.add(struct.Struct(STRUCT_PREFIX + "".join(field.codes for _, field in run)), "s")
+        values = [value for expr, field in run for value in field.flatten(expr, ns)]
+        lines.append(f"out += {layout}.pack({', '.join(values)})")
+        run.clear()
+
+    for expr, field in fields:
+        if field.fixed:
+            run.append((expr, field))
+        else:
+            flush()
+            lines += field.encode_lines(expr, ns)
+
+    flush()
+    return lines
+
+
+def _skip_sequence(fields: List[Field], ns: _Namespace) -> List[str]:
+    """Moves ``offset`` past the fields, every run of fixed-width fields is a single addition."""
+    lines = []
+    size = 0
+
+    for field in fields:
+        if field.fixed:
+            size += struct.calcsize(STRUCT_PREFIX + field.codes)
+            continue
+
+        if size:
+            lines.append(f"offset += {size}")
+            size = 0
+
+        lines += field.skip_lines(ns)
+
+    if size:
+        lines.append(f"offset += {size}")
+
+    return lines
+
+
+def _compile(name: str, signature: str, prologue: List[str], body: List[str], epilogue: List[str],
+             ns: _Namespace) -> Callable:
+    source = "\n".join([f"def {name}({signature}):"] + [f"    {line}" for line in prologue + body + epilogue])
+    exec(compile(source, f"<schema {name}>", "exec"), ns.globals)
+
+    function = ns.globals[name]
+    function.__source__ = source  # Handy when debugging a layout
+    return function
+
+
+def value_decoder(field: Field) -> Callable[[BufferReader], Any]:
+    """Function reading a single ``field`` from a reader, used for array items that aren't fixed width."""
+    if isinstance(field, Custom):
+        return field.decode
+
+    ns = _Namespace()
+    return _compile("decode_value", "reader", ["data = reader.data", "offset = reader.pointer"],
+                    _decode_sequence([("value", field)], ns), ["reader.pointer = offset", "return value"], ns)
+
+
+def value_skipper(field: Field) -> Callable[[BufferReader], None]:
+    """Function moving a reader past a single ``field`` without decoding it, for values that are decoded lazily."""
+    ns = _Namespace()
+    return _compile("skip_value", "reader", ["data = reader.data", "offset = reader.pointer"],
+                    _skip_sequence([field], ns), ["reader.pointer = offset"], ns)
+
+
+def _cannot_encode(name: str, reason: str) -> Callable[[Any, BufferWriter], None]:
+    def encode(obj, writer: BufferWriter):
+        raise TypeError(f"{obj.__class__.__name__} can only be decoded, field {name!r} can't be encoded: {reason}")
+
+    return encode
+
+
+class Schema:
+    """Ordered ``name=field`` layout of a packet, compiled into specialised functions on creation.
+
+    * ``decode_into(obj, reader)`` sets every field as an attribute of ``obj``
+    * ``decode(reader)`` returns the field values as a tuple
+    * ``encode(obj, writer)`` writes the attributes of ``obj``
+    """
+
+    def __init__(self, **fields: Field):
+        self.fields = fields
+        self.size = struct.calcsize(STRUCT_PREFIX + "".join(field.codes for field in fields.values())) \
+            if all(field.fixed for field in fields.values()) else None
+
+        self.decode_into = self._compile_decode_into()
+        self.decode = self._compile_decode()
+        self.encode = self._compile_encode()
+
+    def _compile_decode_into(self):
+        ns = _Namespace()
+        body = _decode_sequence([(f"obj.{name}", field) for name, field in self.fields.items()], ns)
+        return _compile("decode_into", "obj, reader", ["data = reader.data", "offset = reader.pointer"], body,
+                        ["reader.pointer = offset"], ns)
+
+    def _compile_decode(self):
+        ns = _Namespace()
+        values = [ns.var() for _ in self.fields]
+        body = _decode_sequence(list(zip(values, self.fields.values())), ns)
+        result = f"({', '.join(values)},)" if values else "()"
+        return _compile("decode", "reader", ["data = reader.data", "offset = reader.pointer"], body,
+                        ["reader.pointer = offset", f"return {result}"], ns)
+
+    def _compile_encode(self):
+        for name, field in self.fields.items():
+            try:
+                _encode_sequence([(f"obj.{name}", field)], _Namespace())
+            except TypeError as e:  # Decode-only field, fine for packets that are only ever received
+                return _cannot_encode(name, str(e))
+
+        ns = _Namespace()
+        body = _encode_sequence([(f"obj.{name}", field) for name, field in self.fields.items()], ns)
+
+        return _compile("encode", "obj, writer", ["out = writer.data"], body or ["pass"], [], ns)
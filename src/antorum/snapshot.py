@@ -0,0 +1,30 @@
+from types import MappingProxyType
+from typing import Mapping, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from antorum.packets.world_entities import Entity
+
+
+class WorldSnapshot:
+    """Read-only view of every entity at one version of the game, see ``Game.snapshot``.
+
+    Packets received after the snapshot was taken don't change it, so it can be read across ``await`` without seeing
+    a half-updated world. Entities in it are frozen copies that share their states with the live entities.
+    """
+
+    __slots__ = ("version", "entities", "network_id")
+
+    def __init__(self, version: int, entities: Mapping[int, "Entity"], network_id: int):
+        self.version = version
+        self.entities: Mapping[int, "Entity"] = MappingProxyType(entities)
+        self.network_id = network_id  # Network id of the local player
+
+    @property
+    def local_entity(self) -> "Entity | None":
+        return self.entities.get(self.network_id)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __repr__(self):
+        return f"WorldSnapshot({self.version}, {len(self.entities)} entities)"
@@ -0,0 +1,237 @@
+import heapq
+import math
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from antorum.packets.world_entities import Entity
+
+Cell = Tuple[int, int]
+Position = Tuple[float, float]
+
+
+class SpatialGrid:
+    """Uniform grid over entity positions for nearest, within-radius and within-bounds queries.
+
+    Entities are bucketed in square cells of ``cell_size`` by their position when they're inserted, call ``insert``
+    again whenever the transform or movement of an entity changes. Entities that follow a path are moved to where
+    they are right now before every query, until they arrive. Queries only look at the cells that can contain a match,
+    so their cost depends on how crowded the area is instead of on the total amount of entities.
+    """
+
+    def __init__(self, cell_size: float = 16):
+        self.cell_size = cell_size
+        self._cells: Dict[Cell, Dict[int, "Entity"]] = {}
+        self._positions: Dict[int, Tuple[Position, Cell]] = {}
+        self._moving: Dict[int, "Entity"] = {}  # Entities following a path, by network id
+
+        # Cell range that has ever been occupied, used to stop searches that would only find empty cells
+        self._min_cell = (0, 0)
+        self._max_cell = (-1, -1)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, network_id: int):
+        return network_id in self._positions
+
+    def _cell(self, position: Position) -> Cell:
+        return math.floor(position[0] / self.cell_size), math.floor(position[1] / self.cell_size)
+
+    def position_of(self, network_id: int) -> Position | None:
+        self._follow_moving()
+        indexed = self._positions.get(network_id)
+        return indexed[0] if indexed else None
+
+    def insert(self, entity: "Entity"):
+        """Adds an entity, or moves it to its current position if it is already indexed."""
+        path = entity.path
+        if path is not None and not path.finished():
+            self._moving[entity.network_id] = entity
+        else:
+            self._moving.pop(entity.network_id, None)
+
+        self._place(entity.network_id, entity, entity.position)
+
+    def _place(self, network_id: int, entity: "Entity", position: Position):
+        cell = self._cell(position)
+        indexed = self._positions.get(network_id)
+        if indexed and indexed[1] != cell:
+            self._discard(network_id, indexed[1])
+
+        self._positions[network_id] = (position, cell)
+        self._cells.setdefault(cell, {})[network_id] = entity
+
+        if self._min_cell > self._max_cell:
+            self._min_cell = self._max_cell = cell
+        else:
+            self._min_cell = (min(self._min_cell[0], cell[0]), min(self._min_cell[1], cell[1]))
+            self._max_cell = (max(self._max_cell[0], cell[0]), max(self._max_cell[1], cell[1]))
+
+    def _follow_moving(self):
+        """Moves the entities following a path to where they are now, the ones that arrived aren't followed anymore."""
+        if not self._moving:
+            return
+
+        for network_id, entity in list(self._moving.items()):
+            path = entity.path
+            if path is None or path.finished():
+                del self._moving[network_id]
+
+            self._place(network_id, entity, entity.position)
+
+    def _discard(self, network_id: int, cell: Cell):
+        bucket = self._cells[cell]
+        del bucket[network_id]
+
+        if not bucket:
+            del self._cells[cell]
+
+    def remove(self, network_id: int):
+        self._moving.pop(network_id, None)
+        indexed = self._positions.pop(network_id, None)
+        if indexed:
+            self._discard(network_id, indexed[1])
+
+    def clear(self):
+        self._cells.clear()
+        self._positions.clear()
+        self._moving.clear()
+        self._min_cell = (0, 0)
+        self._max_cell = (-1, -1)
+
+    def rebuild(self, entities: Iterable["Entity"]):
+        self.clear()
+
+        for entity in entities:
+            self.insert(entity)
+
+    def _cells_in(self, low: Cell, high: Cell) -> Iterator[Tuple[Cell, Dict[int, "Entity"]]]:
+        low = (max(low[0], self._min_cell[0]), max(low[1], self._min_cell[1]))
+        high = (min(high[0], self._max_cell[0]), min(high[1], self._max_cell[1]))
+
+        if low[0] > high[0] or low[1] > high[1]:
+            return
+
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > len(self._cells):  # Fewer occupied cells than in range
+            for cell, bucket in list(self._cells.items()):
+                if low[0] <= cell[0] <= high[0] and low[1] <= cell[1] <= high[1]:
+                    yield cell, bucket
+            return
+
+        cells = self._cells
+        for x in range(low[0], high[0] + 1):
+            for y in range(low[1], high[1] + 1):
+                bucket = cells.get((x, y))
+                if bucket:
+                    yield (x, y), bucket
+
+    def within_bounds(self, bounds: Tuple[Position, Position],
+                      predicate: Callable[["Entity"], bool] = None) -> List["Entity"]:
+        """Entities inside the ``((min_x, min_y), (max_x, max_y))`` rectangle, edges included."""
+        (min_x, min_y), (max_x, max_y) = bounds
+        self._follow_moving()
+        positions = self._positions
+        found = []
+
+        for _, bucket in self._cells_in(self._cell((min_x, min_y)), self._cell((max_x, max_y))):
+            for network_id, entity in bucket.items():
+                x, y = positions[network_id][0]
+                if min_x <= x <= max_x and min_y <= y <= max_y and (predicate is None or predicate(entity)):
+                    found.append(entity)
+
+        return found
+
+    def within_radius(self, coords: Position, radius: float,
+                      predicate: Callable[["Entity"], bool] = None) -> List["Entity"]:
+        """Entities at most ``radius`` away from ``coords``, in no particular order."""
+        self._follow_moving()
+        x, y = coords
+        radius_squared = radius * radius
+        positions = self._positions
+        found = []
+
+        for _, bucket in self._cells_in(self._cell((x - radius, y - radius)), self._cell((x + radius, y + radius))):
+            for network_id, entity in bucket.items():
+                ex, ey = positions[network_id][0]
+                if (ex - x) ** 2 + (ey - y) ** 2 <= radius_squared and (predicate is None or predicate(entity)):
+                    found.append(entity)
+
+        return found
+
+    def any_within_radius(self, coords: Position, radius: float, predicate: Callable[["Entity"], bool] = None) -> bool:
+        self._follow_moving()
+        x, y = coords
+        radius_squared = radius * radius
+        positions = self._positions
+
+        for _, bucket in self._cells_in(self._cell((x - radius, y - radius)), self._cell((x + radius, y + radius))):
+            for network_id, entity in bucket.items():
+                ex, ey = positions[network_id][0]
+                if (ex - x) ** 2 + (ey - y) ** 2 <= radius_squared and (predicate is None or predicate(entity)):
+                    return True
+
+        return False
+
+    def _ring(self, center: Cell, ring: int) -> Iterator[Cell]:
+        cx, cy = center
+        if ring == 0:
+            yield center
+            return
+
+        for x in range(cx - ring, cx + ring + 1):
+            yield x, cy - ring
+            yield x, cy + ring
+
+        for y in range(cy - ring + 1, cy + ring):
+            yield cx - ring, y
+            yield cx + ring, y
+
+    def nearest(self, coords: Position, k: int = 1, predicate: Callable[["Entity"], bool] = None,
+                max_distance: float = math.inf) -> List["Entity"]:
+        """Up to ``k`` entities closest to ``coords`` (optionally matching ``predicate``), closest first."""
+        self._follow_moving()
+        if not self._positions or k <= 0:
+            return []
+
+        x, y = coords
+        center = self._cell(coords)
+        cells = self._cells
+        positions = self._positions
+        cell_size = self.cell_size
+        limit = max_distance * max_distance
+
+        # Rings past this one only contain cells that were never occupied
+        last_ring = max(abs(center[0] - self._min_cell[0]), abs(center[0] - self._max_cell[0]),
+                        abs(center[1] - self._min_cell[1]), abs(center[1] - self._max_cell[1]))
+
+        # Max-heap of the k closest so far, by negated distance and network id so ties are broken by network id
+        best: List[Tuple[float, int, "Entity"]] = []
+        for ring in range(last_ring + 1):
+            # Nothing in this ring or any ring after it can be closer than this
+            closest_possible = max(ring - 1, 0) * cell_size
+            closest_possible *= closest_possible
+
+            if closest_possible > limit or (len(best) == k and closest_possible > -best[0][0]):
+                break
+
+            for cell in self._ring(center, ring):
+                bucket = cells.get(cell)
+                if not bucket:
+                    continue
+
+                for network_id, entity in bucket.items():
+                    ex, ey = positions[network_id][0]
+                    distance = (ex - x) ** 2 + (ey - y) ** 2
+
+                    if distance > limit or (len(best) == k and (distance, network_id) >= (-best[0][0], -best[0][1])):
+                        continue
+
+                    if predicate is not None and not predicate(entity):
+                        continue
+
+                    if len(best) == k:
+                        heapq.heapreplace(best, (-distance, -network_id, entity))
+                    else:
+                        heapq.heappush(best, (-distance, -network_id, entity))
+
+        return [entity for _, _, entity in sorted(best, key=lambda item: (-item[0], -item[1]))]
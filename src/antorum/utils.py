@@ -1,22 +1,38 @@
 import asyncio
 import base64
-import datetime
 import enum
-import logging
+import functools
 from typing import Literal, List, TYPE_CHECKING, Dict, Tuple, Union
 import struct
 
 if TYPE_CHECKING:
     from antorum import multiplayer
+    from antorum.game import Game
     from antorum.packets.inventory import InventoryItem
     from antorum.packets.inventory_add import ItemResource
     from antorum.packets.world_entities import Entity
-    from antorum.packets.chat import ChatMessage
+    from antorum.catalogue import ResourceCatalogue
+    from antorum.chatlog import ChatLog
+    from antorum.inventory import Inventory
 
 from Cryptodome.PublicKey import RSA
 from Cryptodome.Cipher import PKCS1_v1_5
 
+from antorum.movement import Path
+
 BYTEORDER: Literal['little', 'big'] = "big"
+STRUCT_PREFIX = ">" if BYTEORDER == "big" else "<"
+
+UINT8 = struct.Struct(STRUCT_PREFIX + "B")
+INT8 = struct.Struct(STRUCT_PREFIX + "b")
+UINT16 = struct.Struct(STRUCT_PREFIX + "H")
+INT16 = struct.Struct(STRUCT_PREFIX + "h")
+UINT32 = struct.Struct(STRUCT_PREFIX + "I")
+INT32 = struct.Struct(STRUCT_PREFIX + "i")
+UINT64 = struct.Struct(STRUCT_PREFIX + "Q")
+INT64 = struct.Struct(STRUCT_PREFIX + "q")
+FLOAT = struct.Struct(STRUCT_PREFIX + "f")
+FRAME_HEADER = struct.Struct(STRUCT_PREFIX + "HB")  # [int16 size][int8 packet id]
 
 ENEMIES = ["Gremneer"]
 
@@ -38,6 +54,30 @@ class StateType(enum.Enum):
     ANIMATOR = 13
 
 
+class InteractionType(enum.Enum):
+    ATTACK = 0
+    COOK_ON = 1
+    TALK_TO = 2
+    WALK_TO = 3
+    EXAMINE = 4
+    PICK_UP = 5
+    BARTER = 6
+    FORAGE = 7
+    FISH = 8
+    ACCESS_VAULT = 9
+    CRAFT = 10
+    PERFORM_RITUAL = 11
+    MINE = 12
+    SMELT_AT = 13
+    OPEN = 14
+
+
+@functools.lru_cache(maxsize=None)
+def run_of(code: str, count: int) -> struct.Struct:
+    """Precompiled layout for ``count`` consecutive fields of the same struct type code."""
+    return struct.Struct(f"{STRUCT_PREFIX}{count}{code}")
+
+
 class EncryptionHelper:
     def __init__(self, key):
         self.key = RSA.import_key(key)
@@ -47,90 +87,150 @@ class EncryptionHelper:
 
 
 class BufferReader:
-    def __init__(self, data: bytes):
-        self.data = data
+    def __init__(self, data: bytes | memoryview):
+        self.data = memoryview(data)
         self.pointer = 0
 
     def read(self, size: int) -> bytes:
+        return bytes(self.read_view(size))
+
+    def read_view(self, size: int) -> memoryview:
+        """Like ``read`` but without copying, the view is only valid as long as the data it was read from."""
         data = self.data[self.pointer:self.pointer + size]
         self.pointer += size
         return data
 
+    def unpack(self, layout: struct.Struct) -> tuple:
+        values = layout.unpack_from(self.data, self.pointer)
+        self.pointer += layout.size
+        return values
+
+    def _read_int(self, layout: struct.Struct) -> int:
+        try:
+            value, = layout.unpack_from(self.data, self.pointer)
+        except struct.error:  # Ran past the end, decode whatever is left like int.from_bytes would
+            return int.from_bytes(self.read_view(layout.size), BYTEORDER, signed=layout.format[-1].islower())
+
+        self.pointer += layout.size
+        return value
+
     def read_bool(self) -> bool:
-        return bool(self.read_int8())
+        return bool(self._read_int(UINT8))
 
     def read_int8(self, signed: bool = False) -> int:
-        return int.from_bytes(self.read(1), BYTEORDER, signed=signed)
+        return self._read_int(INT8 if signed else UINT8)
 
     def read_int16(self, signed: bool = False) -> int:
-        return int.from_bytes(self.read(2), BYTEORDER, signed=signed)
+        return self._read_int(INT16 if signed else UINT16)
 
     def read_int32(self, signed: bool = False) -> int:
-        return int.from_bytes(self.read(4), BYTEORDER, signed=signed)
+        return self._read_int(INT32 if signed else UINT32)
 
     def read_int64(self, signed: bool = False) -> int:
-        return int.from_bytes(self.read(8), BYTEORDER, signed=signed)
+        return self._read_int(INT64 if signed else UINT64)
 
     def read_string(self) -> str:
         length = self.read_int64()
-        return self.read(length).decode("utf-8")
+        return str(self.read_view(length), "utf-8")
 
     def read_float(self) -> float:
-        return struct.unpack((">" if BYTEORDER == "big" else "<") + "f", self.read(4))[0]
+        return self.unpack(FLOAT)[0]
+
+    def read_floats(self, count: int) -> Tuple[float, ...]:
+        return self.unpack(run_of("f", count))
+
+    def read_int8s(self, count: int, signed: bool = False) -> Tuple[int, ...]:
+        return self.unpack(run_of("b" if signed else "B", count))
+
+    def read_int32s(self, count: int, signed: bool = False) -> Tuple[int, ...]:
+        return self.unpack(run_of("i" if signed else "I", count))
+
+    def read_int64s(self, count: int, signed: bool = False) -> Tuple[int, ...]:
+        return self.unpack(run_of("q" if signed else "Q", count))
 
 
 class BufferWriter:
     def __init__(self):
-        self.data = b""
+        self.data = bytearray()
 
     def __bytes__(self):
-        return self.data
+        return bytes(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def getbuffer(self) -> memoryview:
+        """Zero-copy view of everything written so far, release it before writing anything else."""
+        return memoryview(self.data)
+
+    def reserve(self, size: int) -> int:
+        """Claims the next ``size`` bytes in one go and returns their offset, to be filled in with ``pack_into``."""
+        offset = len(self.data)
+        self.data += bytes(size)
+
+        return offset
 
-    def write(self, data: bytes):
+    def pack_into(self, layout: struct.Struct, offset: int, *values):
+        layout.pack_into(self.data, offset, *values)
+
+    def pack(self, layout: struct.Struct, *values):
+        self.data += layout.pack(*values)
+
+    def write(self, data: bytes | bytearray | memoryview):
         self.data += data
 
     def write_int8(self, value: int):
-        self.write(value.to_bytes(1, BYTEORDER))
+        self.data += UINT8.pack(value)
 
     def write_int16(self, value: int):
-        self.write(value.to_bytes(2, BYTEORDER))
+        self.data += UINT16.pack(value)
 
     def write_int32(self, value: int):
-        self.write(value.to_bytes(4, BYTEORDER))
+        self.data += UINT32.pack(value)
 
     def write_int64(self, value: int):
-        self.write(value.to_bytes(8, BYTEORDER))
+        self.data += UINT64.pack(value)
 
     def write_float(self, value: float):
-        self.write(struct.pack((">" if BYTEORDER == "big" else "<") + "f", value))
+        self.data += FLOAT.pack(value)
 
     def write_string(self, value: str):
-        self.write_int64(len(value))
-        self.write(value.encode("utf-8"))
+        self.write_bytes(value.encode("utf-8"))  # The length prefix counts encoded bytes, not characters
 
     def write_bytes(self, value: bytes):
-        self.write_int64(len(value))
-        self.write(value)
+        self.data += UINT64.pack(len(value))
+        self.data += value
+
+    def begin_frame(self, packet_id: int) -> int:
+        """Writes a ``[int16 size][int8 id]`` header in place, the payload is written right after it."""
+        offset = len(self.data)
+        self.data += FRAME_HEADER.pack(0, packet_id)
+
+        return offset
+
+    def end_frame(self, offset: int):
+        """Fills in the size of the frame started at ``offset`` now that its payload is written."""
+        UINT16.pack_into(self.data, offset, len(self.data) - offset - FRAME_HEADER.size)
 
 
-def get_entity_from_player_id(player_id: int, entities: List["world_entities.Entity"]):
-    for entity in entities:
-        if entity.states.get(StateType.PLAYER) and entity.states[StateType.PLAYER].state.player_id == player_id:
+def get_entity_from_player_id(player_id: int, entities: Union["Game", List["world_entities.Entity"]]):
+    if hasattr(entities, "entity_by_player_id"):  # A game keeps a map of its players
+        return entities.entity_by_player_id(player_id)
+
+    for entity in entities:  # Entities that aren't part of a game yet
+        if entity.states.get(StateType.PLAYER) and entity.states[StateType.PLAYER].player_id == player_id:
             return entity
     return None
 
 
 def get_future_position_from_entity(network_id, game: "multiplayer.Game"):
-    return game.entities[network_id].states[StateType.MOVEMENT].state.destinations[-1] \
-        if game.entities[network_id].states[StateType.MOVEMENT].state.destinations \
+    return game.entities[network_id].states[StateType.MOVEMENT].destinations[-1] \
+        if game.entities[network_id].states[StateType.MOVEMENT].destinations \
         else game.entities[network_id].position
 
 
 def get_player_id_from_username(username: str, game: "multiplayer.Game"):
-    for entity in game.entities.values():
-        if entity.name == username:
-            return entity.states[StateType.PLAYER].state.player_id
-    return None
+    return game.player_id_of(username)
 
 
 def get_inventory_diff(old_inventory: Dict[int, "InventoryItem"], new_inventory: Dict[int, "InventoryItem"]):
@@ -200,9 +300,14 @@ def get_nearest_safe_entity(coords: Tuple[float, float], requested_entities: Dic
     nearest_entity = None
     nearest_distance = float("inf")
 
+    # Looked up once instead of for every requested entity
+    enemies = [entity.position for entity in all_entities.values() if entity.position and entity.name in ENEMIES]
+    safe_distance *= safe_distance
+
     for entity in requested_entities.values():
-        if entity.position != (-1, -1) and distance_to_closest_enemy(
-                entity.position, all_entities) > safe_distance:
+        position = entity.position
+        if position != (-1, -1) and all(
+                (x - position[0]) ** 2 + (y - position[1]) ** 2 > safe_distance for x, y in enemies):
             distance = entity.distance_to(coords)
 
             if distance < nearest_distance:
@@ -217,33 +322,22 @@ def time_to_dest(start_coords: Tuple[float, float], dest_coords: Tuple[float, fl
 
 
 def time_to_dests(start_coords: Tuple[float, float], destinations: List[Tuple[float, float]], speed: float):
-    if not destinations:
-        return 0
-
-    time = 0
-    for i in range(len(destinations) - 1):
-        time += time_to_dest(destinations[i], destinations[i + 1], speed)
-
-    time += ((destinations[0][0] - start_coords[0]) ** 2 + (destinations[0][1] - start_coords[1]) ** 2) ** 0.5 / speed
-    return time
+    return Path(start_coords, destinations, speed).duration
 
 
 def coords_in_bounds(coords: Tuple[float, float], bounds: Tuple[Tuple[float, float], Tuple[float, float]]):
     return bounds[0][0] <= coords[0] <= bounds[1][0] and bounds[0][1] <= coords[1] <= bounds[1][1]
 
 
-def message_contains_since(message: str, messages: List[Tuple[datetime.datetime, "ChatMessage"]],
-                           since: datetime.datetime):
-    for timestamp, chat_message in reversed(messages):
-        if timestamp < since:
-            return False
-        if message in chat_message.message:
-            return True
+def message_contains_since(message: str, chat_log: "ChatLog", since: float):
+    """Whether a message containing ``message`` was received since ``since`` (``time.monotonic()``)."""
+    return chat_log.contains_since(message, since)
 
-    return False
 
+def inventory_contains_resource_id(resource_id: int, inventory: "Inventory | Dict[int, InventoryItem]", amount: int):
+    if hasattr(inventory, "contains"):  # Keeps totals, e.g. player.inventory
+        return inventory.contains(resource_id, amount)
 
-def inventory_contains_resource_id(resource_id: int, inventory: Dict[int, "InventoryItem"], amount: int):
     total = 0
 
     for item in inventory.values():
@@ -253,27 +347,37 @@ def inventory_contains_resource_id(resource_id: int, inventory: Dict[int, "Inven
     return total >= amount
 
 
-async def wait_for(predicate, timeout: int):
-    i = 0
+async def wait_for(predicate, timeout: float, interval: float = 0.1):
+    """Polls ``predicate`` until ``timeout`` seconds have passed, ``client.wait_for`` with a ``Condition`` wakes up
+    right when the game changes instead."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
 
     while not predicate():
-        await asyncio.sleep(0.1)
-
-        i += 1
-        if i > timeout * 10:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
             return False
 
+        await asyncio.sleep(min(interval, remaining))
+
     return True
 
 
-def get_resource_by_name(name: str, resources: Dict[int, "ItemResource"]):
+def get_resource_by_name(name: str, resources: "ResourceCatalogue | Dict[int, ItemResource]"):
+    if hasattr(resources, "by_resource_name"):  # Indexed, e.g. game.resources
+        return resources.by_resource_name(name)
+
+    name = name.lower()
     for resource in resources.values():
-        if resource.resource_name == name.lower():
+        if resource.resource_name == name:
             return resource
     return None
 
 
-def get_inventory_slot_by_resource_id(resource_id: int, inventory: Dict[int, "InventoryItem"]):
+def get_inventory_slot_by_resource_id(resource_id: int, inventory: "Inventory | Dict[int, InventoryItem]"):
+    if hasattr(inventory, "first_slot"):
+        return inventory.first_slot(resource_id)
+
     for slot, item in inventory.items():
         if item.resource.resource_id == resource_id:
             return slot
@@ -281,7 +385,10 @@ def get_inventory_slot_by_resource_id(resource_id: int, inventory: Dict[int, "In
     return None
 
 
-def amount_of_resource_in_inventory(resource_id: int, inventory: Dict[int, "InventoryItem"]):
+def amount_of_resource_in_inventory(resource_id: int, inventory: "Inventory | Dict[int, InventoryItem]"):
+    if hasattr(inventory, "total"):
+        return inventory.total(resource_id)
+
     total = 0
 
     for slot, item in inventory.items():
@@ -298,37 +405,3 @@ def has_sufficient_level(levels: Dict[int, List[str]], level: int, item: str):
                 return True
         else:
             return False
-
-
-async def emulate_move(start_coords: Tuple[float, float], destinations: List[Tuple[float, float]], speed: float,
-                       client: "multiplayer.Client"):
-    time_to_next = time_to_dest(start_coords, destinations[0], speed)
-    begin_coords = start_coords
-    end_coords = destinations[0]
-
-    for i in range(len(destinations)):
-        time_left = time_to_next
-        while time_left > 0:
-            await asyncio.sleep(1)
-
-            if not client.game.entities[client.game.local_player.network_id].is_moving:
-                return
-
-            time_left -= 1
-
-            client.game.local_player.position = (
-                start_coords[0] + (end_coords[0] - begin_coords[0]) * (1 - time_left / time_to_next),
-                begin_coords[1] + (end_coords[1] - begin_coords[1]) * (1 - time_left / time_to_next)
-            )
-
-            logging.debug(f"Emulated move to {client.game.local_player.position}")
-
-        if i + 1 >= len(destinations) - 1:
-            break
-
-        time_to_next = time_to_dest(destinations[i], destinations[i + 1], speed)
-        start_coords = destinations[i]
-        end_coords = destinations[i + 1]
-
-    client.game.local_player.position = destinations[-1]
-    client.game.entities[client.game.local_player.network_id].stop_moving()
@@ -0,0 +1,19 @@
+import pytest
+
+import antorum.multiplayer  # noqa: F401, imports the packet modules in the order they import each other
+from antorum.cache import ItemCache
+from antorum.packets import inventory
+from wire import items_file
+
+ITEM_NAMES = ["Skartweed", "Skeegrass", "Carrot", "Coins", "Iron ore", "Copper pickaxe"]
+
+
+@pytest.fixture
+def item_cache(tmp_path, monkeypatch):
+    """An item cache of ``ITEM_NAMES`` used by the packets that look up item resources."""
+    items_path = tmp_path / "items.cdata"
+    items_path.write_bytes(items_file(ITEM_NAMES))
+
+    with ItemCache(str(items_path)) as cache:
+        monkeypatch.setattr(inventory, "resources", cache)
+        yield cache
@@ -0,0 +1,76 @@
+import asyncio
+import types
+
+from antorum.actions import ForageWeeds, SellInventory
+from antorum.game import Game
+from antorum.inventory import BAG_SIZE
+from antorum.packets import world_entities
+from antorum.packets.chat import ChatChannel, ChatMessage
+from antorum.player import Skill, SkillType
+from antorum.utils import InteractionType, get_nearest_safe_entity
+from wire import entity, info_state, interactable_state, player_entity, transform_state, weed_entity, \
+    world_entities as world_entities_payload
+
+
+def client_of(entities) -> types.SimpleNamespace:
+    game = Game(1, 1)
+    game.replace_entities(world_entities.Response(world_entities_payload([player_entity(1, 1, "Me", 10, 15),
+                                                                          *entities])).entities)
+    game.local_player.skills[SkillType.HERBOLOGY] = Skill(SkillType.HERBOLOGY, 1, 0, 0, 0)
+    return types.SimpleNamespace(game=game)
+
+
+def test_nearest_forageable():
+    client = client_of([weed_entity(2, 20, 20), weed_entity(3, 30, 20), weed_entity(4, 12, 16, "Bulrush"),
+                        weed_entity(5, 2, 15)])  # Level 3 weed, and a weed outside the forage area
+    action = ForageWeeds(client)
+
+    assert action.nearest_forageable([]).network_id == 2
+    assert action.nearest_forageable([2]).network_id == 3
+    assert action.nearest_forageable([2], dict(client.game.entities)).network_id == 3
+    assert action.nearest_forageable([2, 3]) is None
+
+
+def test_barter_entity():
+    barter = [info_state("Trader"), interactable_state([InteractionType.BARTER.value])]
+    client = client_of([weed_entity(2, 10, 16), entity(3, [*barter, transform_state(40, 15)]),
+                        entity(4, [*barter, transform_state(30, 15)])])
+    client.game.resources = {3: types.SimpleNamespace(resource_id=3, resource_name="coins")}
+    action = SellInventory(client, "coins")
+
+    assert asyncio.run(action.get_barter_entity(client.game.entities)).network_id == 4
+    assert asyncio.run(action.get_barter_entity({3: client.game.entities[3]})).network_id == 3
+
+
+def test_nearest_safe_entity():
+    client = client_of([weed_entity(2, 12, 15), weed_entity(3, 30, 15), weed_entity(4, 60, 15),
+                        weed_entity(5, 15, 15, "Gremneer")])
+    game = client.game
+    weeds = {network_id: game.entities[network_id] for network_id in (2, 3, 4)}
+
+    assert get_nearest_safe_entity((10, 15), weeds, game.entities).network_id == 3
+    assert get_nearest_safe_entity((10, 15), weeds, game.entities, safe_distance=20).network_id == 4
+    assert game.nearest_safe_entity((10, 15), lambda entity: entity.network_id in weeds).network_id == 3
+
+
+def test_forage_until_the_game_says_the_bag_is_full():
+    client = client_of([])
+    inventory = client.game.local_player.inventory
+    for slot in range(BAG_SIZE):  # Full if the bag has the assumed size, but it could be bigger
+        inventory.add(slot, types.SimpleNamespace(resource_id=3), 1)
+
+    action = ForageWeeds(client)
+    forages = []
+
+    async def forage():
+        forages.append(True)
+        if len(forages) == 2:
+            client.game.chat_log.append(ChatMessage(0, "", ChatChannel.SYSTEM,
+                                                    "You need at least one free bag slot to forage."))
+        return True
+
+    action.forage = forage
+
+    assert asyncio.run(action._run()) is True
+    assert len(forages) == 2
+    assert (inventory.size_known, inventory.size) == (True, BAG_SIZE)
@@ -0,0 +1,48 @@
+import os
+
+from antorum.cache import ItemCache
+from wire import items_file
+
+
+def write_items(items_path, names, mtime: int):
+    items_path.write_bytes(items_file(names))
+    os.utime(items_path, ns=(mtime, mtime))
+
+
+def test_lookups_after_close_map_the_file_again(tmp_path):
+    items_path = tmp_path / "items.cdata"
+    write_items(items_path, ["Coins", "Carrot", "Iron ore"], 10 ** 9)
+
+    with ItemCache(str(items_path)) as cache:
+        assert cache[0].name == "Coins"
+        assert cache._map is not None
+    assert cache._map is None
+
+    assert cache[0].name == "Coins"  # Already decoded, the file isn't needed
+    assert cache._map is None
+    assert cache[2].name == "Iron ore"
+    assert cache._map is not None
+    cache.close()
+
+
+def test_changed_file_is_read_again_after_close(tmp_path):
+    items_path = tmp_path / "items.cdata"
+    write_items(items_path, ["Coins", "Carrot"], 10 ** 9)
+
+    cache = ItemCache(str(items_path))
+    assert cache[1].name == "Carrot"
+    cache.close()
+
+    write_items(items_path, ["Skartweed", "Skeegrass", "Copper pickaxe"], 2 * 10 ** 9)
+    assert cache[2].name == "Copper pickaxe"
+    assert cache[1].name == "Skeegrass"
+    assert len(cache) == 3
+    cache.close()
+
+
+def test_missing_file_is_empty(tmp_path, caplog):
+    with ItemCache(str(tmp_path / "items.cdata")) as cache:
+        assert len(cache) == 0
+        assert 1 not in cache
+
+    assert "can't be read" in caplog.text
@@ -0,0 +1,34 @@
+import pytest
+
+from antorum.chatlog import ChatLog
+from antorum.packets.chat import ChatChannel, ChatMessage
+
+
+def message(index: int) -> ChatMessage:
+    return ChatMessage(0, "", ChatChannel.SYSTEM, f"Message {index}")
+
+
+@pytest.mark.parametrize("count", [3, 10, 11, 25, 40])
+def test_keeps_the_last_maxlen_messages(count):
+    log = ChatLog(maxlen=10)
+    for index in range(count):
+        log.append(message(index), timestamp=index)
+
+    kept = list(range(max(count - 10, 0), count))
+    assert len(log) == len(kept)
+    assert list(log) == [(index, message(index)) for index in kept]
+    assert (log[0], log[-1]) == ((kept[0], message(kept[0])), (count - 1, message(count - 1)))
+    assert log.since(count - 2) == [message(count - 2), message(count - 1)]
+    assert log.since(-1) == [message(index) for index in kept]
+    assert log.since(count) == []
+
+    with pytest.raises(IndexError):
+        log[len(kept)]
+
+
+def test_contains_since():
+    log = ChatLog()
+    log.append(ChatMessage(0, "", ChatChannel.SYSTEM, "You harvest some Skartweed."), timestamp=5)
+
+    assert log.contains_since("You harvest", 5)
+    assert not log.contains_since("You harvest", 6)
@@ -0,0 +1,104 @@
+import types
+
+import pytest
+
+from antorum.game import Game
+from antorum.packets import entity_spawn, world_entities
+from antorum.utils import StateType
+from wire import entity, info_state, movement_state, player_entity, transform_state, weed_entity, \
+    world_entities as world_entities_payload
+
+
+def everything(entity):
+    return True
+
+
+# Queries without a predicate use the position table when there is one, with a predicate they always use the grid
+QUERIES = [pytest.param((False, None), id="grid"), pytest.param((True, None), id="table"),
+           pytest.param((True, everything), id="grid with table")]
+
+
+@pytest.fixture(params=QUERIES)
+def query(request):
+    return request.param
+
+
+@pytest.fixture
+def game(query):
+    game = Game(1, 1, position_table=query[0])
+    game.replace_entities(world_entities.Response(world_entities_payload([
+        weed_entity(2, 10, 0), weed_entity(3, 50, 0), player_entity(4, 7, "Walker", 100, 0)])).entities)
+    return game
+
+
+def walk(game: Game, network_id: int, destinations, speed: float, seconds: float):
+    """Starts ``network_id`` moving to ``destinations`` like a move packet does, ``seconds`` ago."""
+    client = types.SimpleNamespace(game=game)
+    movement = world_entities.MovementState(destinations, True, speed)
+    world_entities.update_entity(network_id, {StateType.MOVEMENT: movement}, client)
+
+    game.entities[network_id].path.started_at -= seconds
+
+
+def test_queries_follow_moving_entities(game, query):
+    _, predicate = query
+    assert game.nearest_entity((0, 0), predicate).network_id == 2
+
+    walk(game, 4, [(0.0, 0.0)], 10, 9.5)  # Now at (5, 0)
+    assert game.nearest_entity((0, 0), predicate).network_id == 4
+    assert game.entities_within((0, 0), 6, predicate) == [game.entities[4]]
+    assert game.entities_within((100, 0), 5, predicate) == []
+    assert game.entities[4].position == pytest.approx((5, 0), abs=.1)
+    assert game.spatial.position_of(4) == pytest.approx((5, 0), abs=.1)
+
+    game.entities[4].path.started_at -= 1  # Arrived at (0, 0)
+    assert game.spatial.position_of(4) == (0, 0)
+    assert game.entities[4].position == (0, 0)
+    assert game.entities_in_bounds(((-1, -1), (1, 1)), predicate) == [game.entities[4]]
+
+
+def test_entities_that_halt_stay_where_they_stopped(game, query):
+    _, predicate = query
+    walk(game, 4, [(0.0, 0.0)], 10, 5)
+    entity = game.entities[4]
+    entity.stop_moving()
+    game.entity_changed(entity, (StateType.TRANSFORM,))
+
+    assert entity.position == pytest.approx((50, 0), abs=.1)
+    assert sorted(e.network_id for e in game.entities_within((50, 0), 1, predicate)) == [3, 4]
+
+
+def test_removed_moving_entities_are_forgotten(game, query):
+    _, predicate = query
+    walk(game, 4, [(0.0, 0.0)], 10, 5)
+    game.remove_entity(4)
+
+    assert game.nearest_entity((50, 0), predicate).network_id == 3
+    assert not game.spatial._moving
+    assert game.positions is None or not game.positions._moving
+
+
+def test_ties_are_broken_by_network_id(query):
+    position_table, predicate = query
+    game = Game(1, 1, position_table=position_table)
+    game.replace_entities(world_entities.Response(world_entities_payload([
+        weed_entity(9, 10, 0), weed_entity(8, -10, 0), weed_entity(7, 0, 10), weed_entity(6, 0, 30)])).entities)
+
+    assert [entity.network_id for entity in game.nearest_entities((0, 0), 2, predicate)] == [7, 8]
+    assert [entity.network_id for entity in game.nearest_entities((0, 0), 5, predicate)] == [7, 8, 9, 6]
+
+
+def test_entities_that_are_added_while_moving_follow_their_path(query):
+    position_table, predicate = query
+    game = Game(1, 1, position_table=position_table)
+    walker = entity(4, [info_state("Walker"), transform_state(100, 0), movement_state([(0, 0)], True, 10)])
+    game.replace_entities(world_entities.Response(world_entities_payload([weed_entity(2, 10, 0), walker])).entities)
+    game.add_entity(entity_spawn.Response(entity(5, [info_state("Runner"), transform_state(0, 100),
+                                                     movement_state([(0, 0)], True, 10)])).data)
+
+    for network_id in (4, 5):
+        game.entities[network_id].path.started_at -= 9.5  # Both are now 5 away from (0, 0)
+        assert game.entities[network_id].time_to_destination() == pytest.approx(.5, abs=.1)
+
+    assert [entity.network_id for entity in game.nearest_entities((0, 0), 2, predicate)] == [4, 5]
+    assert game.entities[5].position == pytest.approx((0, 5), abs=.1)
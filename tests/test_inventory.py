@@ -0,0 +1,33 @@
+import types
+
+from antorum.inventory import BAG_SIZE, Inventory
+from antorum.packets.inventory_add import InventoryItem
+
+COINS = types.SimpleNamespace(resource_id=3)
+
+
+def bag(slots) -> Inventory:
+    return Inventory({slot: InventoryItem(COINS, 1, None) for slot in slots})
+
+
+def test_size_grows_to_the_slots_the_game_uses():
+    inventory = bag(range(BAG_SIZE))
+    assert inventory.is_full
+
+    inventory.add(BAG_SIZE + 3, COINS, 1)
+    assert inventory.size == BAG_SIZE + 4
+    assert (inventory.free_slots, inventory.first_free_slot()) == (3, BAG_SIZE)
+    assert inventory.total(COINS.resource_id) == BAG_SIZE + 1
+
+
+def test_set_full_shrinks_to_a_smaller_bag():
+    inventory = bag(range(16))
+    assert inventory.free_slots == BAG_SIZE - 16
+
+    assert not inventory.size_known
+    inventory.set_full()
+    assert (inventory.size, inventory.is_full, inventory.first_free_slot()) == (16, True, None)
+    assert inventory.size_known
+
+    inventory.remove(4, 1)
+    assert (inventory.free_slots, inventory.first_free_slot()) == (1, 4)
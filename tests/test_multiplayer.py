@@ -0,0 +1,97 @@
+import asyncio
+import types
+
+import pytest
+
+from antorum import packets
+from antorum.game import Game
+from antorum.multiplayer import Client, FrameProtocol
+from antorum.packets import barter_close, barter_move, barter_open, character_creation, chat, combat, combat_start, \
+    combat_stop, entity_spawn, exp, interact, inventory, move, move_failed, stats, world_entities
+from antorum.utils import StateType
+from wire import chat as chat_payload, entity, f32, frame, i32, i64, string, transform_state, weed_entity, \
+    world_entities as world_entities_payload
+
+# Packets a client can leave out, their handlers only log or keep up state the world doesn't depend on
+OPTIONAL = {character_creation, move_failed, chat, combat, interact, stats, exp, barter_open, barter_move, barter_close}
+
+
+def test_required_packets_cover_the_world_and_the_inventory():
+    assert set(packets.handlers) - packets.REQUIRED_PACKETS == {module.packet_id for module in OPTIONAL}
+    assert {move.packet_id, world_entities.packet_id, inventory.packet_id} <= packets.REQUIRED_PACKETS
+
+
+def test_subscriptions_keep_required_packets():
+    client = Client(subscriptions=[combat_start])
+
+    assert client.subscriptions == packets.REQUIRED_PACKETS | {combat_start.packet_id}
+    assert Client().subscriptions is None
+
+
+def test_filtered_frames_are_skipped():
+    async def run():
+        received = []
+        protocol = FrameProtocol(lambda packet_id, data: received.append((packet_id, bytes(data))),
+                                 Client(subscriptions=()).subscriptions)
+
+        moved = i64(1) + i64(1) + f32(2) + f32(3)
+        said = chat_payload("Hi")
+        protocol.data_received(frame(move_failed.packet_id, b"") + frame(move.packet_id, moved)
+                               + frame(chat.packet_id, said))
+
+        assert received == [(move.packet_id, moved)]
+        assert (protocol.skipped_frames, protocol.skipped_bytes) == (2, 3 + 3 + len(said))
+
+    asyncio.run(run())
+
+
+def test_chat_can_be_subscribed_to():
+    async def run():
+        received = []
+        protocol = FrameProtocol(lambda packet_id, data: received.append(packet_id),
+                                 Client(subscriptions=[chat]).subscriptions)
+        protocol.data_received(frame(chat.packet_id, chat_payload("Hi")))
+
+        assert received == [chat.packet_id]
+        assert protocol.skipped_frames == 0
+
+    asyncio.run(run())
+
+
+def test_duplicate_packet_ids_fail():
+    with pytest.raises(ValueError, match="combat_start and antorum.packets.combat_stop both receive packet id 56"):
+        packets._by_packet_id([combat_start, combat_stop])
+
+    assert packets.handlers[56] is combat
+
+
+def test_combat_packet_toggles_combat(caplog):
+    game = Game(1, 1)
+    game.replace_entities(world_entities.Response(world_entities_payload([weed_entity(7, 1, 1, "Gremneer")])).entities)
+    client = types.SimpleNamespace(game=game)
+    dispatch = packets.HandlerRegistry().dispatch[56]
+
+    dispatch(i64(7), client)
+    assert game.combat_targets == {7}
+    assert "Combat started with Gremneer (7)" in caplog.text
+
+    dispatch(i64(7), client)
+    assert game.combat_targets == set()
+    assert "Stopping combat with Gremneer (7)" in caplog.text
+
+    dispatch(i64(7), client)
+    game.remove_entity(7)
+    assert game.combat_targets == set()
+
+
+def test_entities_are_decoded_with_the_clients_eager_states(monkeypatch):
+    monkeypatch.setattr(world_entities, "eager_state_ids", world_entities.eager_state_ids)
+    client = Client(eager_states=[StateType.CLASS])
+    client.game = Game(1, 1)
+
+    class_state = i32(10) + string("Title") + bytes([1, 2, 3, 4])
+    client._dispatch(entity_spawn.packet_id, memoryview(entity(7, [transform_state(1, 1), class_state])))
+    states = client.game.entities[7].states
+
+    assert world_entities.eager_state_ids == {StateType.CLASS.value}
+    assert states.is_decoded(StateType.CLASS)
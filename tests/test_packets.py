@@ -0,0 +1,230 @@
+import pytest
+
+from antorum.packets import (barter_close, barter_move, barter_open, character_creation, chat, combat_start,
+                             combat_stop, entity_despawn, entity_spawn, entity_state, exp, halt, handshake, interact,
+                             inventory, inventory_add, inventory_item_drop, inventory_read_item, inventory_remove,
+                             load_complete, login, move, move_failed, skills, stats, world_entities)
+from antorum.packets.barter_open import BarterInventoryItemArea
+from antorum.packets.item import EMPTY_PROPERTY_BAG, ItemPropertyBag, ItemSlot
+from antorum.packets.world_entities import DEFAULT_EAGER_STATES
+from antorum.player import SkillType
+from antorum.utils import InteractionType, StateType
+from wire import blob, entity, f32, i8, i16, i32, i64, inventory_item, string
+
+# Requests, the bytes are what the hand-written serializers wrote before packets had schemas
+REQUESTS = [
+    (handshake.Packet(12, 0x44F, 1, 2), i16(12) + i32(0x44F) + i64(1) + i64(2)),
+    (login.Packet("Ädventurer", b"\x01\x02\x03"), string("Ädventurer") + blob(b"\x01\x02\x03")),
+    (move.Packet(1.5, -2.25), f32(1.5) + f32(-2.25)),
+    (interact.Packet(42, InteractionType.FORAGE), i64(42) + i8(7)),
+    (barter_move.Request(BarterInventoryItemArea.YOU_OFFER, 3, 500), i8(1) + i8(3) + i32(500)),
+    (barter_close.Request(barter_close.BarterStatus.ACCEPTED), i8(1)),
+    (character_creation.Packet("Bob", *range(1, 18)), string("Bob") + bytes(range(1, 18))),
+    (inventory_item_drop.Request(4, 10), i8(4) + i32(10)),
+    (inventory_read_item.Request(7), i8(7)),
+    (load_complete.Request(), b""),
+]
+
+
+@pytest.mark.parametrize("packet, data", REQUESTS, ids=lambda value: type(value).__module__.rsplit(".")[-1])
+def test_request_serializes_like_the_old_writers(packet, data):
+    assert packet.serialize() == data
+
+
+# Responses whose schemas can be encoded again, they should give back the exact bytes they were decoded from
+ENCODABLE_RESPONSES = {
+    barter_close: i8(1),
+    barter_move: i32(5) + i32(6) + i8(2) + i64(2) + i8(1) + i8(2) + i32(3) + i8(4) + i8(5) + i32(6),
+    barter_open: i64(2) + i8(1) + i32(10) + i8(2) + i32(20) + i64(1) + i64(7) + i32(1) + i32(2) + i8(1) + i8(0)
+    + string("Shop"),
+    character_creation: i8(4),
+    chat: i64(3) + string("bob") + i8(2) + string("hi there"),
+    combat_start: i64(9),
+    combat_stop: i64(9),
+    entity_despawn: i64(5),
+    exp: i64(100) + i8(2) + i32(50),
+    halt: i64(4),
+    interact: i64(1) + i64(2) + i32(10) + i32(3) + i8(0) + i8(1),
+    inventory_remove: i8(2) + i32(1),
+    login: i8(6) + i64(99),
+    move: i64(100) + i64(2) + f32(1) + f32(2) + f32(3) + f32(4),
+    move_failed: b"",
+}
+
+
+@pytest.mark.parametrize("module, data", ENCODABLE_RESPONSES.items(), ids=lambda value: getattr(value, "__name__", ""))
+def test_response_round_trip(module, data):
+    packet = module.receive_packet(data)
+    assert packet.serialize() == data
+
+
+def test_response_values():
+    assert barter_move.Response(ENCODABLE_RESPONSES[barter_move]).moved == [(1, 2, 3), (4, 5, 6)]
+
+    barter = barter_open.Response(ENCODABLE_RESPONSES[barter_open]).barter
+    assert barter.inventory_values == {1: 10, 2: 20}
+    assert barter.shop_items == {7: (1, 2)}
+    assert (barter.buys_items, barter.sells_items, barter.shop_name) == (True, False, "Shop")
+
+    message = chat.Response(ENCODABLE_RESPONSES[chat]).message
+    assert message == chat.ChatMessage(3, "bob", chat.ChatChannel.LOCAL, "hi there")
+
+    packet = exp.Response(ENCODABLE_RESPONSES[exp])
+    assert (packet.network_id, packet.skill_type, packet.exp) == (100, SkillType.HERBOLOGY, 50)
+
+    packet = interact.Response(ENCODABLE_RESPONSES[interact])
+    assert (packet.damage, packet.damage_blocked, packet.did_dodge, packet.did_miss) == (10, 3, False, True)
+
+    packet = login.Response(ENCODABLE_RESPONSES[login])
+    assert (packet.status, packet.player_id) == (login.LoginStatus.SUCCESS_NEW_USER, 99)
+
+    assert move.Response(ENCODABLE_RESPONSES[move]).moves == [(1.0, 2.0), (3.0, 4.0)]
+
+
+def test_handshake_response():
+    packet = handshake.Response(i8(2) + i32(3) + string("a2V5") + string("news ✉"))
+
+    assert packet.status == handshake.HandshakeStatus.ACCEPTEDNEEDSDOWNLOAD
+    assert (packet.player_count, packet.encryption_key, packet.latest_news) == (3, b"key", "news ✉")
+
+
+def test_skills_response():
+    data = i64(2) + i8(0) + i32(100) + i32(5) + i32(90) + i32(200) + i8(9) + i32(7) + i32(1) + i32(0) + i32(10)
+    fishing, mining = skills.Response(data).skills.values()
+
+    assert (fishing.type, fishing.experience, fishing.level) == (SkillType.FISHING, 100, 5)
+    assert (mining.type, mining.exp_current_level, mining.exp_next_level) == (SkillType.MINING, 0, 10)
+
+
+def test_stats_response():
+    data = (i64(2) + i8(0) + i32(5) + i8(3) + i32(7)
+            + i32(30) + f32(.5) * 4
+            + f32(.25) * 3
+            + i64(1) + i64(1) + string("a") + string("b") + i64(2) + i32(3) + i32(4) + i8(1))
+    packet = stats.Response(data)
+
+    assert packet.stats == {stats.Stat.STAMINA: 5, stats.Stat.SPEED: 7}
+    assert (packet.bonuses.base_hp, packet.bonuses.skill_success_bonus) == (30, .5)
+    assert packet.class_bonuses.combat_exp_bonus == .25
+    assert packet.spell_effects == [(1, "a", "b", 2, 3, 4, True)]
+
+
+def test_inventory_responses(item_cache):
+    packet = inventory.Response(i64(2) + inventory_item(0, 3, 5) + inventory_item(3, 5, 1, '{"durability": 3}'))
+
+    assert list(packet.items) == [0, 3]
+    assert (packet.items[0].resource.name, packet.items[0].amount) == ("Coins", 5)
+    assert packet.items[0].property_bag is EMPTY_PROPERTY_BAG
+    assert packet.items[3].resource.name == "Copper pickaxe"
+    assert packet.items[3].property_bag == ItemPropertyBag(durability=3)
+
+    packet = inventory_add.Response(inventory_item(2, 4, 1, '{"creator": "x"}'))
+    assert (packet.index, packet.resource_id, packet.amount) == (2, 4, 1)
+    assert packet.property_bag == ItemPropertyBag(creator="x")
+
+
+# Every entity state as it's sent, and what it decodes to
+STATES = {
+    StateType.INFO: (i32(0) + string("Skärtweed") + i16(3), world_entities.InfoState("Skärtweed", 3)),
+    StateType.TRANSFORM: (i32(1) + f32(1) + f32(2) + f32(0) * 3 + f32(1) * 3,
+                          world_entities.TransformState((1.0, 2.0), (0.0, 0.0, 0.0), (1.0, 1.0, 1.0))),
+    StateType.MOVEMENT: (i32(2) + i64(2) + f32(3) + f32(4) + f32(5) + f32(6) + i8(1) + f32(4),
+                         world_entities.MovementState([(3.0, 4.0), (5.0, 6.0)], True, 4.0)),
+    StateType.HEALTH: (i32(3) + i32(20) + i32(30), world_entities.HealthState(20, 30)),
+    StateType.ITEM: (i32(4) + i32(2) + i64(8), world_entities.ItemState(2, 8)),
+    StateType.INTERACTABLE: (i32(5) + i64(2) + i8(4) + i8(7),
+                             world_entities.InteractableState([InteractionType.EXAMINE, InteractionType.FORAGE])),
+    StateType.PLAYER: (i32(6) + i64(3), world_entities.PlayerState(3)),
+    StateType.NPC: (i32(8), world_entities.NPCState()),
+    StateType.FISHER: (i32(9) + i8(1) + i64(5) + f32(1) + f32(2), world_entities.FisherState(True, 5, (1.0, 2.0))),
+    StateType.CLASS: (i32(10) + string("Title") + bytes([1, 2, 3, 4]), world_entities.ClassState("Title", 1, 2, 3, 4)),
+    StateType.QUEST_GIVER: (i32(11) + i64(9), world_entities.QuestGiverState(9)),
+    StateType.MINER: (i32(12) + i8(0) + i64(7), world_entities.MinerState(False, 7)),
+    StateType.ANIMATOR: (i32(13) + i64(0) + i64(2) + string("walk") + i8(1) + string("run") + i8(0),
+                         world_entities.AnimatorState()),
+}
+
+
+def test_entity_states_decode_lazily():
+    packet = entity_spawn.Response(entity(100, [state for state, _ in STATES.values()]))
+    states = packet.data.states
+
+    assert packet.data.network_id == 100
+    assert list(states) == list(STATES)
+    assert {state_type for state_type in states if states.is_decoded(state_type)} == DEFAULT_EAGER_STATES
+
+    for state_type, (_, expected) in STATES.items():
+        assert states[state_type] == expected
+        assert states.is_decoded(state_type)
+
+
+def test_equipment_state(item_cache):
+    data = i32(7) + bytes(range(9)) + i64(1) + inventory_item(1, 5, 1, '{"durability": 5, "max_durability": 10}')
+    states = entity_spawn.Response(entity(1, [data])).data.states
+    equipment = states[StateType.EQUIPMENT]
+
+    assert (equipment.hair, equipment.pants_color, equipment.bulk, equipment.height) == (0, 6, 7, 8)
+    assert list(equipment.equipped) == [ItemSlot.main_hand]
+    assert equipment.equipped[ItemSlot.main_hand].resource.name == "Copper pickaxe"
+    assert equipment.equipped[ItemSlot.main_hand].property_bag == ItemPropertyBag(5, 10)
+
+
+def test_entity_state_response():
+    packet = entity_state.Response(i64(100) + STATES[StateType.MOVEMENT][0])
+
+    assert packet.network_id == 100
+    assert packet.state == STATES[StateType.MOVEMENT][1]
+
+    packet = entity_state.Response(i64(100) + STATES[StateType.CLASS][0])
+    assert packet.state.decode() == STATES[StateType.CLASS][1]
+
+
+def test_eager_states_are_decoded_from_the_packet(monkeypatch):
+    monkeypatch.setattr(world_entities, "eager_state_ids", frozenset({StateType.CLASS.value}))
+    states = entity_spawn.Response(entity(1, [STATES[StateType.INFO][0], STATES[StateType.CLASS][0]])).data.states
+
+    assert dict.__getitem__(states, StateType.CLASS) == STATES[StateType.CLASS][1]
+    assert isinstance(dict.__getitem__(states, StateType.INFO), world_entities.PendingState)
+    assert states[StateType.INFO] == STATES[StateType.INFO][1]
+
+
+def test_world_entities_response():
+    weed = entity(5, [STATES[StateType.INFO][0], STATES[StateType.TRANSFORM][0],
+                      STATES[StateType.INTERACTABLE][0]])
+    npc = entity(6, [STATES[StateType.NPC][0], STATES[StateType.HEALTH][0]])
+    data = i32(1) + i32(2) + i64(2) + weed + npc + i64(2) + i64(4) + i64(7) + i8(1)
+    packet = world_entities.Response(data)
+
+    assert packet.coords == (1, 2)
+    assert [entity.network_id for entity in packet.entities] == [5, 6]
+    assert packet.entities[0].name == "Skärtweed"
+    assert packet.entities[0].can_forage()
+    assert packet.entities[1].states[StateType.HEALTH] == world_entities.HealthState(20, 30)
+    assert list(packet.removed_entities) == [4, 7]
+    assert packet.full_sync is True
+
+
+def test_unknown_state_id():
+    with pytest.raises(ValueError, match="Unknown state id 99"):
+        entity_spawn.Response(entity(1, [i32(99)]))
+
+
+def test_pending_states_dont_keep_the_frame():
+    buffer = bytearray(entity(1, [STATES[StateType.INFO][0], STATES[StateType.CLASS][0]]))
+
+    with memoryview(buffer) as frame:
+        states = entity_spawn.Response(frame).data.states
+    del buffer[:]  # Fails with a BufferError if a state still holds a view into the frame
+
+    assert states[StateType.CLASS] == STATES[StateType.CLASS][1]
+
+
+def test_entity_states_values_decode_as_they_are_iterated():
+    states = entity_spawn.Response(entity(1, [STATES[StateType.CLASS][0], STATES[StateType.MINER][0]])).data.states
+
+    values = states.values()
+    assert next(values) == STATES[StateType.CLASS][1]
+    assert not states.is_decoded(StateType.MINER)
+    assert list(values) == [STATES[StateType.MINER][1]]
+    assert dict(states.items()) == {StateType.CLASS: STATES[StateType.CLASS][1],
+                                    StateType.MINER: STATES[StateType.MINER][1]}
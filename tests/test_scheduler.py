@@ -0,0 +1,109 @@
+import asyncio
+import gc
+import types
+
+import pytest
+
+from antorum import scheduler
+from antorum.actions import Action
+from antorum.scheduler import ActionScheduler
+
+
+class Sleep(Action):
+    async def _run(self, seconds: float = 10):
+        await asyncio.sleep(seconds)
+        return seconds
+
+
+class Stubborn(Action):
+    async def _run(self):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:  # Finishes anyway when it's pre-empted
+            return "finished"
+
+
+class Fail(Action):
+    async def _run(self):
+        raise RuntimeError("Failed")
+
+
+def client(history: int = 100) -> types.SimpleNamespace:
+    return types.SimpleNamespace(scheduler=ActionScheduler(history))
+
+
+def test_wait_to_finish():
+    async def run():
+        action = Sleep(client())
+        await action.run(0)
+        assert await action.wait_to_finish() == 0
+
+        action = Fail(client())
+        await action.run()
+        with pytest.raises(RuntimeError, match="Failed"):
+            await action.wait_to_finish()
+
+    asyncio.run(run())
+
+
+def test_wait_to_finish_a_stopped_action():
+    async def run():
+        action = Sleep(client())
+        await action.run()
+        await asyncio.sleep(0)
+        action.stop()
+
+        assert await action.wait_to_finish() is None
+
+    asyncio.run(run())
+
+
+def test_wait_to_finish_when_the_waiting_task_is_cancelled():
+    async def run():
+        action = Sleep(client())
+        await action.run()
+        waiting = asyncio.create_task(action.wait_to_finish())
+        await asyncio.sleep(0)
+        waiting.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert not action.done
+        action.stop()
+
+    asyncio.run(run())
+
+
+def test_preempted_actions_that_finish_anyway_keep_their_result():
+    async def run():
+        shared = client()
+        stubborn = Stubborn(shared)
+        await stubborn.run()
+        await asyncio.sleep(0)
+        await Sleep(shared).run(0, priority=1)  # Pre-empts it
+
+        assert await stubborn.wait_to_finish() == "finished"
+        assert stubborn.scheduled.preemptions == 0
+        assert stubborn.scheduled not in shared.scheduler.queued
+
+    asyncio.run(run())
+
+
+def test_failures_nobody_awaits_are_only_logged_once(monkeypatch):
+    logged = []
+    # Log records would keep the exception, and so the action, alive
+    monkeypatch.setattr(scheduler.logging, "error", lambda message, exc_info: logged.append(message))
+
+    async def run():
+        unhandled = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+
+        await Fail(client(history=0)).run()
+        await asyncio.sleep(0)  # It fails
+        await asyncio.sleep(0)  # Its done callbacks run
+        gc.collect()  # Unretrieved exceptions are reported when their future is collected
+
+        assert unhandled == []
+
+    asyncio.run(run())
+    assert len(logged) == 1
@@ -0,0 +1,158 @@
+import enum
+from dataclasses import dataclass
+
+import pytest
+
+from antorum.schema import (Array, Converted, Custom, Enum, Field, FixedField, Map, Schema, Struct, Tuple, BOOL,
+                            BYTES, FLOAT, INT8, INT16, INT32, INT64, STRING, value_decoder, value_skipper)
+from antorum.utils import BufferReader, BufferWriter
+from wire import blob, f32, i8, i16, i32, i64, string
+
+
+class Color(enum.Enum):
+    RED = 1
+    BLUE = 2
+
+
+@dataclass
+class Point:
+    x: float
+    y: float
+
+
+class Decoded:
+    pass
+
+
+def decode(schema: Schema, data: bytes) -> Decoded:
+    obj = Decoded()
+    reader = BufferReader(data)
+    schema.decode_into(obj, reader)
+    assert reader.pointer == len(data), "the whole payload should be consumed"
+    return obj
+
+
+def encode(schema: Schema, obj) -> bytes:
+    writer = BufferWriter()
+    schema.encode(obj, writer)
+    return bytes(writer)
+
+
+def test_field_is_abstract():
+    with pytest.raises(TypeError, match="abstract"):
+        Field()
+
+    with pytest.raises(TypeError, match="abstract"):
+        FixedField()
+
+
+def test_fused_fixed_run_round_trip():
+    schema = Schema(a=INT8, b=INT16, c=INT32, d=INT64, e=FLOAT, f=BOOL, g=Enum(Color))
+    data = i8(1) + i16(2) + i32(3) + i64(4) + f32(0.5) + i8(1) + i8(2)
+
+    assert schema.size == len(data)
+    obj = decode(schema, data)
+    assert (obj.a, obj.b, obj.c, obj.d, obj.e, obj.f, obj.g) == (1, 2, 3, 4, 0.5, True, Color.BLUE)
+    assert encode(schema, obj) == data
+
+
+def test_fixed_runs_split_by_variable_fields():
+    schema = Schema(a=INT32, name=STRING, b=INT8, c=INT8, payload=BYTES, d=FLOAT)
+    data = i32(7) + string("weed") + i8(1) + i8(2) + blob(b"\x00\xff") + f32(1.5)
+
+    assert schema.size is None
+    obj = decode(schema, data)
+    assert (obj.a, obj.name, obj.b, obj.c, obj.payload, obj.d) == (7, "weed", 1, 2, b"\x00\xff", 1.5)
+    assert encode(schema, obj) == data
+
+
+def test_containers_round_trip():
+    schema = Schema(points=Array(Struct(Point, x=FLOAT, y=FLOAT)), pairs=Map(INT8, Tuple(INT32, STRING)),
+                    colors=Array(Enum(Color)), ids=Array(INT64))
+    data = (i64(2) + f32(1) + f32(2) + f32(3) + f32(4)
+            + i64(2) + i8(1) + i32(10) + string("a") + i8(2) + i32(20) + string("b")
+            + i64(2) + i8(1) + i8(2)
+            + i64(3) + i64(5) + i64(6) + i64(7))
+
+    obj = decode(schema, data)
+    assert obj.points == [Point(1, 2), Point(3, 4)]
+    assert obj.pairs == {1: (10, "a"), 2: (20, "b")}
+    assert obj.colors == [Color.RED, Color.BLUE]
+    assert list(obj.ids) == [5, 6, 7]
+    assert encode(schema, obj) == data
+
+
+def test_converted_round_trip():
+    schema = Schema(scaled=Converted(INT32, lambda value: value / 10, lambda value: int(value * 10)))
+    obj = decode(schema, i32(25))
+
+    assert obj.scaled == 2.5
+    assert encode(schema, obj) == i32(25)
+
+
+def test_non_ascii_string_length_counts_bytes():
+    text = "Skärtweed ✿"
+    schema = Schema(text=STRING)
+    obj = Decoded()
+    obj.text = text
+
+    data = encode(schema, obj)
+    assert data == i64(len(text.encode("utf-8"))) + text.encode("utf-8")
+    assert len(text.encode("utf-8")) != len(text)
+    assert decode(schema, data).text == text
+
+    writer = BufferWriter()
+    writer.write_string(text)
+    assert bytes(writer) == data
+    assert BufferReader(bytes(writer)).read_string() == text
+
+
+@pytest.mark.parametrize("field, data", [
+    (INT32, i32(1)),
+    (STRING, string("abc")),
+    (Tuple(INT8, STRING), i8(1) + string("abc")),
+    (Array(INT64), i64(2) + i64(1) + i64(2)),
+    (Array(Tuple(STRING, INT8)), i64(2) + string("a") + i8(1) + string("bc") + i8(2)),
+    (Map(INT8, Array(STRING)), i64(1) + i8(1) + i64(2) + string("a") + string("b")),
+])
+def test_value_skipper_matches_decoder(field, data):
+    trailer = i32(0xC0FFEE)
+
+    reader = BufferReader(data + trailer)
+    value_skipper(field)(reader)
+    assert reader.pointer == len(data)
+    assert reader.read_int32() == 0xC0FFEE
+
+    reader = BufferReader(data + trailer)
+    value_decoder(field)(reader)
+    assert reader.pointer == len(data)
+
+
+def test_decode_only_field_names_the_field():
+    class Response:
+        schema = Schema(network_id=INT64, entity=Custom(Point))
+
+    with pytest.raises(TypeError, match=r"Response can only be decoded, field 'entity' can't be encoded: "
+                                        r"Custom field Point has no encode function"):
+        Response.schema.encode(Response(), BufferWriter())
+
+
+def test_converted_without_revert_names_the_function():
+    def halve(value):
+        return value / 2
+
+    schema = Schema(value=Converted(INT32, halve))
+
+    with pytest.raises(TypeError, match=r"field 'value' can't be encoded: .*halve has no revert function"):
+        schema.encode(Decoded(), BufferWriter())
+
+
+def test_reader_read_returns_bytes_and_read_view_a_view():
+    reader = BufferReader(b"abcdef")
+
+    data = reader.read(2)
+    assert type(data) is bytes and data == b"ab"
+
+    view = reader.read_view(3)
+    assert isinstance(view, memoryview) and view == b"cde"
+    assert reader.pointer == 5
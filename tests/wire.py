@@ -0,0 +1,103 @@
+"""Hand-written encoders for the wire format, independent of the schemas they check."""
+import struct
+
+
+def i8(value: int) -> bytes:
+    return struct.pack(">B", value)
+
+
+def i16(value: int) -> bytes:
+    return struct.pack(">H", value)
+
+
+def i32(value: int) -> bytes:
+    return struct.pack(">I", value)
+
+
+def i64(value: int) -> bytes:
+    return struct.pack(">Q", value)
+
+
+def f32(value: float) -> bytes:
+    return struct.pack(">f", value)
+
+
+def string(value: str) -> bytes:
+    encoded = value.encode("utf-8")
+    return i64(len(encoded)) + encoded
+
+
+def blob(value: bytes) -> bytes:
+    return i64(len(value)) + value
+
+
+def frame(packet_id: int, payload: bytes) -> bytes:
+    return i16(len(payload)) + i8(packet_id) + payload
+
+
+def item_resource(resource_id: int, name: str, item_type: int = 1, value: int = 1, slot: int = 0) -> bytes:
+    """An ``ItemResource`` as it's stored in ``items.cdata``."""
+    return (i64(resource_id) + string(name.lower()) + string(name) + string(name + "s") + i8(item_type) + i16(1)
+            + i16(2) + i32(value) + i8(1) + i64(0) + i32(0) * 4 + i8(slot) + i8(0) * 6)
+
+
+def items_file(names, version: int = 1) -> bytes:
+    """An ``items.cdata`` with the given item names, their resource ids are their positions."""
+    return i64(version) + i64(len(names)) + b"".join(i64(resource_id) + item_resource(resource_id, name)
+                                                     for resource_id, name in enumerate(names))
+
+
+def inventory_item(slot: int, resource_id: int, amount: int, property_bag: str = "") -> bytes:
+    return i8(slot) + i64(resource_id) + i32(amount) + string(property_bag)
+
+
+def info_state(name: str, model_id: int = 1) -> bytes:
+    return i32(0) + string(name) + i16(model_id)
+
+
+def transform_state(x: float, y: float) -> bytes:
+    return i32(1) + f32(x) + f32(y) + f32(0) * 3 + f32(1) * 3
+
+
+def movement_state(destinations, is_moving: bool = True, speed: float = 4.0) -> bytes:
+    return (i32(2) + i64(len(destinations)) + b"".join(f32(x) + f32(y) for x, y in destinations) + i8(is_moving)
+            + f32(speed))
+
+
+def health_state(health: int, max_health: int) -> bytes:
+    return i32(3) + i32(health) + i32(max_health)
+
+
+def interactable_state(interactions) -> bytes:
+    return i32(5) + i64(len(interactions)) + b"".join(i8(interaction) for interaction in interactions)
+
+
+def player_state(player_id: int) -> bytes:
+    return i32(6) + i64(player_id)
+
+
+def equipment_state(equipped=()) -> bytes:
+    """``equipped`` holds ``inventory_item`` arguments, the slot being the ``ItemSlot`` value."""
+    return i32(7) + bytes(range(9)) + i64(len(equipped)) + b"".join(inventory_item(*item) for item in equipped)
+
+
+def entity(network_id: int, states) -> bytes:
+    return i64(network_id) + i64(len(states)) + b"".join(states)
+
+
+def weed_entity(network_id: int, x: float, y: float, name: str = "Skartweed") -> bytes:
+    return entity(network_id, [info_state(name), transform_state(x, y), interactable_state([4, 7])])
+
+
+def player_entity(network_id: int, player_id: int, name: str, x: float = 10, y: float = 10) -> bytes:
+    return entity(network_id, [info_state(name), transform_state(x, y), movement_state([], False),
+                               health_state(30, 30), player_state(player_id)])
+
+
+def world_entities(entities, removed=(), full_sync: bool = True) -> bytes:
+    return (i32(0) + i32(0) + i64(len(entities)) + b"".join(entities) + i64(len(removed))
+            + b"".join(i64(network_id) for network_id in removed) + i8(full_sync))
+
+
+def chat(message: str, player_id: int = 0, username: str = "", channel: int = 0) -> bytes:
+    return i64(player_id) + string(username) + i8(channel) + string(message)